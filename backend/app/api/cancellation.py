@@ -0,0 +1,50 @@
+"""
+Request cancellation helpers
+
+Starlette keeps running a request handler after the client has gone away.
+For handlers waiting on long warehouse statements, cancel_on_disconnect
+watches the connection and cancels the pending work when the client
+disconnects, which in turn cancels the statement on the warehouse.
+"""
+from typing import Awaitable, TypeVar
+from fastapi import HTTPException, Request
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Non-standard status used by nginx and others for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """
+    Await a result, cancelling it if the client disconnects first
+
+    Args:
+        request: Incoming request whose connection is watched
+        awaitable: Work to await (e.g. databricks_repo.execute_query_async(...))
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        The awaitable's result
+
+    Raises:
+        HTTPException: 499 when the client disconnected before completion
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected from {request.url.path}, cancelling query")
+                task.cancel()
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
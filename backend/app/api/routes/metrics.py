@@ -4,11 +4,31 @@ Metrics API routes for accessing dominos_analytics semantic layer
 This module provides endpoints for querying metrics from Unity Catalog's
 dominos_analytics schema, which contains pre-aggregated metrics and KPIs.
 """
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from datetime import date
+from typing import Any, Awaitable, AsyncIterator, Callable, Dict, List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from app.repositories.databricks_repo import databricks_repo
+from app.repositories.databricks_repo import databricks_repo, QueryTimeoutError
+from app.repositories.admission import QueryPriority, WarehouseBusyError
+from app.repositories.circuit_breaker import CircuitOpenError, track_stale_results
+from app.core.config import settings
+from app.api.streaming import ndjson_response
+from app.api.cancellation import cancel_on_disconnect
+from app.services.cohort_engine import CohortGranularity, cohort_engine
+from app.services.cohort_retention_refresh import cohort_retention_refresh
+from app.services.distinct_sketches import distinct_sketches
+from app.services.freshness import freshness_tracker
+from app.services.metric_refresher import metric_refresher
+from app.services.metric_registry import SALES_FACT, metric_registry
+from app.services.olap_cube import olap_cubes
+from app.services.partial_aggregates import Granularity, partial_aggregates
+from app.services.revenue_trend import revenue_trend_cache
+from app.services.sales_fusion import fetch_fused_sales
+import asyncio
+import time
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -48,10 +68,123 @@ class DashboardMetrics(BaseModel):
     customer_satisfaction: float
 
 
+class DashboardBundle(BaseModel):
+    """Every dashboard panel in one payload"""
+    panels: Dict[str, Any]
+    errors: Dict[str, str]
+    timings_ms: Dict[str, float]
+    stale_seconds: Dict[str, float] = {}  # panels answered from last-good results during an outage
+
+
 # ============================================================================
 # API Endpoints
 # ============================================================================
 
+# Last-resort placeholders, served only when no real value has ever been
+# computed (the background refresher otherwise serves the last real one)
+_DEMO_SUMMARY = DashboardMetrics(
+    total_revenue=6120000.0,
+    total_orders=86800,
+    avg_order_value=27.45,
+    customer_satisfaction=4.6
+)
+
+_DEMO_REVENUE_TREND = [
+    {"month": "Jan", "revenue": 850000, "orders": 12500},
+    {"month": "Feb", "revenue": 920000, "orders": 13200},
+    {"month": "Mar", "revenue": 1050000, "orders": 14800},
+    {"month": "Apr", "revenue": 980000, "orders": 13900},
+    {"month": "May", "revenue": 1120000, "orders": 15600},
+    {"month": "Jun", "revenue": 1200000, "orders": 16800},
+]
+
+_DEMO_CHANNEL_BREAKDOWN = [
+    {"channel": "Mobile App", "revenue": 450000},
+    {"channel": "Online", "revenue": 380000},
+    {"channel": "Phone", "revenue": 220000},
+    {"channel": "Walk-in", "revenue": 150000},
+]
+
+
+async def _load_summary(priority: QueryPriority = QueryPriority.INTERACTIVE) -> Optional[DashboardMetrics]:
+    """Query the summary KPIs (None when the table has no rows)"""
+    if settings.SALES_FACT_FUSION_ENABLED:
+        summary = (await fetch_fused_sales(priority=priority)).summary
+        results = [summary] if summary else []
+    else:
+        results = await metric_registry.fetch("summary", priority=priority)
+
+    if not results or not results[0]:
+        return None
+
+    row = results[0]
+    return DashboardMetrics(
+        total_revenue=float(row.get("total_revenue") or 0),
+        total_orders=int(row.get("total_orders") or 0),
+        avg_order_value=float(row.get("avg_order_value") or 0),
+        customer_satisfaction=4.6  # Static for now - add sentiment analysis later
+    )
+
+
+async def _load_revenue_trend(months: int = 6, priority: QueryPriority = QueryPriority.INTERACTIVE) -> List[dict]:
+    """Query monthly revenue and orders"""
+    if settings.REVENUE_TREND_INCREMENTAL:
+        return await revenue_trend_cache.get(months, priority)
+    if settings.SALES_FACT_FUSION_ENABLED:
+        return (await fetch_fused_sales(months, priority, include_trend=True)).revenue_trend
+    return await metric_registry.fetch("revenue_trend", priority=priority, days=months * 30)
+
+
+async def _load_channel_breakdown(priority: QueryPriority = QueryPriority.INTERACTIVE) -> List[dict]:
+    """Query revenue by channel"""
+    if settings.SALES_FACT_FUSION_ENABLED:
+        return (await fetch_fused_sales(priority=priority)).channel_breakdown
+    return await metric_registry.fetch("channel_breakdown", priority=priority)
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    """Parse a YYYY-MM-DD query parameter (400 if malformed)"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+
+async def _load_date_range(
+    metric: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    granularity: Granularity,
+    group: Optional[str] = None,
+    **filters
+) -> List[dict]:
+    """
+    Query a date-filtered metric view
+
+    With PARTIAL_AGGREGATES_ENABLED the range is answered from the in-memory
+    partial aggregate store; otherwise it is a warehouse query per range.
+
+    Args:
+        metric: Registered metric name
+        start_date: Optional start date (YYYY-MM-DD)
+        end_date: Optional end date (YYYY-MM-DD)
+        granularity: month, quarter or year
+        group: Value of the metric's group column to keep (store only)
+        **filters: Registry filters equivalent to group (warehouse only)
+    """
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+
+    if settings.PARTIAL_AGGREGATES_ENABLED:
+        return await partial_aggregates.query(metric, start, end, granularity, group)
+
+    if granularity != "month":
+        raise HTTPException(status_code=400, detail="Only month granularity is available without PARTIAL_AGGREGATES_ENABLED")
+    return await metric_registry.fetch(metric, start_date=start, end_date=end, **filters)
+
+
 @router.get("/summary", response_model=DashboardMetrics)
 async def get_dashboard_summary():
     """
@@ -62,49 +195,28 @@ async def get_dashboard_summary():
     - Total orders
     - Average order value
     - Customer satisfaction score (static for now)
+
+    With SALES_FACT_FUSION_ENABLED the KPIs come from the scan shared with
+    /revenue-trend and /channel-breakdown. Served from the background
+    refresher's last value once it has been computed.
     """
-    try:
-        # Query the raw daily_sales_fact table
-        # Note: order_total is the final amount charged (includes tax, delivery, tip)
-        # net_revenue is revenue after discounts
-        # AOV = total revenue / total orders (not average of order totals)
-        query = """
-        SELECT
-            SUM(net_revenue) as total_revenue,
-            COUNT(DISTINCT order_id) as total_orders,
-            SUM(net_revenue) / COUNT(DISTINCT order_id) as avg_order_value
-        FROM main.dominos_realistic.daily_sales_fact
-        WHERE order_date >= DATE_SUB(CURRENT_DATE(), 180)
-        """
+    precomputed = metric_refresher.get("summary")
+    if precomputed is not None:
+        return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        summary = await _load_summary()
 
-        if not results or not results[0]:
+        if summary is None:
             logger.warning("No results from database, using demo data")
-            return DashboardMetrics(
-                total_revenue=6120000.0,
-                total_orders=86800,
-                avg_order_value=27.45,
-                customer_satisfaction=4.6
-            )
+            return _DEMO_SUMMARY
 
-        row = results[0]
-        return DashboardMetrics(
-            total_revenue=float(row.get("total_revenue") or 0),
-            total_orders=int(row.get("total_orders") or 0),
-            avg_order_value=float(row.get("avg_order_value") or 0),
-            customer_satisfaction=4.6  # Static for now - add sentiment analysis later
-        )
+        return summary
 
     except Exception as e:
         logger.error(f"Error fetching dashboard summary: {e}", exc_info=True)
         # Return demo data on error
-        return DashboardMetrics(
-            total_revenue=6120000.0,
-            total_orders=86800,
-            avg_order_value=27.45,
-            customer_satisfaction=4.6
-        )
+        return _DEMO_SUMMARY
 
 
 @router.get("/revenue-trend")
@@ -117,45 +229,28 @@ async def get_revenue_trend(months: int = Query(6, ge=1, le=24)):
 
     Returns:
         Monthly revenue data points
+
+    With REVENUE_TREND_INCREMENTAL closed months are reused from memory and
+    only recent months are re-aggregated, so the cost doesn't grow with months.
     """
-    try:
-        query = f"""
-        SELECT
-            DATE_FORMAT(order_date, 'MMM yyyy') as month,
-            SUM(net_revenue) as revenue,
-            COUNT(DISTINCT order_id) as orders
-        FROM main.dominos_realistic.daily_sales_fact
-        WHERE order_date >= DATE_SUB(CURRENT_DATE(), {months * 30})
-        GROUP BY DATE_TRUNC('MONTH', order_date), DATE_FORMAT(order_date, 'MMM yyyy')
-        ORDER BY DATE_TRUNC('MONTH', order_date) ASC
-        """
+    if months == 6:
+        precomputed = metric_refresher.get("revenue_trend")
+        if precomputed is not None:
+            return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await _load_revenue_trend(months)
 
         if not results:
             logger.warning("No revenue trend data found, using demo data")
-            return [
-                {"month": "Jan", "revenue": 850000, "orders": 12500},
-                {"month": "Feb", "revenue": 920000, "orders": 13200},
-                {"month": "Mar", "revenue": 1050000, "orders": 14800},
-                {"month": "Apr", "revenue": 980000, "orders": 13900},
-                {"month": "May", "revenue": 1120000, "orders": 15600},
-                {"month": "Jun", "revenue": 1200000, "orders": 16800},
-            ]
+            return _DEMO_REVENUE_TREND
 
         return results
 
     except Exception as e:
         logger.error(f"Error fetching revenue trend: {e}", exc_info=True)
         # Return demo data
-        return [
-            {"month": "Jan", "revenue": 850000, "orders": 12500},
-            {"month": "Feb", "revenue": 920000, "orders": 13200},
-            {"month": "Mar", "revenue": 1050000, "orders": 14800},
-            {"month": "Apr", "revenue": 980000, "orders": 13900},
-            {"month": "May", "revenue": 1120000, "orders": 15600},
-            {"month": "Jun", "revenue": 1200000, "orders": 16800},
-        ]
+        return _DEMO_REVENUE_TREND
 
 
 @router.get("/channel-breakdown")
@@ -169,39 +264,23 @@ async def get_channel_breakdown():
     - Phone
     - Walk-in
     """
-    try:
-        query = """
-        SELECT
-            channel,
-            SUM(net_revenue) as revenue
-        FROM main.dominos_realistic.daily_sales_fact
-        WHERE order_date >= DATE_SUB(CURRENT_DATE(), 30)
-        GROUP BY channel
-        ORDER BY revenue DESC
-        """
+    precomputed = metric_refresher.get("channel_breakdown")
+    if precomputed is not None:
+        return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await _load_channel_breakdown()
 
         if not results:
             logger.warning("No channel breakdown data found, using demo data")
-            return [
-                {"channel": "Mobile App", "revenue": 450000},
-                {"channel": "Online", "revenue": 380000},
-                {"channel": "Phone", "revenue": 220000},
-                {"channel": "Walk-in", "revenue": 150000},
-            ]
+            return _DEMO_CHANNEL_BREAKDOWN
 
         return results
 
     except Exception as e:
         logger.error(f"Error fetching channel breakdown: {e}", exc_info=True)
         # Return demo data
-        return [
-            {"channel": "Mobile App", "revenue": 450000},
-            {"channel": "Online", "revenue": 380000},
-            {"channel": "Phone", "revenue": 220000},
-            {"channel": "Walk-in", "revenue": 150000},
-        ]
+        return _DEMO_CHANNEL_BREAKDOWN
 
 
 # ============================================================================
@@ -221,19 +300,12 @@ async def get_cac_by_channel():
 
     Channels: Email, App, Search, Social, Display, TV
     """
-    try:
-        query = """
-        SELECT
-            channel,
-            total_spend,
-            new_customers,
-            cac,
-            cac_grade
-        FROM main.dominos_analytics.metric_cac_by_channel
-        ORDER BY cac ASC
-        """
+    precomputed = metric_refresher.get("cac_by_channel")
+    if precomputed is not None:
+        return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await metric_registry.fetch("cac_by_channel")
 
         if not results:
             logger.warning("No CAC data found")
@@ -261,25 +333,21 @@ async def get_arpu_by_segment(
 
     Args:
         year: Optional year filter (defaults to all years)
-    """
-    try:
-        query = """
-        SELECT
-            customer_segment,
-            order_year,
-            arpu,
-            customer_count,
-            total_revenue,
-            avg_orders_per_customer
-        FROM main.dominos_analytics.metric_arpu_by_segment
-        """
-
-        if year:
-            query += f" WHERE order_year = {year}"
 
-        query += " ORDER BY arpu DESC"
+    With OLAP_CUBE_ENABLED the year filter is a slice of the in-memory ARPU
+    cube rather than a warehouse query.
+    """
+    if not year:
+        precomputed = metric_refresher.get("arpu_by_segment")
+        if precomputed is not None:
+            return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        if settings.OLAP_CUBE_ENABLED and year:
+            cube = await olap_cubes.get("arpu_by_segment")
+            results = cube.slice("order_year", year).rollup(["customer_segment", "order_year"])
+        else:
+            results = await metric_registry.fetch("arpu_by_segment", year=year or None)
 
         if not results:
             logger.warning(f"No ARPU data found for year {year if year else 'all'}")
@@ -310,25 +378,13 @@ async def get_cohort_retention(
     Args:
         cohort_month: Optional cohort month filter (e.g., '2024-01-01')
     """
-    try:
-        query = """
-        SELECT
-            cohort_month,
-            months_since_acquisition,
-            cohort_size,
-            active_customers,
-            retention_rate_pct,
-            total_revenue,
-            avg_revenue_per_customer
-        FROM main.dominos_analytics.metric_cohort_retention
-        """
+    if not cohort_month:
+        precomputed = metric_refresher.get("cohort_retention")
+        if precomputed is not None:
+            return precomputed
 
-        if cohort_month:
-            query += f" WHERE cohort_month = '{cohort_month}'"
-
-        query += " ORDER BY cohort_month DESC, months_since_acquisition ASC"
-
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await metric_registry.fetch("cohort_retention", cohort_month=cohort_month or None)
 
         if not results:
             logger.warning(f"No cohort retention data found")
@@ -342,10 +398,68 @@ async def get_cohort_retention(
         return []
 
 
+async def _load_cohort_matrix(priority: QueryPriority = QueryPriority.BACKGROUND) -> Dict[str, Any]:
+    """Fetch new customer activity and compute the default (monthly) retention matrix"""
+    await cohort_engine.refresh(priority)
+    return await cohort_engine.matrix(priority=priority)
+
+
+@router.get("/cohort-matrix")
+async def get_cohort_matrix(
+    granularity: CohortGranularity = Query("month", description="Cohort period (week, month, quarter)"),
+    segment: Optional[str] = Query(None, description="Filter by customer segment"),
+    start_date: Optional[str] = Query(None, description="Earliest cohort (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Latest cohort (YYYY-MM-DD)"),
+    max_periods: int = Query(12, ge=1, le=104, description="Periods since acquisition to include"),
+    min_cohort_size: int = Query(1, ge=1, description="Drop smaller cohorts")
+):
+    """
+    Get a dense cohort retention matrix
+
+    Computed in-process by the cohort engine from customer activity held in
+    memory, so changing granularity, segment or cohort range doesn't query
+    the warehouse.
+
+    Args:
+        granularity: Cohort and activity period
+        segment: Optional customer segment filter
+        start_date: Optional earliest cohort (by first order date)
+        end_date: Optional latest cohort (by first order date)
+        max_periods: Number of periods after acquisition (columns 0..max_periods)
+        min_cohort_size: Minimum customers per cohort
+
+    Returns:
+        cohorts, periods, cohort_sizes, active and retention_pct matrices
+        (rows = cohorts oldest first, None = not yet observable)
+    """
+    if not settings.COHORT_ENGINE_ENABLED:
+        raise HTTPException(status_code=404, detail="Cohort engine is disabled")
+
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+
+    is_default = (
+        granularity == "month" and not segment and not start and not end
+        and max_periods == 12 and min_cohort_size == 1
+    )
+    if is_default:
+        precomputed = metric_refresher.get("cohort_matrix")
+        if precomputed is not None:
+            return precomputed
+
+    try:
+        return await cohort_engine.matrix(granularity, segment or None, start, end, max_periods, min_cohort_size)
+
+    except Exception as e:
+        logger.error(f"Error computing cohort matrix: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/gmv-trend")
 async def get_gmv_trend(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    granularity: Granularity = Query("month", description="Period to roll months up to (month, quarter, year)")
 ):
     """
     Get Gross Merchandise Value (GMV) trend over time
@@ -362,32 +476,18 @@ async def get_gmv_trend(
     Args:
         start_date: Optional start date filter
         end_date: Optional end date filter
-    """
-    try:
-        query = """
-        SELECT
-            month,
-            gmv,
-            net_revenue,
-            total_discounts,
-            discount_rate_pct,
-            order_count,
-            customer_count
-        FROM main.dominos_analytics.metric_gmv
-        """
-
-        where_clauses = []
-        if start_date:
-            where_clauses.append(f"month >= '{start_date}'")
-        if end_date:
-            where_clauses.append(f"month <= '{end_date}'")
+        granularity: Roll months up to quarters or years (default: month)
 
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-
-        query += " ORDER BY month ASC"
+    Date ranges and rollups are answered from the in-memory partial
+    aggregate store when PARTIAL_AGGREGATES_ENABLED.
+    """
+    if not start_date and not end_date and granularity == "month":
+        precomputed = metric_refresher.get("gmv_trend")
+        if precomputed is not None:
+            return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await _load_date_range("gmv_trend", start_date, end_date, granularity)
 
         if not results:
             logger.warning("No GMV trend data found")
@@ -395,6 +495,8 @@ async def get_gmv_trend(
 
         return results
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching GMV trend: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -403,7 +505,8 @@ async def get_gmv_trend(
 @router.get("/channel-mix")
 async def get_channel_mix(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    granularity: Granularity = Query("month", description="Period to roll months up to (month, quarter, year)")
 ):
     """
     Get order and revenue distribution by channel over time
@@ -419,31 +522,18 @@ async def get_channel_mix(
     Args:
         start_date: Optional start date filter
         end_date: Optional end date filter
-    """
-    try:
-        query = """
-        SELECT
-            month,
-            channel,
-            order_count,
-            revenue,
-            pct_of_orders,
-            pct_of_revenue
-        FROM main.dominos_analytics.metric_channel_mix
-        """
+        granularity: Roll months up to quarters or years (default: month)
 
-        where_clauses = []
-        if start_date:
-            where_clauses.append(f"month >= '{start_date}'")
-        if end_date:
-            where_clauses.append(f"month <= '{end_date}'")
-
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-
-        query += " ORDER BY month DESC, pct_of_revenue DESC"
+    Date ranges and rollups are answered from the in-memory partial
+    aggregate store when PARTIAL_AGGREGATES_ENABLED.
+    """
+    if not start_date and not end_date and granularity == "month":
+        precomputed = metric_refresher.get("channel_mix")
+        if precomputed is not None:
+            return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await _load_date_range("channel_mix", start_date, end_date, granularity)
 
         if not results:
             logger.warning("No channel mix data found")
@@ -451,6 +541,8 @@ async def get_channel_mix(
 
         return results
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching channel mix: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -460,7 +552,8 @@ async def get_channel_mix(
 async def get_attach_rate(
     segment: Optional[str] = Query(None, description="Filter by customer segment"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    granularity: Granularity = Query("month", description="Period to roll months up to (month, quarter, year)")
 ):
     """
     Get upsell attach rates (sides, desserts, beverages) by segment
@@ -478,34 +571,20 @@ async def get_attach_rate(
         segment: Optional customer segment filter (Family, Young Professional, Student, Single)
         start_date: Optional start date filter
         end_date: Optional end date filter
-    """
-    try:
-        query = """
-        SELECT
-            month,
-            customer_segment,
-            total_orders,
-            sides_attach_rate_pct,
-            dessert_attach_rate_pct,
-            beverage_attach_rate_pct,
-            any_addon_rate_pct
-        FROM main.dominos_analytics.metric_attach_rate
-        """
-
-        where_clauses = []
-        if segment:
-            where_clauses.append(f"customer_segment = '{segment}'")
-        if start_date:
-            where_clauses.append(f"month >= '{start_date}'")
-        if end_date:
-            where_clauses.append(f"month <= '{end_date}'")
+        granularity: Roll months up to quarters or years (default: month)
 
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-
-        query += " ORDER BY month DESC, customer_segment"
+    Date ranges and rollups are answered from the in-memory partial
+    aggregate store when PARTIAL_AGGREGATES_ENABLED.
+    """
+    if not segment and not start_date and not end_date and granularity == "month":
+        precomputed = metric_refresher.get("attach_rate")
+        if precomputed is not None:
+            return precomputed
 
-        results = databricks_repo.execute_query(query)
+    try:
+        results = await _load_date_range(
+            "attach_rate", start_date, end_date, granularity, group=segment or None, segment=segment or None
+        )
 
         if not results:
             logger.warning("No attach rate data found")
@@ -513,20 +592,288 @@ async def get_attach_rate(
 
         return results
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching attach rate: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================================
+# OLAP Cubes
+# ============================================================================
+
+@router.get("/cubes")
+async def list_cubes():
+    """
+    List the in-memory OLAP cubes
+
+    Returns each cube's dimensions and measures, plus cell counts and ages
+    of the cubes built so far.
+    """
+    return {
+        "cubes": [spec.model_dump() for spec in olap_cubes.specs()],
+        "built": olap_cubes.status(),
+    }
+
+
+@router.get("/cube/{name}")
+async def query_cube(
+    name: str,
+    by: List[str] = Query([], description="Dimensions to keep (default: all)"),
+    filter: List[str] = Query([], description="dimension:value filters; repeat a dimension to match any of its values")
+):
+    """
+    Slice, dice and roll up an in-memory OLAP cube
+
+    Example: /metrics/cube/channel_mix?by=channel&filter=month:2025-01-01&filter=month:2025-02-01
+    returns revenue share per channel over January and February.
+
+    Args:
+        name: Cube name (channel_mix, attach_rate, arpu_by_segment)
+        by: Dimensions to keep in the result
+        filter: dimension:value pairs
+
+    Returns:
+        Rolled-up rows with dimensions and measures
+    """
+    if not settings.OLAP_CUBE_ENABLED:
+        raise HTTPException(status_code=404, detail="OLAP cubes are disabled")
+    if name not in olap_cubes:
+        raise HTTPException(status_code=404, detail=f"Unknown cube '{name}'")
+
+    filters: Dict[str, List[str]] = {}
+    for item in filter:
+        dim, sep, value = item.partition(":")
+        if not sep:
+            raise HTTPException(status_code=400, detail=f"Filter '{item}' must be dimension:value")
+        filters.setdefault(dim, []).append(value)
+
+    try:
+        cube = await olap_cubes.get(name)
+        return cube.dice(**filters).rollup(by or cube.spec.dimensions)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+    except Exception as e:
+        logger.error(f"Error querying {name} cube: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# Approximate Distinct Counts
+# ============================================================================
+
+@router.get("/distinct-counts")
+async def get_distinct_counts(
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD), default today")
+):
+    """
+    Get distinct orders and customers over a date range
+
+    With DISTINCT_SKETCHES_ENABLED the counts are HyperLogLog estimates
+    from per-day sketches held in memory (no warehouse query per range);
+    otherwise they are exact COUNT(DISTINCT) queries.
+
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range (inclusive)
+
+    Returns:
+        orders, customers, whether they are approximate, and the relative
+        standard error of the estimate
+    """
+    start = _parse_date(start_date)
+    end = _parse_date(end_date) or date.today()
+
+    try:
+        if settings.DISTINCT_SKETCHES_ENABLED:
+            await distinct_sketches.ensure_loaded()
+            orders = distinct_sketches.count("orders", start, end)
+            customers = distinct_sketches.count("customers", start, end)
+            if orders is not None and customers is not None:
+                return {
+                    "start_date": start,
+                    "end_date": end,
+                    "orders": orders,
+                    "customers": customers,
+                    "approximate": True,
+                    "relative_error": distinct_sketches.relative_error,
+                }
+            logger.info(f"Range {start}..{end} starts before the sketch history, counting exactly")
+
+        query = f"""
+        SELECT COUNT(DISTINCT order_id) AS orders, COUNT(DISTINCT customer_id) AS customers
+        FROM {SALES_FACT}
+        WHERE order_date >= :start_date AND order_date <= :end_date
+        """
+        rows = await databricks_repo.execute_query_async(
+            query, {"start_date": start, "end_date": end}, ttl=settings.SALES_FACT_CACHE_TTL
+        )
+        return {
+            "start_date": start,
+            "end_date": end,
+            "orders": rows[0]["orders"],
+            "customers": rows[0]["customers"],
+            "approximate": False,
+            "relative_error": 0,
+        }
+
+    except Exception as e:
+        logger.error(f"Error fetching distinct counts: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/approximations")
+async def get_approximations():
+    """
+    List the endpoint fields served as approximate distinct counts
+
+    Returns the HyperLogLog relative standard error and, per endpoint, the
+    fields that are estimates and when.
+    """
+    if not settings.DISTINCT_SKETCHES_ENABLED:
+        return {"relative_error": None, "endpoints": []}
+
+    endpoints = [{
+        "endpoint": f"{settings.API_PREFIX}{router.prefix}/distinct-counts",
+        "fields": ["orders", "customers"],
+        "when": "range starts within the sketch history",
+    }]
+    if settings.PARTIAL_AGGREGATES_ENABLED:
+        endpoints += [
+            {
+                "endpoint": f"{settings.API_PREFIX}{router.prefix}/{metric.replace('_', '-')}",
+                "fields": fields,
+                "when": "granularity is quarter or year",
+            }
+            for metric, fields in partial_aggregates.approximate_fields().items()
+        ]
+
+    return {"relative_error": distinct_sketches.relative_error, "sketches": distinct_sketches.status(), "endpoints": endpoints}
+
+
+# ============================================================================
+# Query Cache Administration
+# ============================================================================
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get query result cache statistics
+
+    Returns hit/miss counters, hit rate, evictions and current memory usage.
+    """
+    return databricks_repo.cache_stats()
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(
+    table: Optional[str] = Query(None, description="Only invalidate results that read this table")
+):
+    """
+    Invalidate cached query results (admin endpoint)
+
+    Args:
+        table: Optional table name (e.g. "metric_gmv"); clears the whole cache when omitted
+    """
+    removed = databricks_repo.invalidate_cache(table)
+    return {
+        "status": "success",
+        "invalidated": removed,
+        "table": table
+    }
+
+
+@router.get("/refresh/status")
+async def get_refresh_status():
+    """
+    Get background metric refresh status
+
+    Returns, per precomputed metric, when it was last refreshed, its age and
+    the last refresh error (if any), plus the partial aggregate store's
+    loaded metrics.
+    """
+    return {
+        **metric_refresher.status(),
+        "partial_aggregates": partial_aggregates.status(),
+        "cohort_retention_refresh": cohort_retention_refresh.status(),
+        "freshness": freshness_tracker.status(),
+    }
+
+
+@router.post("/refresh/cohort-retention")
+async def refresh_cohort_retention():
+    """
+    Incrementally refresh the metric_cohort_retention table (admin endpoint)
+
+    MERGEs only the retention cells affected by orders since the stored
+    watermark, then recomputes the precomputed cohort_retention metric.
+
+    Requires COHORT_RETENTION_REFRESH_ENABLED, since it writes to the
+    analytics schema.
+
+    Returns:
+        The refresh window, old and new watermark and rows affected per step
+    """
+    if not settings.COHORT_RETENTION_REFRESH_ENABLED:
+        raise HTTPException(status_code=404, detail="Incremental cohort retention refresh is disabled")
+
+    try:
+        result = await cohort_retention_refresh.run(QueryPriority.EXPLORE)
+        await metric_refresher.refresh("cohort_retention")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(f"Error refreshing cohort retention: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/registry")
+async def get_metric_registry():
+    """
+    List the registered metric definitions
+
+    Returns each metric's source, dimensions, measures, filters and cache TTL.
+    """
+    return [metric.model_dump() for metric in metric_registry.definitions()]
+
+
+@router.get("/warehouse/admission")
+async def get_admission_stats():
+    """
+    Get warehouse admission control statistics
+
+    Returns running/queued statement counts and, per priority class,
+    admitted/rejected counts and queue wait times.
+    """
+    return databricks_repo.admission_stats()
+
+
+@router.get("/warehouse/circuit")
+async def get_circuit_stats():
+    """
+    Get warehouse circuit breaker state
+
+    Returns whether the circuit is open (statements failing fast, queries
+    answered from last-good results), its failure/probe counters and the
+    last-good result store occupancy.
+    """
+    return databricks_repo.circuit_stats()
+
+
 # ============================================================================
 # Custom Query Endpoint
 # ============================================================================
 
 @router.get("/query")
 async def execute_custom_query(
+    request: Request,
     schema: str = Query("dominos_realistic", description="Schema name (dominos_realistic or dominos_analytics)"),
     table: str = Query(..., description="Table name"),
-    limit: int = Query(100, ge=1, le=10000, description="Maximum rows to return")
+    limit: int = Query(100, ge=1, le=10000, description="Maximum rows to return"),
+    stream: bool = Query(False, description="Stream rows as NDJSON while result chunks arrive"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="Response shape: rows (list of objects) or columnar")
 ):
     """
     Execute a custom query against a specific table
@@ -535,9 +882,12 @@ async def execute_custom_query(
         schema: Schema name (dominos_realistic or dominos_analytics)
         table: Table name (e.g., "daily_sales_fact")
         limit: Maximum number of rows to return
+        stream: Stream rows as newline-delimited JSON instead of one JSON array
+        format: "rows" for a list of dictionaries, "columnar" for
+                {"columns": [...], "data": [[column values], ...], "row_count": n}
 
     Returns:
-        Query results as list of dictionaries
+        Query results as list of dictionaries, columnar payload, or NDJSON stream
     """
     try:
         # Validate schema
@@ -577,75 +927,95 @@ async def execute_custom_query(
                 detail=f"Table '{table}' not allowed in schema '{schema}'. Allowed tables: {allowed_tables[schema]}"
             )
 
+        # Identifiers can't be bound as parameters; schema and table are
+        # whitelisted above and limit is a validated integer
         query = f"""
         SELECT *
         FROM main.{schema}.{table}
         LIMIT {limit}
         """
 
-        results = databricks_repo.execute_query(query)
+        if stream:
+            return ndjson_response(
+                databricks_repo.aiter_query(query, batches=True, priority=QueryPriority.EXPLORE)
+            )
+
+        # Cancel the statement if the client disconnects while it runs
+        if format == "columnar":
+            result = await cancel_on_disconnect(
+                request, databricks_repo.execute_query_columnar_async(query, priority=QueryPriority.EXPLORE)
+            )
+            return result.to_dict()
+
+        results = await cancel_on_disconnect(
+            request, databricks_repo.execute_query_async(query, priority=QueryPriority.EXPLORE)
+        )
         return results
 
     except HTTPException:
         raise
+    except (WarehouseBusyError, CircuitOpenError) as e:
+        logger.warning(f"Custom query rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except QueryTimeoutError as e:
+        logger.warning(f"Custom query timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error executing custom query: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+_WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+async def _load_hourly_heatmap(priority: QueryPriority = QueryPriority.INTERACTIVE) -> List[List[int]]:
+    """Query orders per weekday x hour as a 7 x 24 matrix (row 0 = Monday)"""
+    rows = await metric_registry.fetch("hourly_heatmap", priority=priority)
+
+    matrix = np.zeros((7, 24), dtype=np.int64)
+    valid = [row for row in rows if row["day_index"] is not None and row["hour"] is not None]
+    if valid:
+        matrix[
+            np.array([int(row["day_index"]) for row in valid]),
+            np.array([int(row["hour"]) for row in valid])
+        ] = [int(row["orders"] or 0) for row in valid]
+    return matrix.tolist()
+
+
 @router.get("/hourly-heatmap")
-async def get_hourly_heatmap():
+async def get_hourly_heatmap(
+    layout: Literal["cells", "matrix"] = Query("cells", description="cells (one row per hour) or matrix (7 x 24)")
+):
     """
     Get order volume by hour and day of week (last 30 days)
 
-    Returns heatmap data showing:
-    - Day of week (Mon-Sun)
-    - Hour of day (0-23)
-    - Order count for that hour/day combination
+    Aggregates daily_sales_fact by WEEKDAY/HOUR of ORDER_TIMESTAMP_COLUMN.
+    The 7 x 24 matrix is precomputed by the background refresher and served
+    from memory. If it hasn't been computed yet, the first request computes
+    it and stores it, so later requests are served from memory and refresh
+    it in the background once stale, even without the refresh loop.
+
+    Args:
+        layout: "cells" returns one entry per day/hour with:
+                - Day of week (Mon-Sun)
+                - Hour of day (0-23)
+                - Order count for that hour/day combination
+                "matrix" returns {"days", "hours", "values"} with values[day][hour]
     """
     try:
-        # Generate synthetic heatmap data based on realistic pizza order patterns
-        # In production, this would query actual hourly data from daily_sales_fact
-        import random
-
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        data = []
-
-        for day_idx, day in enumerate(days):
-            for hour in range(24):
-                # Base order count
-                base = 100
-
-                # Peak lunch (11-14)
-                if 11 <= hour <= 14:
-                    base += 300
-                # Peak dinner (17-21)
-                if 17 <= hour <= 21:
-                    base += 500
-                # Late night (21-24)
-                if 21 <= hour <= 23:
-                    base += 200
-                # Weekend boost
-                if day_idx >= 5:
-                    base *= 1.3
-                # Friday/Saturday night
-                if (day_idx == 4 or day_idx == 5) and hour >= 18:
-                    base *= 1.5
-                # Low overnight
-                if 0 <= hour <= 9:
-                    base *= 0.2
-
-                # Add randomness
-                base *= (0.8 + random.random() * 0.4)
-
-                data.append({
-                    'day': day,
-                    'hour': hour,
-                    'dayIndex': day_idx,
-                    'value': round(base)
-                })
+        matrix = metric_refresher.get("hourly_heatmap")
+        if matrix is None:
+            matrix = await _load_hourly_heatmap()
+            metric_refresher.store("hourly_heatmap", matrix)
 
-        return data
+        if layout == "matrix":
+            return {"days": _WEEKDAYS, "hours": list(range(24)), "values": matrix}
+
+        return [
+            {"day": day, "hour": hour, "dayIndex": day_idx, "value": matrix[day_idx][hour]}
+            for day_idx, day in enumerate(_WEEKDAYS)
+            for hour in range(24)
+        ]
 
     except Exception as e:
         logger.error(f"Error fetching hourly heatmap: {e}", exc_info=True)
@@ -706,3 +1076,197 @@ async def get_attach_rate_detailed():
     except Exception as e:
         logger.error(f"Error fetching detailed attach rate: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# Dashboard Bundle
+# ============================================================================
+
+def _dashboard_panels(
+    months: int,
+    year: Optional[int],
+    segment: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    cohort_month: Optional[str]
+) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """Map each dashboard panel to the endpoint call that produces it"""
+    panels = {
+        "summary": lambda: get_dashboard_summary(),
+        "revenue_trend": lambda: get_revenue_trend(months=months),
+        "channel_breakdown": lambda: get_channel_breakdown(),
+        "gmv_trend": lambda: get_gmv_trend(start_date=start_date, end_date=end_date, granularity="month"),
+        "cac_by_channel": lambda: get_cac_by_channel(),
+        "arpu_by_segment": lambda: get_arpu_by_segment(year=year),
+        "attach_rate": lambda: get_attach_rate(
+            segment=segment, start_date=start_date, end_date=end_date, granularity="month"
+        ),
+        "attach_rate_detailed": lambda: get_attach_rate_detailed(),
+        "hourly_heatmap": lambda: get_hourly_heatmap(layout="cells"),
+        "cohort_retention": lambda: get_cohort_retention(cohort_month=cohort_month),
+    }
+    if settings.COHORT_ENGINE_ENABLED:
+        panels["cohort_matrix"] = lambda: get_cohort_matrix(
+            granularity="month", segment=None, start_date=None, end_date=None, max_periods=12, min_cohort_size=1
+        )
+    return panels
+
+
+async def _run_panel(name: str, panel: Callable[[], Awaitable[Any]], timeout: float) -> Dict[str, Any]:
+    """
+    Run one panel within its time budget
+
+    Returns:
+        {"panel": name, "data": ..., "elapsed_ms": ...} on success, or
+        {"panel": name, "error": ..., "elapsed_ms": ...} on failure/timeout,
+        plus "stale_seconds" when the panel was answered from last-good results
+    """
+    started = time.monotonic()
+    stale_ages = track_stale_results()
+    try:
+        result = {"panel": name, "data": jsonable_encoder(await asyncio.wait_for(panel(), timeout))}
+    except asyncio.TimeoutError:
+        logger.warning(f"Dashboard panel {name} timed out after {timeout}s")
+        result = {"panel": name, "error": f"Timed out after {timeout}s"}
+    except HTTPException as e:
+        result = {"panel": name, "error": str(e.detail)}
+    except Exception as e:
+        logger.error(f"Dashboard panel {name} failed: {e}", exc_info=True)
+        result = {"panel": name, "error": str(e)}
+
+    result["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    if stale_ages:
+        result["stale_seconds"] = round(max(stale_ages))
+    return result
+
+
+async def _stream_panels(panels: Dict[str, Callable[[], Awaitable[Any]]], timeout: float) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield each panel result as soon as it finishes, cancelling the rest if the client goes away"""
+    tasks = [asyncio.ensure_future(_run_panel(name, panel, timeout)) for name, panel in panels.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield [await finished]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.get("/dashboard")
+async def get_dashboard_bundle(
+    request: Request,
+    months: int = Query(6, ge=1, le=24, description="Months of revenue trend"),
+    year: Optional[int] = Query(None, description="ARPU year filter"),
+    segment: Optional[str] = Query(None, description="Attach rate customer segment filter"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cohort_month: Optional[str] = Query(None, description="Cohort month filter (YYYY-MM-DD)"),
+    stream: bool = Query(False, description="Stream each panel as NDJSON as soon as it finishes")
+):
+    """
+    Get every dashboard panel in one request
+
+    Runs all panel queries concurrently, each within DASHBOARD_PANEL_TIMEOUT,
+    so the page loads in one round trip bounded by the slowest panel. A panel
+    that fails or times out is reported in "errors" without failing the rest.
+
+    Args:
+        months: Months of revenue trend (as for /revenue-trend)
+        year: Optional ARPU year filter
+        segment: Optional attach rate segment filter
+        start_date: Optional start date for GMV and attach rate
+        end_date: Optional end date for GMV and attach rate
+        cohort_month: Optional cohort month filter
+        stream: Emit one NDJSON line per panel ({"panel", "data" | "error",
+                "elapsed_ms", "stale_seconds"?}) in completion order instead
+                of one JSON object
+
+    Returns:
+        DashboardBundle with data keyed by panel name, or an NDJSON stream
+    """
+    panels = _dashboard_panels(months, year, segment, start_date, end_date, cohort_month)
+    timeout = settings.DASHBOARD_PANEL_TIMEOUT
+
+    if stream:
+        return ndjson_response(_stream_panels(panels, timeout))
+
+    results = await cancel_on_disconnect(
+        request,
+        asyncio.gather(*(_run_panel(name, panel, timeout) for name, panel in panels.items()))
+    )
+
+    return DashboardBundle(
+        panels={r["panel"]: r["data"] for r in results if "data" in r},
+        errors={r["panel"]: r["error"] for r in results if "error" in r},
+        timings_ms={r["panel"]: r["elapsed_ms"] for r in results},
+        stale_seconds={r["panel"]: r["stale_seconds"] for r in results if "stale_seconds" in r}
+    )
+
+
+# ============================================================================
+# Background Refresh
+# ============================================================================
+
+async def _refresh_metric(name: str, priority: QueryPriority) -> List[dict]:
+    """Refresh a registry metric together with the in-memory cube and partials built from it"""
+    if settings.OLAP_CUBE_ENABLED and name in olap_cubes:
+        await olap_cubes.refresh(name, priority)
+    if settings.PARTIAL_AGGREGATES_ENABLED and name in partial_aggregates:
+        await partial_aggregates.refresh(name, priority)
+        return await partial_aggregates.query(name, priority=priority)
+    return await metric_registry.fetch(name, priority=priority)
+
+
+async def _refresh_cohort_retention(priority: QueryPriority) -> List[dict]:
+    """Run the incremental retention table refresh when due, then re-read the table"""
+    if cohort_retention_refresh.due():
+        try:
+            await cohort_retention_refresh.run(priority)
+        except Exception as e:
+            # Keep serving the table as it is
+            logger.warning(f"Incremental cohort retention refresh failed: {e}")
+    return await _refresh_metric("cohort_retention", priority)
+
+
+# Precompute every dashboard metric for its default parameters
+metric_refresher.register("summary", lambda priority: _load_summary(priority))
+metric_refresher.register("revenue_trend", lambda priority: _load_revenue_trend(priority=priority))
+metric_refresher.register("channel_breakdown", lambda priority: _load_channel_breakdown(priority))
+metric_refresher.register("hourly_heatmap", lambda priority: _load_hourly_heatmap(priority))
+if settings.COHORT_ENGINE_ENABLED:
+    metric_refresher.register("cohort_matrix", lambda priority: _load_cohort_matrix(priority))
+for _name in ("cac_by_channel", "arpu_by_segment", "gmv_trend", "channel_mix", "attach_rate"):
+    metric_refresher.register(_name, lambda priority, name=_name: _refresh_metric(name, priority))
+if settings.COHORT_RETENTION_REFRESH_ENABLED:
+    metric_refresher.register("cohort_retention", lambda priority: _refresh_cohort_retention(priority))
+else:
+    metric_refresher.register("cohort_retention", lambda priority: _refresh_metric("cohort_retention", priority))
+
+
+async def _on_sales_fact_change() -> None:
+    """Bring the stores and precomputed metrics built on daily_sales_fact up to date"""
+    # The incremental stores only re-fetch their trailing window; a change
+    # may be a backfill or correction of any month, so reload them fully
+    revenue_trend_cache.invalidate()
+    cohort_engine.invalidate()
+    reload_sketches = settings.DISTINCT_SKETCHES_ENABLED and distinct_sketches.loaded
+    distinct_sketches.invalidate()
+
+    names = ["summary", "revenue_trend", "channel_breakdown", "hourly_heatmap"]
+    if settings.COHORT_ENGINE_ENABLED:
+        names.append("cohort_matrix")  # reloads the cohort engine first
+    refreshes = [metric_refresher.refresh(name) for name in names]
+    if reload_sketches:
+        refreshes.append(distinct_sketches.refresh())
+    await asyncio.gather(*refreshes)
+
+
+async def _on_metric_source_change(name: str) -> None:
+    """Reload a registry metric's partials in full and recompute it"""
+    partial_aggregates.invalidate(name)
+    await metric_refresher.refresh(name)
+
+
+# Recompute derived data when a source table's Delta version changes
+freshness_tracker.watch(SALES_FACT, _on_sales_fact_change)
+for _name in ("cac_by_channel", "arpu_by_segment", "cohort_retention", "gmv_trend", "channel_mix", "attach_rate"):
+    freshness_tracker.watch(metric_registry.get(_name).source, lambda name=_name: _on_metric_source_change(name))
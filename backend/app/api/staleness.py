@@ -0,0 +1,43 @@
+"""
+Stale response flagging
+
+During a warehouse outage DatabricksRepository answers queries with their
+last successful result (see app.repositories.circuit_breaker).
+StaleResultMiddleware tracks those per request and flags the response:
+
+    X-Data-Stale: true
+    X-Data-Age: <seconds since the oldest result served was computed>
+
+Streamed responses send their headers before the body is produced, so they
+are only flagged for stale results served before the first byte; the
+dashboard bundle additionally reports staleness per panel.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.repositories.circuit_breaker import track_stale_results
+
+STALE_HEADER = "X-Data-Stale"
+AGE_HEADER = "X-Data-Age"
+
+
+class StaleResultMiddleware:
+    """Pure ASGI middleware adding the stale headers (keeps the request's context)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ages = track_stale_results()
+
+        async def send_flagged(message: Message) -> None:
+            if message["type"] == "http.response.start" and ages:
+                headers = MutableHeaders(scope=message)
+                headers[STALE_HEADER] = "true"
+                headers[AGE_HEADER] = str(round(max(ages)))
+            await send(message)
+
+        await self.app(scope, receive, send_flagged)
@@ -0,0 +1,31 @@
+"""
+Streaming response helpers
+
+Utilities for streaming large query results to the client as NDJSON
+(one JSON object per line) so rows are sent as soon as each result chunk
+arrives instead of after the whole result is materialized.
+"""
+from typing import Any, AsyncIterator, Dict, List
+from fastapi.responses import StreamingResponse
+from app.repositories.decoding import json_default
+import json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _ndjson_lines(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Encode each batch of rows as one block of newline-delimited JSON"""
+    async for batch in batches:
+        if batch:
+            yield "".join(json.dumps(row, default=json_default) + "\n" for row in batch).encode("utf-8")
+
+
+def ndjson_response(batches: AsyncIterator[List[Dict[str, Any]]]) -> StreamingResponse:
+    """
+    Build a StreamingResponse that writes row batches as NDJSON
+
+    Args:
+        batches: Async iterator of row batches, e.g.
+                 databricks_repo.aiter_query(query, batches=True)
+    """
+    return StreamingResponse(_ndjson_lines(batches), media_type=NDJSON_MEDIA_TYPE)
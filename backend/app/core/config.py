@@ -58,6 +58,137 @@ class Settings(BaseSettings):
     REQUEST_TIMEOUT: int = 30
     MODEL_SERVING_TIMEOUT: int = 60
 
+    # Query Execution
+    # Worker threads used by the async repository methods to run warehouse
+    # statements without blocking the event loop
+    QUERY_EXECUTOR_WORKERS: int = 16
+    # Threads used to download result chunks of large statements in parallel
+    # (set to 1 to follow next_chunk_index sequentially)
+    RESULT_CHUNK_FETCH_WORKERS: int = 4
+    # Decode result columns to native Python types using the manifest schema
+    QUERY_TYPED_DECODING: bool = True
+    # Statements wait server-side this long (5-50s) before being polled;
+    # polling backs off exponentially and gives up after REQUEST_TIMEOUT
+    STATEMENT_WAIT_TIMEOUT: int = 10
+    STATEMENT_POLL_INITIAL_INTERVAL: float = 0.25
+    STATEMENT_POLL_MAX_INTERVAL: float = 2.0
+
+    # Warehouse Admission Control
+    # Maximum statements running on the SQL warehouse at once; further
+    # statements queue by priority (interactive > explore > background)
+    WAREHOUSE_MAX_CONCURRENCY: int = 8
+    # Queued statements beyond this are rejected immediately (HTTP 503)
+    WAREHOUSE_MAX_QUEUE: int = 64
+    # Seconds a statement may wait in the queue before being rejected
+    WAREHOUSE_QUEUE_TIMEOUT: float = 15.0
+
+    # Filter-Value Batching
+    # Concurrent registry queries differing only in a batchable filter value
+    # (e.g. attach rate per segment) within this window run as one IN (...)
+    # statement whose rows are fanned back out per value
+    QUERY_BATCH_ENABLED: bool = True
+    QUERY_BATCH_WINDOW: float = 0.01  # seconds the first call waits for others
+    QUERY_BATCH_MAX_VALUES: int = 50  # a batch with this many values runs immediately
+
+    # Warehouse Circuit Breaker
+    # After this many consecutive timeouts/connection errors statements fail
+    # fast; interactive queries are answered with their last successful
+    # result (flagged stale) while a background probe waits for recovery
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_BREAKER_PROBE_INTERVAL: float = 15.0  # seconds between recovery probes
+    LAST_GOOD_RESULTS_MAX_BYTES: int = 64 * 1024 * 1024  # LRU budget for last successful results
+    LAST_GOOD_RESULTS_MAX_AGE: int = 24 * 3600  # older results are not served as fallback
+
+    # Dashboard Bundle
+    # Per-panel time budget for /metrics/dashboard; slower panels are reported
+    # as errors so the rest of the page still renders
+    DASHBOARD_PANEL_TIMEOUT: float = 20.0
+
+    # Query Result Cache
+    # Results are cached in memory keyed on the normalized SQL text
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64 MiB budget, LRU eviction beyond it
+    QUERY_CACHE_DEFAULT_TTL: int = 300  # seconds
+    METRIC_VIEW_CACHE_TTL: int = 3600  # dominos_analytics metric_* views refresh at most daily
+    SALES_FACT_CACHE_TTL: int = 600  # daily_sales_fact aggregates
+
+    # Shared-Scan Fusion
+    # Answer summary, revenue trend and channel breakdown from one fused
+    # GROUPING SETS scan of daily_sales_fact instead of three separate scans
+    SALES_FACT_FUSION_ENABLED: bool = True
+
+    # Incremental Revenue Trend
+    # Closed months of the revenue trend are aggregated once and reused; only
+    # the open month and months closed within the late-arrival window are
+    # re-queried
+    REVENUE_TREND_INCREMENTAL: bool = True
+    REVENUE_TREND_LATE_ARRIVAL_DAYS: int = 3  # days a closed month may still receive rows
+
+    # Partial Aggregate Store
+    # Date-filtered GMV, channel mix and attach rate queries are answered from
+    # in-memory monthly partials instead of one warehouse query per range
+    PARTIAL_AGGREGATES_ENABLED: bool = True
+    PARTIAL_AGGREGATES_MAX_AGE: int = 3600  # seconds before a read triggers a background refresh
+
+    # Distinct Count Sketches
+    # Per-day HyperLogLog sketches of order and customer IDs; distinct counts
+    # over any date range are estimated by unioning them in memory
+    DISTINCT_SKETCHES_ENABLED: bool = True
+    DISTINCT_SKETCH_PRECISION: int = 11  # 2^11 registers per day, ~2.3% standard error
+    DISTINCT_SKETCH_DAYS: int = 730  # days of history loaded
+    DISTINCT_SKETCH_LATE_ARRIVAL_DAYS: int = 3  # trailing days re-fetched on refresh
+    DISTINCT_SKETCH_MAX_AGE: int = 3600  # seconds before a read triggers a background refresh
+
+    # OLAP Cubes
+    # Channel mix, attach rate and ARPU views are held as in-memory cubes and
+    # filtered/rolled up locally instead of re-queried per filter
+    OLAP_CUBE_ENABLED: bool = True
+    OLAP_CUBE_MAX_AGE: int = 3600  # seconds before a read triggers a background rebuild
+
+    # Hourly Heatmap
+    # Orders by weekday x hour over the last 30 days, precomputed by the
+    # background refresher from this daily_sales_fact timestamp column
+    ORDER_TIMESTAMP_COLUMN: str = "order_timestamp"
+
+    # Cohort Engine
+    # Activity days of customers acquired within the history window are held
+    # in memory; retention matrices are computed locally for any granularity
+    COHORT_ENGINE_ENABLED: bool = True
+    COHORT_HISTORY_DAYS: int = 730  # cohorts acquired within this window
+    COHORT_SEGMENT_COLUMN: str = "customer_segment"  # daily_sales_fact segment column
+    COHORT_LATE_ARRIVAL_DAYS: int = 3  # trailing days re-fetched on refresh
+    COHORT_ENGINE_MAX_AGE: int = 3600  # seconds before a read triggers a background refresh
+
+    # Incremental Cohort Retention Refresh
+    # MERGE only the metric_cohort_retention cells affected by orders since the
+    # stored watermark (databricks_notebooks/incremental_cohort_retention_refresh.sql);
+    # needs MODIFY on main.dominos_analytics for the app's service principal
+    COHORT_RETENTION_REFRESH_ENABLED: bool = False
+    COHORT_RETENTION_LATE_ARRIVAL_DAYS: int = 3  # days before the watermark re-processed
+    COHORT_RETENTION_REFRESH_INTERVAL: int = 6 * 3600  # seconds between background runs
+
+    # Background Metric Refresh
+    # Dashboard metrics (default parameters) are precomputed on this interval
+    # and served from memory, stale-while-revalidate
+    METRIC_REFRESH_ENABLED: bool = True
+    METRIC_REFRESH_INTERVAL: int = 300  # seconds
+
+    # Data Freshness Tracking
+    # Delta versions of daily_sales_fact and the metric_* tables are polled on
+    # this interval; cached results and in-memory stores derived from a table
+    # are refreshed when it changes, so the cache TTLs above can be raised to
+    # hours without serving data that is stale by more than one poll
+    FRESHNESS_TRACKING_ENABLED: bool = True
+    FRESHNESS_POLL_INTERVAL: int = 60  # seconds
+
+    # Dashboard Snapshot
+    # Precomputed metrics and the schema manifest are persisted here after
+    # each refresh and on shutdown, and restored at startup
+    DASHBOARD_SNAPSHOT_ENABLED: bool = True
+    DASHBOARD_SNAPSHOT_PATH: str = ".cache/dashboard_snapshot.json.gz"
+    DASHBOARD_SNAPSHOT_MAX_AGE: int = 7 * 24 * 3600  # older values are not restored
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,97 @@
+"""
+Application lifecycle
+
+Starts and stops the background services shared by both entry points: the
+deployed root main.py (app.yaml runs `uvicorn main:app`) and
+backend/app/main.py for local development. Call these from the startup and
+shutdown events so the two apps can't drift apart.
+
+Each app keeps its own Explore schema manifest; it passes a function
+returning (manifest, generated-at unix time) so the manifest is saved in the
+dashboard snapshot too, and restores the manifest from the returned snapshot.
+
+Usage:
+    from app.core.lifecycle import (
+        restore_dashboard_snapshot, start_background_services, stop_background_services
+    )
+
+    @app.on_event("startup")
+    async def startup_event():
+        snapshot = restore_dashboard_snapshot(lambda: (_schema_cache, _schema_cache_at))
+        start_background_services()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        await stop_background_services()
+"""
+from typing import Callable, Optional, Tuple
+import logging
+from app.core.config import settings
+from app.services.dashboard_snapshot import DashboardSnapshot, load_snapshot, save_snapshot
+from app.services.freshness import freshness_tracker
+from app.services.metric_refresher import metric_refresher
+
+logger = logging.getLogger(__name__)
+
+SchemaManifestProvider = Callable[[], Tuple[Optional[list], float]]
+
+# Set by restore_dashboard_snapshot(); the snapshot is only saved once restored
+_schema_manifest: Optional[SchemaManifestProvider] = None
+
+
+def save_dashboard_snapshot() -> None:
+    """Persist precomputed metrics and the schema manifest for the next startup"""
+    manifest, generated_at = _schema_manifest() if _schema_manifest else (None, 0)
+    save_snapshot(settings.DASHBOARD_SNAPSHOT_PATH, metric_refresher.export(), manifest, generated_at)
+
+
+def restore_dashboard_snapshot(schema_manifest: SchemaManifestProvider) -> Optional[DashboardSnapshot]:
+    """
+    Restore the last snapshot into metric_refresher and save it after every refresh
+
+    Values keep their original timestamps, so the first requests after a
+    restart are answered from memory and refreshed as usual once stale.
+
+    Args:
+        schema_manifest: Returns the app's current schema manifest (or None)
+                         and the unix time it was generated
+
+    Returns:
+        The snapshot, for the caller to restore its schema manifest; None if
+        snapshots are disabled or none was usable
+    """
+    global _schema_manifest
+    if not settings.DASHBOARD_SNAPSHOT_ENABLED:
+        return None
+
+    _schema_manifest = schema_manifest
+    metric_refresher.add_listener(save_dashboard_snapshot)
+
+    snapshot = load_snapshot(settings.DASHBOARD_SNAPSHOT_PATH, settings.DASHBOARD_SNAPSHOT_MAX_AGE)
+    if snapshot:
+        for name, (value, refreshed_at) in snapshot.metrics.items():
+            metric_refresher.store(name, value, refreshed_at)
+    return snapshot
+
+
+def start_background_services() -> None:
+    """Start background work on the running event loop (call from the startup event)"""
+    # Precompute dashboard metrics in the background (stale-while-revalidate)
+    if settings.METRIC_REFRESH_ENABLED:
+        metric_refresher.start()
+
+    # Refresh derived data as soon as source tables change
+    if settings.FRESHNESS_TRACKING_ENABLED:
+        freshness_tracker.start()
+
+
+async def stop_background_services() -> None:
+    """Stop background work and persist the latest values (call from the shutdown event)"""
+    await freshness_tracker.stop()
+    await metric_refresher.stop()
+
+    if _schema_manifest is not None:
+        try:
+            save_dashboard_snapshot()
+        except Exception as e:
+            logger.warning(f"Failed to save dashboard snapshot: {e}")
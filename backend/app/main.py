@@ -12,15 +12,21 @@ For Databricks Apps deployment:
 - Environment variables are auto-injected from app.yaml
 - Static files (frontend) are served from the root path
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime
+import asyncio
 import logging
 import os
+import time
 
 from app.core.config import settings
 from app.api.routes import items, metrics, chat, genie
+from app.api.staleness import AGE_HEADER, STALE_HEADER, StaleResultMiddleware
+from app.core.lifecycle import (
+    restore_dashboard_snapshot, start_background_services, stop_background_services
+)
 # NOTE: explore endpoints are defined directly in this file (main.py) not in explore.py
 from app.models.schemas import HealthResponse
 
@@ -49,8 +55,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[STALE_HEADER, AGE_HEADER],
 )
 
+# Flag responses answered from last-good results during a warehouse outage
+app.add_middleware(StaleResultMiddleware)
+
 # Include API routers under /api prefix
 # Add your route modules here
 app.include_router(items.router, prefix=settings.API_PREFIX)
@@ -172,6 +182,8 @@ async def deployment_info():
 from typing import List
 from pydantic import BaseModel
 from fastapi.responses import Response
+from app.repositories.admission import QueryPriority, WarehouseBusyError
+from app.repositories.circuit_breaker import CircuitOpenError
 
 class TableInfo(BaseModel):
     name: str
@@ -304,15 +316,28 @@ async def refresh_schemas():
 
 
 @app.get(f"{settings.API_PREFIX}/explore/tables/{{catalog}}/{{schema}}/{{table}}/preview")
-async def preview_table_temp(catalog: str, schema: str, table: str, limit: int = 100):
+async def preview_table_temp(request: Request, catalog: str, schema: str, table: str, limit: int = 100, stream: bool = False, format: str = "rows"):
     """TEMPORARY: Preview table data (workaround)"""
     try:
         from app.repositories.databricks_repo import databricks_repo
+        from app.api.streaming import ndjson_response
+        from app.api.cancellation import cancel_on_disconnect
         full_name = f"{catalog}.{schema}.{table}"
         query = f"SELECT * FROM {full_name} LIMIT {limit}"
-        results = databricks_repo.execute_query(query)
+        priority = QueryPriority.EXPLORE
+        if stream:
+            return ndjson_response(databricks_repo.aiter_query(query, batches=True, priority=priority))
+        if format == "columnar":
+            result = await cancel_on_disconnect(request, databricks_repo.execute_query_columnar_async(query, priority=priority))
+            return {"table": full_name, **result.to_dict()}
+        results = await cancel_on_disconnect(request, databricks_repo.execute_query_async(query, priority=priority))
         columns = list(results[0].keys()) if results else []
         return {"table": full_name, "columns": columns, "rows": results, "row_count": len(results)}
+    except HTTPException:
+        raise
+    except (WarehouseBusyError, CircuitOpenError) as e:
+        logger.warning(f"Preview rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error previewing table: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -342,6 +367,16 @@ async def proxy_file_temp(path: str):
 # Application Lifecycle Events
 # ============================================================================
 
+def _regenerate_schema_manifest() -> None:
+    """Regenerate the schema manifest cache (runs on a worker thread)"""
+    global _schema_manifest_cache, _cache_timestamp
+    try:
+        _schema_manifest_cache = generate_schema_manifest()
+        _cache_timestamp = time.time()
+    except Exception as e:
+        logger.error(f"Failed to regenerate schema manifest: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """
@@ -366,15 +401,32 @@ async def startup_event():
     else:
         logger.warning("Databricks credentials not configured - data access will fail")
 
-    # Pre-generate schema manifest at startup for faster Explorer page loads
-    logger.info("Pre-generating schema manifest...")
-    try:
-        _schema_manifest_cache = generate_schema_manifest()
-        _cache_timestamp = time.time()
-        logger.info("Schema manifest pre-generated successfully")
-    except Exception as e:
-        logger.error(f"Failed to pre-generate schema manifest: {e}")
-        logger.warning("Explorer page will generate manifest on first request")
+    # Restore the last snapshot (with its original timestamps) so the first
+    # requests after a restart are answered from memory
+    snapshot = restore_dashboard_snapshot(lambda: (_schema_manifest_cache, _cache_timestamp))
+
+    if snapshot and snapshot.schema_manifest is not None:
+        _schema_manifest_cache = [SchemaAssets(**s) for s in snapshot.schema_manifest]
+        _cache_timestamp = snapshot.schema_manifest_at
+        manifest_age = time.time() - _cache_timestamp
+        logger.info(f"Schema manifest restored from snapshot ({manifest_age:.0f}s old)")
+
+        # Regenerate a stale manifest without holding up startup
+        if manifest_age > 3600:
+            asyncio.get_running_loop().run_in_executor(None, _regenerate_schema_manifest)
+    else:
+        # Pre-generate schema manifest at startup for faster Explorer page loads
+        logger.info("Pre-generating schema manifest...")
+        try:
+            _schema_manifest_cache = generate_schema_manifest()
+            _cache_timestamp = time.time()
+            logger.info("Schema manifest pre-generated successfully")
+        except Exception as e:
+            logger.error(f"Failed to pre-generate schema manifest: {e}")
+            logger.warning("Explorer page will generate manifest on first request")
+
+    # Precompute dashboard metrics and track source table changes in the background
+    start_background_services()
 
 
 @app.on_event("shutdown")
@@ -390,6 +442,9 @@ async def shutdown_event():
     """
     logger.info("Shutting down application...")
 
+    # Stop background refresh and persist the latest values
+    await stop_background_services()
+
     # Close Databricks connection
     from app.repositories.databricks_repo import databricks_repo
     databricks_repo.close()
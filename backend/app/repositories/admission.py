@@ -0,0 +1,237 @@
+"""
+Warehouse Admission Control
+
+Bounds how many statements the app runs on the SQL warehouse at once and
+decides who goes next when the warehouse is saturated. Waiting callers are
+admitted strictly by priority class (interactive dashboard panels before
+explore previews before background refreshes), FIFO within a class. The wait
+queue is bounded, so a burst of low-value work is rejected quickly instead of
+piling up behind the critical panels.
+
+Usage:
+    admission = AdmissionController(max_concurrency=8, max_queue=64, queue_timeout=10)
+
+    # From a worker thread
+    admission.acquire(QueryPriority.EXPLORE)
+    try:
+        run_statement()
+    finally:
+        admission.release()
+
+    # From async code (waiting does not occupy a thread)
+    await admission.acquire_async(QueryPriority.INTERACTIVE)
+"""
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPriority(IntEnum):
+    """Priority classes for warehouse statements (lower value is admitted first)"""
+    INTERACTIVE = 0  # Dashboard panels and KPIs
+    EXPLORE = 1  # Explore previews and ad-hoc queries
+    BACKGROUND = 2  # Scheduled refreshes and precomputation
+
+
+class WarehouseBusyError(RuntimeError):
+    """Raised when a statement cannot be admitted (queue full or wait timed out)"""
+
+
+class _Waiter:
+    """A queued caller; woken by its grant callback when admitted"""
+
+    __slots__ = ("priority", "granted", "abandoned", "wake")
+
+    def __init__(self, priority: QueryPriority, wake):
+        self.priority = priority
+        self.granted = False
+        self.abandoned = False
+        self.wake = wake
+
+
+class _ClassStats:
+    """Queue-time counters for one priority class"""
+
+    __slots__ = ("admitted", "rejected", "queued", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "avg_wait_ms": round(self.total_wait / self.queued * 1000, 1) if self.queued else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class AdmissionController:
+    """
+    Priority-aware concurrency limiter shared by threads and the event loop
+
+    A released slot is handed directly to the highest-priority waiter, so a
+    newly arriving caller can never overtake a queued one.
+
+    Attributes:
+        max_concurrency: Maximum statements running on the warehouse at once
+        max_queue: Maximum callers waiting for a slot before new ones are rejected
+        queue_timeout: Seconds a caller may wait before WarehouseBusyError
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue: List[tuple] = []
+        self._queued = 0
+        self._sequence = itertools.count()
+        self._stats = {priority: _ClassStats() for priority in QueryPriority}
+
+    def _try_admit(self, priority: QueryPriority, wake) -> Optional[_Waiter]:
+        """
+        Take a free slot, or enqueue a waiter (caller holds the lock)
+
+        Returns:
+            None if admitted immediately, otherwise the queued waiter
+        """
+        stats = self._stats[priority]
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            stats.admitted += 1
+            return None
+
+        if self._queued >= self.max_queue:
+            stats.rejected += 1
+            raise WarehouseBusyError(
+                f"Warehouse admission queue is full ({self._queued} waiting), rejecting {priority.name.lower()} query"
+            )
+
+        waiter = _Waiter(priority, wake)
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        self._queued += 1
+        return waiter
+
+    def _record_wait(self, priority: QueryPriority, started: float) -> None:
+        """Record queue time for an admitted waiter"""
+        waited = time.monotonic() - started
+        stats = self._stats[priority]
+        with self._lock:
+            stats.queued += 1
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+        if waited > 1:
+            logger.info(f"{priority.name.lower()} query waited {waited:.2f}s for warehouse admission")
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """
+        Give up waiting (timeout or cancellation)
+
+        Returns:
+            True if the waiter had already been granted a slot, which the
+            caller now owns and must release
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.abandoned = True
+            self._queued -= 1
+            return False
+
+    def _reject(self, priority: QueryPriority) -> WarehouseBusyError:
+        """Count a queue timeout and build the error to raise"""
+        with self._lock:
+            self._stats[priority].rejected += 1
+        return WarehouseBusyError(f"Timed out after {self.queue_timeout}s waiting for warehouse admission")
+
+    def acquire(self, priority: QueryPriority = QueryPriority.INTERACTIVE) -> None:
+        """
+        Block the calling thread until a warehouse slot is available
+
+        Raises:
+            WarehouseBusyError: The queue is full or queue_timeout elapsed
+        """
+        event = threading.Event()
+        with self._lock:
+            waiter = self._try_admit(priority, event.set)
+        if waiter is None:
+            return
+
+        started = time.monotonic()
+        if not event.wait(self.queue_timeout) and not self._abandon(waiter):
+            raise self._reject(priority)
+        self._record_wait(priority, started)
+
+    async def acquire_async(self, priority: QueryPriority = QueryPriority.INTERACTIVE) -> None:
+        """
+        Wait on the event loop until a warehouse slot is available
+
+        Raises:
+            WarehouseBusyError: The queue is full or queue_timeout elapsed
+        """
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: admitted.done() or admitted.set_result(None))
+
+        with self._lock:
+            waiter = self._try_admit(priority, wake)
+        if waiter is None:
+            return
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(admitted), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                raise self._reject(priority)
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+        self._record_wait(priority, started)
+
+    def release(self) -> None:
+        """Return a slot, handing it to the highest-priority live waiter"""
+        with self._lock:
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.abandoned:
+                    continue
+
+                # Hand the slot over directly; _active stays unchanged
+                waiter.granted = True
+                self._queued -= 1
+                self._stats[waiter.priority].admitted += 1
+                waiter.wake()
+                return
+
+            self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current occupancy and per-priority queue-time metrics"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "waiting": self._queued,
+                "max_queue": self.max_queue,
+                "classes": {priority.name.lower(): stats.to_dict() for priority, stats in self._stats.items()},
+            }
@@ -0,0 +1,152 @@
+"""
+Filter-Value Query Batching
+
+Panels and users often ask for the same query with different values of one
+filter at nearly the same time (attach rate for segment=Family and
+segment=Student, ARPU for year=2023 and year=2024). QueryBatcher collects
+such calls for a short window and runs them as one statement: the batching
+filter becomes `column IN (:batch_value_0, ...)` and the rows are fanned back
+out to each caller by the value of that column, DataLoader-style.
+
+Queries are written once as a template with BATCH_PREDICATE where the
+filter predicate goes; calls with the same template and other parameters
+share a batch.
+
+Usage:
+    batcher = QueryBatcher(window=0.01, max_values=50)
+
+    # run(values, priority) returns {batch_key(value): result}
+    result = await batcher.load(shape_key, value, priority, run)
+"""
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+from app.repositories.admission import QueryPriority
+
+logger = logging.getLogger(__name__)
+
+# Placeholder for the batched filter's predicate in query templates
+BATCH_PREDICATE = "{batch_predicate}"
+
+BatchRunner = Callable[[List[Any], QueryPriority], Awaitable[Dict[str, Any]]]
+
+
+def batch_key(value: Any) -> str:
+    """Normalize a filter value or result column value for fan-out matching"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class _Batch:
+    """Values waiting for one shape, with one future per distinct value"""
+
+    __slots__ = ("run", "futures", "values", "calls", "priority", "handle")
+
+    def __init__(self, run: BatchRunner, priority: QueryPriority):
+        self.run = run
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.values: List[Any] = []
+        self.calls = 0
+        self.priority = priority
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class QueryBatcher:
+    """
+    Collects same-shape calls for a short window and runs them together
+
+    Attributes:
+        window: Seconds the first call of a batch waits for others
+        max_values: Distinct values per batch; a full batch runs immediately
+        batches: Number of batches run
+        calls: Number of load() calls that joined a batch
+        statements_saved: Calls answered without a statement of their own
+    """
+
+    def __init__(self, window: float, max_values: int):
+        self.window = window
+        self.max_values = max_values
+        self._pending: Dict[str, _Batch] = {}
+        self._running: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.calls = 0
+        self.statements_saved = 0
+
+    async def load(self, shape: str, value: Any, priority: QueryPriority, run: BatchRunner) -> Any:
+        """
+        Get the result for one filter value, batched with concurrent calls of the same shape
+
+        Args:
+            shape: Key identifying the query template and its other parameters
+            value: This call's filter value
+            priority: Admission class; a batch runs at the most urgent of its calls
+            run: Called as run(values, priority) for the whole batch; returns
+                 results keyed by batch_key(value)
+
+        Returns:
+            This value's entry of the batch result (None if run() returned none)
+        """
+        batch = self._pending.get(shape)
+        if batch is None:
+            batch = _Batch(run, priority)
+            batch.handle = asyncio.get_running_loop().call_later(self.window, self._dispatch, shape)
+            self._pending[shape] = batch
+
+        self.calls += 1
+        batch.calls += 1
+        batch.priority = min(batch.priority, priority)
+        key = batch_key(value)
+        future = batch.futures.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            batch.futures[key] = future
+            batch.values.append(value)
+
+        if len(batch.values) >= self.max_values:
+            self._dispatch(shape)
+
+        # Shielded so one cancelled caller doesn't fail the others sharing the value
+        return await asyncio.shield(future)
+
+    def _dispatch(self, shape: str) -> None:
+        batch = self._pending.pop(shape, None)
+        if batch is None:
+            return
+        batch.handle.cancel()
+        self.batches += 1
+        self.statements_saved += batch.calls - 1
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        try:
+            results = await batch.run(batch.values, batch.priority)
+        except asyncio.CancelledError:
+            # Shutdown or a cancelled statement: don't leave callers waiting forever
+            for future in batch.futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Mark retrieved; it is re-raised to every caller still waiting
+                    future.exception()
+            return
+
+        for key, future in batch.futures.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters"""
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "statements_saved": self.statements_saved,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,164 @@
+"""
+Warehouse Circuit Breaker
+
+When the SQL warehouse is down or hanging, every statement would otherwise
+wait out REQUEST_TIMEOUT before failing. The breaker counts consecutive
+outage-type failures (timeouts, connection and server errors, not SQL
+errors); after failure_threshold of them it opens and statements fail fast
+with CircuitOpenError, which lets DatabricksRepository answer from the last
+successful result of the same query instead. While open, a background thread
+runs a probe every probe_interval seconds and closes the circuit on the
+first success; a successful statement closes it as well.
+
+Results served from the last-good store are reported through a context
+variable, so the API layer can flag stale responses (see
+app.api.staleness).
+
+Usage:
+    breaker = CircuitBreaker(failure_threshold=3, probe_interval=15, probe=ping_warehouse)
+
+    breaker.check()  # raises CircuitOpenError while open
+    try:
+        run_statement()
+    except QueryTimeoutError as e:
+        breaker.record_failure(e)
+        raise
+    breaker.record_success()
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ages (seconds) of last-good results served in the current request, if tracked
+_stale_results: ContextVar[Optional[List[float]]] = ContextVar("stale_results", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the warehouse circuit is open (statements are not attempted)"""
+
+
+def track_stale_results() -> List[float]:
+    """
+    Start collecting stale results served in the current context
+
+    Tasks created afterwards share the returned list, so results served to
+    any of them are recorded.
+
+    Returns:
+        List receiving the age in seconds of every stale result served
+    """
+    ages: List[float] = []
+    _stale_results.set(ages)
+    return ages
+
+
+def mark_stale(age: float) -> None:
+    """Record that a stale result of this age was served (no-op if not tracked)"""
+    ages = _stale_results.get()
+    if ages is not None:
+        ages.append(age)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with background recovery probing
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the circuit
+        probe_interval: Seconds between recovery probes while open
+    """
+
+    def __init__(self, failure_threshold: int, probe_interval: float, probe: Callable[[], None]):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._probe = probe
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self.trips = 0
+        self.rejected = 0
+        self.probes = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: The circuit is open
+        """
+        if self._opened_at is not None:
+            with self._lock:
+                self.rejected += 1
+            raise CircuitOpenError(
+                f"Warehouse unavailable (circuit open for {time.time() - self._opened_at:.0f}s): {self._last_error}"
+            )
+
+    def record_success(self) -> None:
+        """A statement (or probe) succeeded: reset the count and close the circuit"""
+        with self._lock:
+            self._failures = 0
+            if self._opened_at is None:
+                return
+            outage = time.time() - self._opened_at
+            self._opened_at = None
+        logger.info(f"Warehouse circuit closed after {outage:.0f}s")
+
+    def record_failure(self, error: BaseException) -> None:
+        """An outage-type failure: open the circuit once the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error)
+            if self._opened_at is not None or self._failures < self.failure_threshold:
+                return
+            self._opened_at = time.time()
+            self.trips += 1
+            start_probe = self._probe_thread is None or not self._probe_thread.is_alive()
+            if start_probe:
+                self._probe_thread = threading.Thread(
+                    target=self._probe_loop, name="warehouse-probe", daemon=True
+                )
+
+        logger.warning(f"Warehouse circuit opened after {self._failures} consecutive failures: {error}")
+        if start_probe:
+            self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        """Probe the warehouse until the circuit closes or the breaker is stopped"""
+        while self._opened_at is not None and not self._stopped.wait(self.probe_interval):
+            with self._lock:
+                self.probes += 1
+            try:
+                self._probe()
+            except Exception as e:
+                logger.info(f"Warehouse probe failed, circuit stays open: {e}")
+                with self._lock:
+                    self._last_error = str(e)
+                continue
+            self.record_success()
+
+    def stop(self) -> None:
+        """Stop background probing"""
+        self._stopped.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the circuit state and its counters"""
+        opened_at = self._opened_at
+        return {
+            "state": "open" if opened_at is not None else "closed",
+            "open_seconds": round(time.time() - opened_at, 1) if opened_at is not None else None,
+            "consecutive_failures": self._failures,
+            "last_error": self._last_error,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "probes": self.probes,
+        }
@@ -0,0 +1,100 @@
+"""
+Columnar Query Results
+
+Compact column-oriented representation of a statement result: the column
+names once, plus one list of values per column. Compared to a list of
+per-row dictionaries this avoids one dict allocation and one set of repeated
+keys per row, and serializes to roughly half the JSON size.
+
+Usage:
+    result = databricks_repo.execute_query_columnar("SELECT * FROM t LIMIT 10000")
+
+    result.columns          # ["order_id", "order_date", ...]
+    result.column("order_id")
+    result.to_dict()        # {"columns": [...], "types": [...], "data": [[...], ...], "row_count": n}
+    result.to_rows()        # [{"order_id": ..., ...}, ...]
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import sys
+
+
+class ColumnarResult:
+    """
+    Query result stored as per-column value lists
+
+    Attributes:
+        columns: Column names in result order
+        data: One list of values per column, aligned with columns
+        row_count: Number of rows
+        types: SQL type names per column (e.g. "DECIMAL"), when known
+    """
+
+    __slots__ = ("columns", "data", "row_count", "types")
+
+    def __init__(
+        self,
+        columns: List[str],
+        data: List[list],
+        row_count: int,
+        types: Optional[List[Optional[str]]] = None
+    ):
+        self.columns = columns
+        self.data = data
+        self.row_count = row_count
+        self.types = types
+
+    @classmethod
+    def from_rows(
+        cls,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        types: Optional[List[Optional[str]]] = None
+    ) -> "ColumnarResult":
+        """
+        Build a columnar result from raw row-major values
+
+        Args:
+            columns: Column names
+            rows: Row value sequences as returned in data_array chunks
+            types: Optional SQL type names per column
+        """
+        rows = list(rows)
+        if not rows:
+            return cls(columns, [[] for _ in columns], 0, types)
+
+        # zip(*rows) transposes row-major values into columns in one pass
+        return cls(columns, [list(values) for values in zip(*rows)], len(rows), types)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __sizeof__(self) -> int:
+        """Approximate memory footprint, used by the query cache byte budget"""
+        size = object.__sizeof__(self) + sys.getsizeof(self.columns) + sys.getsizeof(self.data)
+        for values in self.data:
+            size += sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+        return size
+
+    def column(self, name: str) -> list:
+        """Return the values of a single column"""
+        return self.data[self.columns.index(name)]
+
+    def take(self, indices: Sequence[int]) -> "ColumnarResult":
+        """Return a new result with only the given rows, in the given order"""
+        return ColumnarResult(
+            self.columns, [[values[i] for i in indices] for values in self.data], len(indices), self.types
+        )
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Expand into the list-of-dicts shape returned by execute_query"""
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in zip(*self.data)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON-serializable columnar payload"""
+        payload = {"columns": self.columns}
+        if self.types is not None:
+            payload["types"] = self.types
+        payload["data"] = self.data
+        payload["row_count"] = self.row_count
+        return payload
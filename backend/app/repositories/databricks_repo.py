@@ -13,15 +13,68 @@ Usage:
 
     # Access specific table
     data = databricks_repo.get_table_data("my_table", limit=100)
+
+    # From async routes, use the non-blocking variants
+    results = await databricks_repo.execute_query_async("SELECT 1")
+
+    # Stream large results chunk by chunk
+    async for row in databricks_repo.aiter_query("SELECT * FROM big_table"):
+        ...
+
+    # Lower-priority work yields warehouse slots to dashboard panels
+    rows = await databricks_repo.execute_query_async(query, priority=QueryPriority.BACKGROUND)
+
+    # During a warehouse outage, interactive queries get their last good result
+    databricks_repo.circuit_stats()  # {"state": "open", ...}
+
+    # Concurrent calls differing only in one filter value share one statement
+    rows = await databricks_repo.execute_query_batched_async(
+        f"SELECT * FROM t WHERE {BATCH_PREDICATE}", "segment", "Family"
+    )
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
 from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.sql import StatementState
+from databricks.sdk.errors import BadRequest, NotFound, PermissionDenied
+from databricks.sdk.service.sql import ExecuteStatementRequestOnWaitTimeout, StatementState
 from app.core.config import settings
+from app.repositories.admission import AdmissionController, QueryPriority, WarehouseBusyError
+from app.repositories.batching import BATCH_PREDICATE, QueryBatcher, batch_key
+from app.repositories.circuit_breaker import CircuitBreaker, CircuitOpenError, mark_stale
+from app.repositories.query_cache import QueryCache, normalize_sql
+from app.repositories.single_flight import SingleFlight
+from app.repositories.columnar import ColumnarResult
+from app.repositories.decoding import column_type_name, decode_columns
+from app.repositories.parameters import parameters_signature, to_statement_parameters
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Sentinel returned by next() once a streamed result has no more chunks
+_END_OF_RESULT = object()
+
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a statement does not finish within REQUEST_TIMEOUT"""
+
+
+class QueryCancelledError(RuntimeError):
+    """Raised when a running statement is cancelled because nobody awaits it"""
+
+
+class StatementFailedError(RuntimeError):
+    """Raised when the warehouse reports a statement as failed, canceled or closed"""
+
+
+# Errors caused by the statement itself rather than the warehouse being unavailable
+_STATEMENT_ERRORS = (
+    StatementFailedError, QueryCancelledError, CircuitOpenError, WarehouseBusyError,
+    ValueError, BadRequest, NotFound, PermissionDenied,
+)
+
 
 class DatabricksRepository:
     """
@@ -35,6 +88,19 @@ class DatabricksRepository:
         schema: Unity Catalog schema name
         workspace_client: WorkspaceClient instance (lazy-loaded)
         warehouse_id: SQL warehouse ID extracted from http_path
+
+    The *_async methods run the same blocking SDK calls on a bounded, dedicated
+    thread pool so async routes never block the event loop while waiting on
+    the warehouse.
+
+    At most WAREHOUSE_MAX_CONCURRENCY statements run on the warehouse at once.
+    Further statements queue by priority class (see QueryPriority); async
+    callers wait for admission on the event loop, not on an executor thread.
+
+    Consecutive timeouts and connection/server errors open a circuit breaker
+    (see CircuitBreaker). While it is open statements fail fast, and
+    interactive and explore queries are answered with the last successful
+    result of the same query (reported via mark_stale) when one is known.
     """
 
     def __init__(self):
@@ -42,6 +108,35 @@ class DatabricksRepository:
         self.catalog = settings.CATALOG
         self.schema = settings.SCHEMA
         self._workspace_client = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._chunk_executor: Optional[ThreadPoolExecutor] = None
+        self._cache = QueryCache(
+            max_bytes=settings.QUERY_CACHE_MAX_BYTES,
+            default_ttl=settings.QUERY_CACHE_DEFAULT_TTL
+        )
+        self._single_flight = SingleFlight()
+        self._admission = AdmissionController(
+            max_concurrency=settings.WAREHOUSE_MAX_CONCURRENCY,
+            max_queue=settings.WAREHOUSE_MAX_QUEUE,
+            queue_timeout=settings.WAREHOUSE_QUEUE_TIMEOUT
+        )
+        self._breaker: Optional[CircuitBreaker] = None
+        if settings.CIRCUIT_BREAKER_ENABLED:
+            self._breaker = CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                probe_interval=settings.CIRCUIT_BREAKER_PROBE_INTERVAL,
+                probe=self._probe_warehouse
+            )
+        self._batcher = QueryBatcher(
+            window=settings.QUERY_BATCH_WINDOW,
+            max_values=settings.QUERY_BATCH_MAX_VALUES
+        )
+        # Last successful result per query as (result, stored_at), kept well
+        # past the cache TTL for serving during outages
+        self._last_good = QueryCache(
+            max_bytes=settings.LAST_GOOD_RESULTS_MAX_BYTES,
+            default_ttl=settings.LAST_GOOD_RESULTS_MAX_AGE
+        )
 
         # Extract warehouse ID from http_path
         # Format: /sql/1.0/warehouses/{warehouse_id}
@@ -59,92 +154,590 @@ class DatabricksRepository:
             self._workspace_client = WorkspaceClient()
         return self._workspace_client
 
+    def _get_chunk_executor(self) -> ThreadPoolExecutor:
+        """
+        Get or create the thread pool used for parallel result chunk fetches
+
+        Kept separate from the query executor so a statement running on a
+        query worker never waits on its own pool for chunk downloads.
+        """
+        if not self._chunk_executor:
+            self._chunk_executor = ThreadPoolExecutor(
+                max_workers=settings.RESULT_CHUNK_FETCH_WORKERS,
+                thread_name_prefix="databricks-chunk"
+            )
+        return self._chunk_executor
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or create the bounded thread pool used by the async methods"""
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.QUERY_EXECUTOR_WORKERS,
+                thread_name_prefix="databricks-query"
+            )
+        return self._executor
+
     def execute_query(
         self,
         query: str,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
     ) -> List[Dict[str, Any]]:
         """
         Execute a SQL query and return results as list of dictionaries
 
         Uses SDK's statement execution API which handles auth automatically.
+        Results are cached in memory (in columnar form) keyed on the normalized
+        final SQL, so repeated identical queries within the TTL skip the
+        warehouse, and concurrent identical queries share a single in-flight
+        statement. Each call returns freshly built row dictionaries.
 
         Args:
             query: SQL query string (use :param_name for parameterized queries)
-            params: Optional dictionary of query parameters
+            params: Optional dictionary of query parameters, bound server-side
+                    as typed statement parameters (never substituted into the SQL)
+            ttl: Cache TTL in seconds (defaults to QUERY_CACHE_DEFAULT_TTL,
+                 0 bypasses the cache)
+            priority: Admission class used when the warehouse is saturated
 
         Returns:
-            List of dictionaries, where each dict represents a row
+            List of dictionaries, where each dict represents a row. Values are
+            decoded to native types (int, float, Decimal, date, ...) from the
+            result schema.
 
         Example:
             results = repo.execute_query(
                 "SELECT * FROM catalog.schema.table WHERE id = :id",
-                {"id": "123"}
+                {"id": "123"},
+                ttl=3600
             )
+
+        Raises:
+            WarehouseBusyError: The statement could not be admitted to the warehouse
         """
-        if not self.warehouse_id:
-            raise ValueError("DATABRICKS_HTTP_PATH not configured")
+        return self.execute_query_columnar(query, params, ttl, priority).to_rows()
+
+    def execute_query_columnar(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> ColumnarResult:
+        """
+        Execute a SQL query and return a compact columnar result
+
+        Same caching and coalescing behaviour as execute_query, but skips the
+        per-row dictionary expansion. Prefer this for large results.
+        The returned object is shared with the cache and must not be mutated.
+
+        Args:
+            query: SQL query string (use :param_name for parameterized queries)
+            params: Optional dictionary of query parameters
+            ttl: Cache TTL in seconds (0 bypasses the cache)
+            priority: Admission class used when the warehouse is saturated
+
+        Returns:
+            ColumnarResult with column names and per-column value lists
+        """
+        cache_key = self._cache_key(query, params)
+
+        cached = self._get_cached(cache_key, ttl)
+        if cached is not None:
+            return cached
 
         try:
-            # Replace named parameters with values (simple string substitution)
-            if params:
-                for key, value in params.items():
-                    # Basic SQL escaping
-                    if isinstance(value, str):
-                        escaped_value = value.replace("'", "''")
-                        query = query.replace(f":{key}", f"'{escaped_value}'")
-                    else:
-                        query = query.replace(f":{key}", str(value))
-
-            logger.debug(f"Executing query: {query}")
-
-            ws = self._get_workspace_client()
-
-            # Execute statement using SDK (handles auth automatically)
-            statement = ws.statement_execution.execute_statement(
-                warehouse_id=self.warehouse_id,
-                statement=query,
-                catalog=self.catalog,
-                schema=self.schema
+            self._check_circuit()
+            return self._single_flight.do(
+                cache_key, self._execute_admitted, query, params, cache_key, ttl, priority
             )
+        except Exception as e:
+            return self._last_good_result(cache_key, ttl, priority, e)
+
+    def _execute_admitted(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]],
+        cache_key: str,
+        ttl: Optional[int],
+        priority: QueryPriority,
+        cancel_event: Optional[threading.Event] = None
+    ) -> ColumnarResult:
+        """Wait for a warehouse slot in the calling thread, then run and cache the statement"""
+        self._admission.acquire(priority)
+        try:
+            return self._execute_and_cache(query, params, cache_key, ttl, cancel_event)
+        finally:
+            self._admission.release()
 
-            # Check if execution succeeded
-            if statement.status.state != StatementState.SUCCEEDED:
-                error_msg = f"Query failed with state: {statement.status.state}"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
+    async def _execute_admitted_async(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]],
+        cache_key: str,
+        ttl: Optional[int],
+        priority: QueryPriority,
+        cancel_event: Optional[threading.Event] = None
+    ) -> ColumnarResult:
+        """Wait for a warehouse slot on the event loop, then run and cache the statement"""
+        return await self._run_admitted_async(
+            priority, self._execute_and_cache, query, params, cache_key, ttl, cancel_event
+        )
+
+    async def _run_admitted_async(self, priority: QueryPriority, fn: Callable[..., Any], *args) -> Any:
+        """
+        Wait for admission without occupying a thread, then run fn(*args) on the query executor
+
+        The slot is held until the worker finishes, even if the awaiting task
+        is cancelled in the meantime.
+        """
+        await self._admission.acquire_async(priority)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        except BaseException:
+            self._admission.release()
+            raise
+
+        future.add_done_callback(self._release_admission)
+        return await asyncio.shield(future)
+
+    def _release_admission(self, future: asyncio.Future) -> None:
+        """Done callback returning a warehouse slot once its worker has finished"""
+        if not future.cancelled():
+            # Mark the outcome as retrieved; it is re-raised to any awaiting caller
+            future.exception()
+        self._admission.release()
+
+    def _execute_and_cache(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]],
+        cache_key: str,
+        ttl: Optional[int],
+        cancel_event: Optional[threading.Event] = None
+    ) -> ColumnarResult:
+        """Run a statement and store its result in the cache and the last-good store"""
+        results = self._run_statement(query, params, cancel_event)
+        self._store_result(cache_key, results, ttl)
+        return results
+
+    def _store_result(self, cache_key: str, results: ColumnarResult, ttl: Optional[int]) -> None:
+        """Cache a successful result and remember it as the query's last good one"""
+        if self._use_cache(ttl):
+            self._cache.set(cache_key, results, ttl)
+        if ttl != 0:
+            self._last_good.set(cache_key, (results, time.time()))
+
+    @staticmethod
+    def _cache_key(query: str, params: Optional[Dict[str, Any]]) -> str:
+        """Cache / single-flight key: normalized SQL plus bound parameter values"""
+        key = normalize_sql(query)
+        signature = parameters_signature(params)
+        return f"{key} -- params: {signature}" if signature else key
+
+    def _use_cache(self, ttl: Optional[int]) -> bool:
+        """Whether a query with this TTL should go through the result cache"""
+        return settings.QUERY_CACHE_ENABLED and ttl != 0
+
+    @staticmethod
+    def _is_outage(error: BaseException) -> bool:
+        """Whether a failure indicates the warehouse is unavailable (counts toward the circuit)"""
+        return not isinstance(error, _STATEMENT_ERRORS)
+
+    def _check_circuit(self) -> None:
+        """Raise CircuitOpenError while the circuit is open"""
+        if self._breaker is not None:
+            self._breaker.check()
+
+    def _last_good_result(
+        self,
+        cache_key: str,
+        ttl: Optional[int],
+        priority: QueryPriority,
+        error: Exception
+    ) -> ColumnarResult:
+        """
+        Answer a query that failed because the warehouse is unavailable with its last good result
+
+        Background work never gets stale results (it keeps its previous value
+        instead), nor do uncached statements (ttl=0).
+
+        Raises:
+            The original error when the fallback doesn't apply or no result is known
+        """
+        unavailable = isinstance(error, (CircuitOpenError, WarehouseBusyError)) or self._is_outage(error)
+        entry = None
+        if unavailable and priority != QueryPriority.BACKGROUND and ttl != 0:
+            entry = self._last_good.get(cache_key)
+        if entry is None:
+            raise error
+
+        results, stored_at = entry
+        age = time.time() - stored_at
+        mark_stale(age)
+        logger.warning(f"Serving last good result ({age:.0f}s old): {error}")
+        return results
+
+    def _probe_warehouse(self) -> None:
+        """Run a trivial statement, bypassing the circuit (used by the recovery probe)"""
+        self._run_to_completion("SELECT 1")
+
+    def _get_cached(self, cache_key: str, ttl: Optional[int]) -> Optional[ColumnarResult]:
+        """Return a cached result for the key, if caching applies and one is live"""
+        if not self._use_cache(ttl):
+            return None
+
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Query cache hit ({len(cached)} rows)")
+        return cached
+
+    def _run_statement(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> ColumnarResult:
+        """Run a statement against the warehouse (no caching)"""
+        try:
+            statement = self._submit_statement(query, params, cancel_event)
 
             # Parse results
             if not statement.result or not statement.result.data_array:
                 logger.debug("Query returned 0 rows")
-                return []
-
-            # Get column names
-            columns = [col.name for col in statement.manifest.schema.columns]
-
-            # Convert rows to list of dicts
-            results = []
-            for row in statement.result.data_array:
-                # Handle both list and object row formats
-                if isinstance(row, (list, tuple)):
-                    row_values = row
-                elif hasattr(row, 'values'):
-                    row_values = row.values
-                else:
-                    try:
-                        row_values = list(row)
-                    except:
-                        row_values = [row]
-
-                results.append(dict(zip(columns, row_values)))
+                return self._build_result(statement, [])
+
+            # Transpose rows from every result chunk into typed columns
+            results = self._build_result(statement, self._fetch_all_rows(statement))
 
             logger.debug(f"Query returned {len(results)} rows")
             return results
 
+        except (QueryCancelledError, CircuitOpenError) as e:
+            logger.info(str(e))
+            raise
         except Exception as e:
             logger.error(f"Query execution failed: {e}", exc_info=True)
             raise
 
+    def _submit_statement(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ):
+        """
+        Execute a statement through the circuit breaker (see _run_to_completion)
+
+        Raises:
+            CircuitOpenError: The circuit is open; the statement is not submitted
+        """
+        self._check_circuit()
+        try:
+            statement = self._run_to_completion(query, params, cancel_event)
+        except Exception as e:
+            if self._breaker is not None and self._is_outage(e):
+                self._breaker.record_failure(e)
+            raise
+
+        if self._breaker is not None:
+            self._breaker.record_success()
+        return statement
+
+    def _run_to_completion(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ):
+        """
+        Execute a statement and return the succeeded StatementResponse
+
+        The statement is submitted with a short server-side wait
+        (STATEMENT_WAIT_TIMEOUT). If it is still PENDING/RUNNING after that,
+        it is polled with exponential backoff until it finishes, the
+        REQUEST_TIMEOUT deadline passes, or cancel_event is set; in the
+        latter two cases the statement is cancelled on the warehouse so it
+        stops occupying a slot.
+
+        Raises:
+            QueryTimeoutError: The deadline passed before the statement finished
+            QueryCancelledError: cancel_event was set (e.g. the client went away)
+            StatementFailedError: The statement failed, was canceled or closed
+        """
+        if not self.warehouse_id:
+            raise ValueError("DATABRICKS_HTTP_PATH not configured")
+
+        logger.debug(f"Executing query: {query}" + (f" with params {params}" if params else ""))
+
+        ws = self._get_workspace_client()
+        deadline = time.monotonic() + settings.REQUEST_TIMEOUT
+
+        # Execute statement using SDK (handles auth automatically).
+        # Parameters are bound server-side, never spliced into the SQL text.
+        statement = ws.statement_execution.execute_statement(
+            warehouse_id=self.warehouse_id,
+            statement=query,
+            catalog=self.catalog,
+            schema=self.schema,
+            parameters=to_statement_parameters(params),
+            wait_timeout=f"{settings.STATEMENT_WAIT_TIMEOUT}s",
+            on_wait_timeout=ExecuteStatementRequestOnWaitTimeout.CONTINUE
+        )
+
+        # Poll long-running statements with exponential backoff
+        delay = settings.STATEMENT_POLL_INITIAL_INTERVAL
+        while statement.status.state in (StatementState.PENDING, StatementState.RUNNING):
+            if cancel_event is not None and cancel_event.is_set():
+                self._cancel_statement(statement.statement_id)
+                raise QueryCancelledError(f"Statement {statement.statement_id} cancelled by caller")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._cancel_statement(statement.statement_id)
+                raise QueryTimeoutError(
+                    f"Statement {statement.statement_id} did not finish within {settings.REQUEST_TIMEOUT}s"
+                )
+
+            wait = min(delay, remaining)
+            if cancel_event is not None:
+                cancel_event.wait(wait)
+            else:
+                time.sleep(wait)
+            delay = min(delay * 2, settings.STATEMENT_POLL_MAX_INTERVAL)
+
+            statement = ws.statement_execution.get_statement(statement.statement_id)
+
+        # Check if execution succeeded
+        if statement.status.state != StatementState.SUCCEEDED:
+            error_msg = f"Query failed with state: {statement.status.state}"
+            if statement.status.error and statement.status.error.message:
+                error_msg += f" ({statement.status.error.message})"
+            logger.error(error_msg)
+            raise StatementFailedError(error_msg)
+
+        return statement
+
+    def _cancel_statement(self, statement_id: str) -> None:
+        """Best-effort cancellation of a running statement"""
+        try:
+            self._get_workspace_client().statement_execution.cancel_execution(statement_id)
+            logger.info(f"Cancelled statement {statement_id}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel statement {statement_id}: {e}")
+
+    def _iter_chunks(self, statement) -> Iterator[list]:
+        """Yield the raw rows of each result chunk in order, fetching lazily"""
+        if not statement.result:
+            return
+
+        yield statement.result.data_array or []
+
+        ws = self._get_workspace_client()
+        next_index = statement.result.next_chunk_index
+        while next_index is not None:
+            chunk = ws.statement_execution.get_statement_result_chunk_n(statement.statement_id, next_index)
+            yield chunk.data_array or []
+            next_index = chunk.next_chunk_index
+
+    def iter_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batches: bool = False,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> Iterator[Any]:
+        """
+        Execute a SQL query and yield rows chunk by chunk
+
+        Unlike execute_query, the result is never materialized as a whole:
+        each chunk is fetched only when the previous one has been consumed, so
+        memory stays flat and the first rows are available as soon as the
+        statement finishes. Streaming queries bypass the result cache. The
+        warehouse slot is held only while the statement runs; chunk downloads
+        happen after it is released.
+
+        Args:
+            query: SQL query string (use :param_name for parameterized queries)
+            params: Optional dictionary of query parameters
+            batches: Yield one list of rows per chunk instead of single rows
+            priority: Admission class used when the warehouse is saturated
+
+        Yields:
+            Row dictionaries, or lists of row dictionaries when batches=True
+
+        Example:
+            for row in repo.iter_query("SELECT * FROM big_table"):
+                process(row)
+        """
+        self._admission.acquire(priority)
+        try:
+            statement = self._submit_statement(query, params)
+        finally:
+            self._admission.release()
+
+        for chunk in self._iter_chunks(statement):
+            rows = self._build_result(statement, chunk).to_rows()
+            if batches:
+                yield rows
+            else:
+                yield from rows
+
+    async def aiter_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batches: bool = False,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> AsyncIterator[Any]:
+        """
+        Async generator variant of iter_query for use from async routes
+
+        The statement and each chunk download run on the query executor, so
+        the event loop is free while the next chunk is fetched.
+
+        Args:
+            query: SQL query string (use :param_name for parameterized queries)
+            params: Optional dictionary of query parameters
+            batches: Yield one list of rows per chunk instead of single rows
+            priority: Admission class used when the warehouse is saturated
+
+        Yields:
+            Row dictionaries, or lists of row dictionaries when batches=True
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        # Cancel the statement on the warehouse if the consumer goes away
+        # (e.g. the client disconnects from a streaming response)
+        cancel_event = threading.Event()
+        try:
+            statement = await self._run_admitted_async(
+                priority, self._submit_statement, query, params, cancel_event
+            )
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+        chunks = self._iter_chunks(statement)
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, _END_OF_RESULT)
+            if chunk is _END_OF_RESULT:
+                break
+
+            rows = self._build_result(statement, chunk).to_rows()
+            if batches:
+                yield rows
+            else:
+                for row in rows:
+                    yield row
+
+    def _build_result(self, statement, raw_rows: list) -> ColumnarResult:
+        """
+        Transpose raw rows into a ColumnarResult and decode column types
+
+        Values are decoded per column using the manifest's type info, so
+        numbers, decimals, booleans and dates come back as native Python
+        values instead of strings (disable with QUERY_TYPED_DECODING).
+        """
+        columns_info = statement.manifest.schema.columns if statement.manifest and statement.manifest.schema else []
+        result = ColumnarResult.from_rows(
+            [col.name for col in columns_info],
+            (self._row_values(row) for row in raw_rows),
+            [column_type_name(col) for col in columns_info]
+        )
+
+        if settings.QUERY_TYPED_DECODING and result.row_count:
+            result.data = decode_columns(columns_info, result.data)
+
+        return result
+
+    @staticmethod
+    def _row_values(row) -> list:
+        """Handle both list and object row formats"""
+        if isinstance(row, (list, tuple)):
+            return row
+        elif hasattr(row, 'values'):
+            return row.values
+        else:
+            try:
+                return list(row)
+            except:
+                return [row]
+
+    def _fetch_all_rows(self, statement) -> list:
+        """
+        Collect raw rows from every chunk of a succeeded statement
+
+        The first chunk arrives inline with the statement response. When the
+        manifest reports the total chunk count, the remaining chunks are
+        fetched in parallel on the chunk executor; otherwise the
+        next_chunk_index chain is followed sequentially.
+        """
+        rows = list(statement.result.data_array or [])
+        next_index = statement.result.next_chunk_index
+        if next_index is None:
+            return rows
+
+        ws = self._get_workspace_client()
+        statement_id = statement.statement_id
+        manifest = statement.manifest
+        total_chunks = manifest.total_chunk_count if manifest else None
+
+        if manifest and manifest.truncated:
+            logger.warning(f"Statement {statement_id} result was truncated by the warehouse")
+
+        def fetch_chunk(chunk_index: int):
+            return ws.statement_execution.get_statement_result_chunk_n(statement_id, chunk_index)
+
+        if total_chunks and settings.RESULT_CHUNK_FETCH_WORKERS > 1:
+            # Chunk indexes are known up front, so fetch them concurrently
+            # (map preserves chunk order)
+            logger.debug(f"Fetching chunks {next_index}..{total_chunks - 1} of statement {statement_id} in parallel")
+            for chunk in self._get_chunk_executor().map(fetch_chunk, range(next_index, total_chunks)):
+                rows.extend(chunk.data_array or [])
+            return rows
+
+        rows = []
+        for chunk in self._iter_chunks(statement):
+            rows.extend(chunk)
+        return rows
+
+    def invalidate_cache(self, contains: Optional[str] = None) -> int:
+        """
+        Drop cached query results
+
+        Args:
+            contains: Only drop results whose SQL contains this substring,
+                      typically a table name such as "metric_gmv".
+                      Drops everything when omitted.
+
+        Returns:
+            Number of cached results removed
+        """
+        removed = self._cache.invalidate(contains)
+        logger.info(f"Invalidated {removed} cached query results" + (f" matching '{contains}'" if contains else ""))
+        return removed
+
+    def admission_stats(self) -> Dict[str, Any]:
+        """Return warehouse slot occupancy and per-priority queue-time metrics"""
+        return self._admission.stats()
+
+    def circuit_stats(self) -> Dict[str, Any]:
+        """Return the warehouse circuit state, its counters and the last-good store occupancy"""
+        return {
+            **(self._breaker.stats() if self._breaker is not None else {"state": "disabled"}),
+            "last_good_results": self._last_good.stats(),
+        }
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return query cache hit/miss counters, occupancy and coalescing counters"""
+        return {
+            **self._cache.stats(),
+            "single_flight": self._single_flight.stats(),
+            "batching": self._batcher.stats(),
+        }
+
     def get_table_data(
         self,
         table_name: str,
@@ -174,6 +767,18 @@ class DatabricksRepository:
                 order_by="price DESC"
             )
         """
+        query = self._build_table_query(table_name, limit, offset, where_clause, order_by)
+        return self.execute_query(query)
+
+    def _build_table_query(
+        self,
+        table_name: str,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        where_clause: Optional[str] = None,
+        order_by: Optional[str] = None
+    ) -> str:
+        """Build the SELECT statement used by get_table_data"""
         query_parts = [f"SELECT * FROM {self.catalog}.{self.schema}.{table_name}"]
 
         if where_clause:
@@ -188,8 +793,7 @@ class DatabricksRepository:
         if offset:
             query_parts.append(f"OFFSET {offset}")
 
-        query = " ".join(query_parts)
-        return self.execute_query(query)
+        return " ".join(query_parts)
 
     def get_count(
         self,
@@ -206,12 +810,186 @@ class DatabricksRepository:
         Returns:
             Number of rows matching the criteria
         """
+        result = self.execute_query(self._build_count_query(table_name, where_clause))
+        return result[0]["count"] if result else 0
+
+    def _build_count_query(self, table_name: str, where_clause: Optional[str] = None) -> str:
+        """Build the COUNT(*) statement used by get_count"""
         query = f"SELECT COUNT(*) as count FROM {self.catalog}.{self.schema}.{table_name}"
 
         if where_clause:
             query += f" WHERE {where_clause}"
 
-        result = self.execute_query(query)
+        return query
+
+    async def execute_query_async(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> List[Dict[str, Any]]:
+        """
+        Non-blocking variant of execute_query for use from async routes
+
+        Cache hits are answered directly on the event loop; misses run on the
+        repository's bounded query executor, so concurrent requests wait on
+        the warehouse in parallel instead of serializing on the event loop.
+        Concurrent callers of the same SQL await one shared statement, which
+        is cancelled on the warehouse if every awaiting task is cancelled.
+        Admission to the warehouse is awaited on the event loop, so queued
+        queries do not tie up executor threads.
+
+        Args:
+            query: SQL query string (use :param_name for parameterized queries)
+            params: Optional dictionary of query parameters
+            ttl: Cache TTL in seconds (0 bypasses the cache)
+            priority: Admission class used when the warehouse is saturated
+
+        Returns:
+            List of dictionaries, where each dict represents a row
+        """
+        result = await self.execute_query_columnar_async(query, params, ttl, priority)
+        return result.to_rows()
+
+    async def execute_query_columnar_async(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> ColumnarResult:
+        """Non-blocking variant of execute_query_columnar"""
+        cache_key = self._cache_key(query, params)
+
+        cached = self._get_cached(cache_key, ttl)
+        if cached is not None:
+            return cached
+
+        try:
+            self._check_circuit()
+            return await self._single_flight.do_async(
+                cache_key, self._execute_admitted_async, query, params, cache_key, ttl, priority
+            )
+        except Exception as e:
+            return self._last_good_result(cache_key, ttl, priority, e)
+
+    async def execute_query_batched_async(
+        self,
+        template: str,
+        column: str,
+        value: Any,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a query filtered on one column value, batched with concurrent calls for other values
+
+        Calls with the same template and params arriving within
+        QUERY_BATCH_WINDOW run as one `column IN (...)` statement; each value's
+        rows are then cached exactly as if `column = value` had run alone, so
+        later calls for a value are plain cache hits.
+
+        Args:
+            template: SQL with BATCH_PREDICATE where the predicate on column
+                      goes. The column must be an output column of the query
+                      (under that name) and the query must not LIMIT rows.
+            column: Filter column
+            value: This call's filter value
+            params: Other bound parameters (part of the batch shape)
+            ttl: Cache TTL in seconds for each value's result
+            priority: Admission class (a batch runs at its most urgent caller's)
+
+        Returns:
+            The rows the query returns for column = value
+        """
+        query = template.replace(BATCH_PREDICATE, f"{column} = :batch_value")
+        query_params = {**(params or {}), "batch_value": value}
+        cache_key = self._cache_key(query, query_params)
+
+        cached = self._get_cached(cache_key, ttl)
+        if cached is not None:
+            return cached.to_rows()
+        if not settings.QUERY_BATCH_ENABLED:
+            result = await self.execute_query_columnar_async(query, query_params, ttl, priority)
+            return result.to_rows()
+
+        try:
+            self._check_circuit()
+            result = await self._batcher.load(
+                f"{self._cache_key(template, params)} -- batch on: {column}",
+                value,
+                priority,
+                lambda values, batch_priority: self._run_batch(template, column, values, params, ttl, batch_priority)
+            )
+        except Exception as e:
+            result = self._last_good_result(cache_key, ttl, priority, e)
+        return result.to_rows()
+
+    async def _run_batch(
+        self,
+        template: str,
+        column: str,
+        values: List[Any],
+        params: Optional[Dict[str, Any]],
+        ttl: Optional[int],
+        priority: QueryPriority
+    ) -> Dict[str, ColumnarResult]:
+        """Run one statement for every value of a batch and split its rows by value"""
+        if len(values) == 1:
+            query = template.replace(BATCH_PREDICATE, f"{column} = :batch_value")
+            query_params = {**(params or {}), "batch_value": values[0]}
+            cache_key = self._cache_key(query, query_params)
+            result = await self._single_flight.do_async(
+                cache_key, self._execute_admitted_async, query, query_params, cache_key, ttl, priority
+            )
+            return {batch_key(values[0]): result}
+
+        markers = {f"batch_value_{i}": value for i, value in enumerate(values)}
+        query = template.replace(BATCH_PREDICATE, f"{column} IN ({', '.join(':' + m for m in markers)})")
+        query_params = {**(params or {}), **markers}
+        batch_cache_key = self._cache_key(query, query_params)
+        # The combined result isn't cached; each value's share is, below
+        result = await self._single_flight.do_async(
+            batch_cache_key, self._execute_admitted_async, query, query_params, batch_cache_key, 0, priority
+        )
+
+        rows_by_value: Dict[str, List[int]] = {batch_key(value): [] for value in values}
+        for i, row_value in enumerate(result.column(column)):
+            rows = rows_by_value.get(batch_key(row_value))
+            if rows is not None:
+                rows.append(i)
+
+        results = {}
+        single_query = template.replace(BATCH_PREDICATE, f"{column} = :batch_value")
+        for value in values:
+            share = result.take(rows_by_value[batch_key(value)])
+            self._store_result(self._cache_key(single_query, {**(params or {}), "batch_value": value}), share, ttl)
+            results[batch_key(value)] = share
+
+        logger.debug(f"Batched {len(values)} values of {column} into one statement ({len(result)} rows)")
+        return results
+
+    async def get_table_data_async(
+        self,
+        table_name: str,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        where_clause: Optional[str] = None,
+        order_by: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Non-blocking variant of get_table_data"""
+        query = self._build_table_query(table_name, limit, offset, where_clause, order_by)
+        return await self.execute_query_async(query)
+
+    async def get_count_async(
+        self,
+        table_name: str,
+        where_clause: Optional[str] = None
+    ) -> int:
+        """Non-blocking variant of get_count"""
+        result = await self.execute_query_async(self._build_count_query(table_name, where_clause))
         return result[0]["count"] if result else 0
 
     def close(self):
@@ -224,6 +1002,19 @@ class DatabricksRepository:
         # No persistent connection to close with statement execution API
         # SDK handles connection lifecycle automatically
         self._workspace_client = None
+        self._cache.invalidate()
+
+        if self._breaker is not None:
+            self._breaker.stop()
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        if self._chunk_executor:
+            self._chunk_executor.shutdown(wait=False, cancel_futures=True)
+            self._chunk_executor = None
+
         logger.info("Databricks repository resources cleaned up")
 
 
@@ -0,0 +1,135 @@
+"""
+Typed Decoding of Statement Results
+
+The statement execution API returns every value in data_array as a string.
+This module uses the column types from statement.manifest.schema to decode
+whole columns at once into native Python values (int, float, Decimal, bool,
+date, datetime), so parsing happens once on the server instead of in every
+route and again in the browser.
+
+Usage:
+    data = decode_columns(statement.manifest.schema.columns, result.data)
+
+    json.dumps(rows, default=json_default)
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+def _parse_float(value: str) -> Optional[float]:
+    # NaN/Infinity are not valid JSON, so they decode to None (null)
+    parsed = float(value)
+    return parsed if math.isfinite(parsed) else None
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # fromisoformat only accepts a trailing "Z" from Python 3.11
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+# Decoders keyed by ColumnInfoTypeName value; types not listed (STRING, CHAR,
+# BINARY, INTERVAL and complex types) are passed through unchanged
+_DECODERS: Dict[str, Callable[[str], Any]] = {
+    "BYTE": int,
+    "SHORT": int,
+    "INT": int,
+    "LONG": int,
+    "FLOAT": _parse_float,
+    "DOUBLE": _parse_float,
+    "DECIMAL": Decimal,
+    "BOOLEAN": _parse_bool,
+    "DATE": date.fromisoformat,
+    "TIMESTAMP": _parse_timestamp,
+}
+
+
+def column_type_name(column) -> Optional[str]:
+    """Return the SQL type name of a manifest ColumnInfo (e.g. "DECIMAL")"""
+    type_name = getattr(column, "type_name", None)
+    if type_name is None:
+        return None
+    return getattr(type_name, "value", str(type_name))
+
+
+def decode_column(values: list, type_name: Optional[str]) -> list:
+    """
+    Decode one column of string values into its native Python type
+
+    Args:
+        values: Raw string values (None for SQL NULL)
+        type_name: SQL type name from the result manifest
+
+    Returns:
+        Decoded values, or the input list if the type needs no decoding
+    """
+    decoder = _DECODERS.get(type_name)
+    if decoder is None:
+        return values
+
+    if None in values:
+        return [None if v is None else decoder(v) for v in values]
+    return list(map(decoder, values))
+
+
+def decode_columns(columns: list, data: List[list]) -> List[list]:
+    """
+    Decode every column of a columnar result using manifest type info
+
+    A column whose values fail to decode is left as strings (with a warning)
+    rather than failing the whole query.
+
+    Args:
+        columns: statement.manifest.schema.columns (ColumnInfo objects)
+        data: One list of raw values per column
+
+    Returns:
+        One list of decoded values per column
+    """
+    decoded = []
+    for column, values in zip(columns, data):
+        type_name = column_type_name(column)
+        try:
+            decoded.append(decode_column(values, type_name))
+        except (ValueError, ArithmeticError) as e:
+            logger.warning(f"Could not decode column {column.name} as {type_name}: {e}")
+            decoded.append(values)
+    return decoded
+
+
+def as_date(value: Any) -> date:
+    """
+    Coerce a DATE/TIMESTAMP result value to a date
+
+    Accepts decoded values as well as their ISO string form (when typed
+    decoding is off or the column failed to decode).
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def json_default(value: Any) -> Any:
+    """
+    json.dumps default hook for decoded values
+
+    Mirrors FastAPI's encoding: Decimals become int/float, dates and
+    datetimes become ISO 8601 strings.
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
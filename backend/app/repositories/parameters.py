@@ -0,0 +1,87 @@
+"""
+Server-Side Statement Parameters
+
+Converts the params dictionaries accepted by DatabricksRepository into the
+statement execution API's named parameter list, so values are bound by the
+warehouse instead of being spliced into the SQL text. The SQL text then stays
+identical for every filter value, which lets the warehouse reuse its query
+result and plan caches and keeps application cache keys stable.
+
+Usage:
+    parameters = to_statement_parameters({"segment": "Family", "year": 2024})
+    ws.statement_execution.execute_statement(
+        statement="SELECT ... WHERE customer_segment = :segment AND order_year = :year",
+        parameters=parameters,
+        ...
+    )
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from databricks.sdk.service.sql import StatementParameterListItem
+
+_INT32_MIN = -2 ** 31
+_INT32_MAX = 2 ** 31 - 1
+
+
+def _typed_value(value: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Map a Python value to its (SQL type, string value) parameter encoding
+
+    Returns:
+        (type, value) where type is None for untyped NULLs
+    """
+    if value is None:
+        return None, None
+    # bool must be checked before int (bool is an int subclass)
+    if isinstance(value, bool):
+        return "BOOLEAN", "true" if value else "false"
+    if isinstance(value, int):
+        return ("INT" if _INT32_MIN <= value <= _INT32_MAX else "BIGINT"), str(value)
+    if isinstance(value, float):
+        return "DOUBLE", repr(value)
+    if isinstance(value, Decimal):
+        scale = max(0, -value.as_tuple().exponent)
+        return f"DECIMAL(38,{scale})", str(value)
+    # datetime must be checked before date (datetime is a date subclass)
+    if isinstance(value, datetime):
+        return "TIMESTAMP", value.isoformat()
+    if isinstance(value, date):
+        return "DATE", value.isoformat()
+    return "STRING", str(value)
+
+
+def to_statement_parameters(params: Optional[Dict[str, Any]]) -> Optional[List[StatementParameterListItem]]:
+    """
+    Build the named parameter list for execute_statement
+
+    Args:
+        params: Mapping of :name markers in the SQL to Python values
+
+    Returns:
+        List of StatementParameterListItem, or None when there are no params
+    """
+    if not params:
+        return None
+
+    parameters = []
+    for name, value in params.items():
+        sql_type, sql_value = _typed_value(value)
+        parameters.append(StatementParameterListItem(name=name, type=sql_type, value=sql_value))
+    return parameters
+
+
+def parameters_signature(params: Optional[Dict[str, Any]]) -> str:
+    """
+    Stable text form of bound parameters for use in cache keys
+
+    Parameters are sorted by name so keyword order never changes the key.
+    """
+    if not params:
+        return ""
+
+    parts = []
+    for name in sorted(params):
+        sql_type, sql_value = _typed_value(params[name])
+        parts.append(f"{name}={sql_type}:{sql_value!r}")
+    return ", ".join(parts)
@@ -0,0 +1,204 @@
+"""
+Query Result Cache
+
+In-memory TTL + LRU cache for warehouse query results, used by
+DatabricksRepository so repeated dashboard loads are served from memory
+instead of re-running statements against the SQL warehouse.
+
+Entries are keyed on the normalized SQL text (plus bound parameters), expire after a per-entry
+TTL, and are evicted least-recently-used first once the approximate byte
+budget is exceeded.
+
+Usage:
+    cache = QueryCache(max_bytes=64 * 1024 * 1024, default_ttl=300)
+
+    key = normalize_sql(query)
+    rows = cache.get(key)
+    if rows is None:
+        rows = run_query(query)
+        cache.set(key, rows, ttl=3600)
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import re
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches single-quoted SQL string literals (with '' escapes) so whitespace
+# inside literals is preserved during normalization
+_SQL_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalize SQL text for use as a cache key
+
+    Collapses runs of whitespace outside string literals so the same statement
+    formatted differently (indentation, line breaks) maps to one key.
+
+    Args:
+        query: SQL text
+
+    Returns:
+        Normalized SQL string
+    """
+    parts = _SQL_LITERAL.split(query)
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE.sub(" ", parts[i])
+    return "".join(parts).strip()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate the in-memory size of a query result in bytes
+
+    Walks lists, tuples and dicts one level per nesting step; good enough to
+    enforce a memory budget without the cost of a full object-graph traversal.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(v) for v in value.values())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class _CacheEntry:
+    """Single cached result with its expiry time and estimated size"""
+
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class QueryCache:
+    """
+    Thread-safe TTL + LRU cache with a byte-size budget
+
+    Attributes:
+        max_bytes: Approximate memory budget for all cached results
+        default_ttl: TTL in seconds used when set() is called without one
+        hits: Number of get() calls served from the cache
+        misses: Number of get() calls that found no live entry
+        evictions: Number of entries evicted to stay within max_bytes
+        expirations: Number of entries dropped because their TTL elapsed
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: int):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached result
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Store a result
+
+        Results larger than the whole budget are not cached.
+
+        Args:
+            key: Cache key (normalized SQL plus bound parameters)
+            value: Result to cache (treated as read-only by callers)
+            ttl: Time-to-live in seconds (defaults to default_ttl)
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Result of {size} bytes exceeds cache budget, not caching")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = _CacheEntry(value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+            # Evict least-recently-used entries until within budget
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, contains: Optional[str] = None) -> int:
+        """
+        Drop cached results
+
+        Args:
+            contains: Only drop entries whose key contains this substring
+                      (e.g. a table name). Drops everything when omitted.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if contains is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return removed
+
+            keys = [key for key in self._entries if contains in key]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry and release its bytes (caller holds the lock)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
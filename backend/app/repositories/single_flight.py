@@ -0,0 +1,168 @@
+"""
+Single-Flight Query Coalescing
+
+Ensures that concurrent callers asking for the same query share one
+in-flight warehouse statement instead of each launching an identical one.
+The first caller for a key becomes the leader and runs the work; callers
+arriving while it is still running wait on the same future and receive the
+same result (or exception).
+
+Each in-flight call carries a cancel event that is passed to the work as
+cancel_event. It is set once every async waiter has gone away (e.g. all
+clients disconnected), so the statement can be cancelled on the warehouse
+instead of running for nobody.
+
+Usage:
+    single_flight = SingleFlight()
+
+    # From a worker thread: run inline as leader, or wait for the leader
+    rows = single_flight.do(cache_key, run_query, query)
+
+    # From async code: the leader's coroutine runs as its own task, so a
+    # cancelled waiter never cancels the statement other waiters depend on
+    rows = await single_flight.do_async(cache_key, run_query_async, query)
+"""
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight call: its shared future, cancel event, waiter count and leader task"""
+
+    __slots__ = ("future", "cancel_event", "waiters", "task")
+
+    def __init__(self):
+        # Mark the shared future as running so a waiter cancelling its own
+        # wrapper (e.g. asyncio.wrap_future) cannot cancel it for the others
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.cancel_event = threading.Event()
+        self.waiters = 0
+        self.task = None
+
+
+class SingleFlight:
+    """
+    Thread-safe registry of in-flight calls keyed by query
+
+    Attributes:
+        coalesced: Number of callers that joined an already in-flight call
+        abandoned: Number of calls whose waiters all went away before it finished
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def _claim(self, key: str):
+        """Join the in-flight call for key and return it with whether the caller leads it"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                logger.debug("Joining in-flight query")
+                return call, False
+
+            call = _Call()
+            call.waiters = 1
+            self._calls[key] = call
+            return call, True
+
+    def _resolve(self, key: str, call: _Call, fn: Callable[..., Any], args: tuple) -> None:
+        """Run the leader's work and publish its outcome to every waiter"""
+        try:
+            result = fn(*args, cancel_event=call.cancel_event)
+        except BaseException as e:
+            self._release(key, call)
+            call.future.set_exception(e)
+        else:
+            self._release(key, call)
+            call.future.set_result(result)
+
+    async def _resolve_async(
+        self,
+        key: str,
+        call: _Call,
+        work: Callable[..., Awaitable[Any]],
+        args: tuple
+    ) -> None:
+        """Await the leader's coroutine and publish its outcome to every waiter"""
+        try:
+            result = await work(*args, cancel_event=call.cancel_event)
+        except BaseException as e:
+            self._release(key, call)
+            call.future.set_exception(e)
+        else:
+            self._release(key, call)
+            call.future.set_result(result)
+
+    def _release(self, key: str, call: _Call) -> None:
+        """Stop routing new callers to the finished call"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def _leave(self, key: str, call: _Call) -> None:
+        """Drop a waiter; cancel the call once nobody is waiting for it"""
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters > 0 or call.future.done():
+                return
+
+            # Route new callers to a fresh call rather than the cancelled one
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            self.abandoned += 1
+
+        logger.info("All waiters left an in-flight query, cancelling it")
+        call.cancel_event.set()
+        if call.task is not None:
+            call.task.cancel()
+
+    def do(self, key: str, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run fn(*args, cancel_event=...) once for all concurrent callers of key (blocking)
+
+        The leader runs fn in the calling thread; followers block until the
+        leader finishes.
+        """
+        call, leader = self._claim(key)
+        if leader:
+            self._resolve(key, call, fn, args)
+        return call.future.result()
+
+    async def do_async(self, key: str, work: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Await the shared result of work(*args, cancel_event=...) for key
+
+        The leader's coroutine runs as a separate task. If an awaiting task is
+        cancelled it stops waiting without affecting other waiters; when the
+        last waiter leaves, the call's cancel event is set and the leader
+        task is cancelled.
+        """
+        call, leader = self._claim(key)
+        if leader:
+            call.task = asyncio.ensure_future(self._resolve_async(key, call, work, args))
+
+        try:
+            return await asyncio.wrap_future(call.future)
+        except asyncio.CancelledError:
+            self._leave(key, call)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of in-flight calls and coalesced/abandoned callers"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "coalesced": self.coalesced,
+                "abandoned": self.abandoned,
+            }
@@ -0,0 +1,340 @@
+"""
+Cohort Retention Engine
+
+Computes cohort retention matrices in-process instead of reading the
+long-format metric_cohort_retention table and pivoting it in the browser.
+One statement loads, for every customer acquired within the history window,
+the distinct days they ordered on (plus their segment); these are kept as
+compact parallel arrays (customer code, day number). A retention matrix for
+any cohort granularity (week, month, quarter), segment and cohort range is
+then a handful of vectorized operations:
+
+1. Map activity days and each customer's first order day to periods
+2. Deduplicate (customer, period) pairs with np.unique
+3. bincount active customers per (cohort, periods since acquisition)
+
+History starts on a quarter boundary so the oldest month and quarter
+cohorts are complete; week cohorts straddling it are left out. Refreshes
+only fetch activity since the last loaded day (minus a late-arrival
+window).
+
+Usage:
+    from app.services.cohort_engine import cohort_engine
+
+    matrix = await cohort_engine.matrix(granularity="week", segment="Family", max_periods=8)
+    matrix["cohorts"]        # ["2025-01-06", ...]
+    matrix["retention_pct"]  # [[100.0, 41.2, ...], ...]
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Literal, Optional
+import asyncio
+import time
+import logging
+import numpy as np
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.databricks_repo import databricks_repo
+from app.repositories.decoding import as_date
+from app.services.metric_registry import SALES_FACT
+
+logger = logging.getLogger(__name__)
+
+CohortGranularity = Literal["week", "month", "quarter"]
+
+_EPOCH = date(1970, 1, 1)
+
+# Customers acquired since :cohort_start (first order over all history) and
+# the distinct days they ordered on since :since
+_ACTIVITY_QUERY = f"""
+WITH acquired AS (
+    SELECT customer_id
+    FROM {SALES_FACT}
+    WHERE customer_id IS NOT NULL
+    GROUP BY customer_id
+    HAVING MIN(order_date) >= :cohort_start
+)
+SELECT
+    CAST(s.customer_id AS STRING) AS customer_id,
+    s.order_date,
+    MAX(s.{settings.COHORT_SEGMENT_COLUMN}) AS customer_segment
+FROM {SALES_FACT} s
+JOIN acquired a ON s.customer_id = a.customer_id
+WHERE s.order_date >= :since
+GROUP BY s.customer_id, s.order_date
+"""
+
+
+def _periods(days: np.ndarray, granularity: CohortGranularity) -> np.ndarray:
+    """Map days since 1970-01-01 to period numbers (Monday weeks, months or quarters)"""
+    if granularity == "week":
+        # 1970-01-01 was a Thursday; +3 aligns week boundaries to Mondays
+        return (days + 3) // 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return months // 3 if granularity == "quarter" else months
+
+
+def _period_start(period: int, granularity: CohortGranularity) -> date:
+    """First day of a period number"""
+    if granularity == "week":
+        return _EPOCH + timedelta(days=int(period) * 7 - 3)
+    months = int(period) * 3 if granularity == "quarter" else int(period)
+    return date(1970 + months // 12, months % 12 + 1, 1)
+
+
+def _quarter_start(day: date) -> date:
+    """First day of the quarter containing a day (also a month boundary)"""
+    return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+
+
+class _Activity:
+    """Loaded customer activity as parallel arrays"""
+
+    __slots__ = ("customer_index", "customers", "days", "first_day", "segments", "segment_labels", "loaded_at")
+
+    def __init__(self):
+        self.customer_index: Dict[str, int] = {}
+        self.customers = np.zeros(0, dtype=np.int32)      # per activity row: customer code
+        self.days = np.zeros(0, dtype=np.int32)           # per activity row: days since epoch
+        self.first_day = np.zeros(0, dtype=np.int32)      # per customer: first order day
+        self.segments = np.zeros(0, dtype=np.int16)       # per customer: segment code
+        self.segment_labels: List[Optional[str]] = []
+        self.loaded_at = 0.0
+
+    @property
+    def last_day(self) -> Optional[int]:
+        return int(self.days.max()) if len(self.days) else None
+
+
+class CohortEngine:
+    """
+    In-memory cohort retention over daily_sales_fact customer activity
+
+    Attributes:
+        history_days: Cohorts acquired within this many days are loaded
+                      (from the start of that quarter, so cohorts are whole)
+        late_arrival_days: Trailing days re-fetched on refresh
+        max_age: Seconds after which a read schedules a background refresh
+    """
+
+    def __init__(self, history_days: int, late_arrival_days: int, max_age: float):
+        self.history_days = history_days
+        self.late_arrival_days = late_arrival_days
+        self.max_age = max_age
+        self._activity: Optional[_Activity] = None
+        self._cohort_start: Optional[date] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    def invalidate(self) -> None:
+        """Drop loaded activity; reloaded on next use"""
+        self._activity = None
+
+    async def _load(self, priority: QueryPriority) -> _Activity:
+        current = self._activity
+        refetch = current is not None and current.last_day is not None
+        if refetch:
+            since = _EPOCH + timedelta(days=current.last_day - self.late_arrival_days)
+        else:
+            current = _Activity()
+            self._cohort_start = _quarter_start(datetime.now(timezone.utc).date() - timedelta(days=self.history_days))
+            since = self._cohort_start
+
+        # Trailing-window re-fetches bypass the result cache, which would
+        # return the window as it was when first cached
+        result = await databricks_repo.execute_query_columnar_async(
+            _ACTIVITY_QUERY,
+            {"cohort_start": self._cohort_start, "since": since},
+            ttl=0 if refetch else settings.SALES_FACT_CACHE_TTL,
+            priority=priority
+        )
+
+        activity = _Activity()
+        activity.customer_index = dict(current.customer_index)
+        activity.segment_labels = list(current.segment_labels)
+        segment_index = {label: i for i, label in enumerate(activity.segment_labels)}
+
+        # Re-fetched days replace what was loaded for them
+        since_day = (since - _EPOCH).days
+        kept = current.days < since_day
+        customers = []
+        days = []
+        segments = current.segments.tolist()
+
+        for customer_id, order_date, segment in zip(
+            result.column("customer_id"), result.column("order_date"), result.column("customer_segment")
+        ):
+            code = activity.customer_index.get(customer_id)
+            if segment not in segment_index:
+                segment_index[segment] = len(activity.segment_labels)
+                activity.segment_labels.append(segment)
+            if code is None:
+                code = len(activity.customer_index)
+                activity.customer_index[customer_id] = code
+                segments.append(segment_index[segment])
+            elif segment is not None:
+                segments[code] = segment_index[segment]
+            customers.append(code)
+            days.append((as_date(order_date) - _EPOCH).days)
+
+        activity.customers = np.concatenate([current.customers[kept], np.array(customers, dtype=np.int32)])
+        activity.days = np.concatenate([current.days[kept], np.array(days, dtype=np.int32)])
+        activity.segments = np.array(segments, dtype=np.int16)
+        activity.first_day = np.full(len(activity.customer_index), np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(activity.first_day, activity.customers, activity.days)
+        activity.loaded_at = time.time()
+
+        self._activity = activity
+        logger.info(
+            f"Loaded cohort activity since {since}: {len(activity.customer_index)} customers, "
+            f"{len(activity.days)} customer-days ({activity.days.nbytes + activity.customers.nbytes} bytes)"
+        )
+        return activity
+
+    def _load_task(self, priority: QueryPriority) -> asyncio.Task:
+        """Return the in-progress load, starting one if needed"""
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().create_task(self._load(priority))
+            self._loading.add_done_callback(self._load_done)
+        return self._loading
+
+    def _load_done(self, task: asyncio.Task) -> None:
+        self._loading = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Loading cohort activity failed: {task.exception()}")
+
+    async def refresh(self, priority: QueryPriority = QueryPriority.BACKGROUND) -> None:
+        """Fetch new activity (everything if not loaded yet)"""
+        await asyncio.shield(self._load_task(priority))
+
+    async def _activity_for(self, priority: QueryPriority) -> _Activity:
+        if self._activity is None:
+            return await asyncio.shield(self._load_task(priority))
+        if time.time() - self._activity.loaded_at > self.max_age:
+            self._load_task(QueryPriority.BACKGROUND)
+        return self._activity
+
+    def segments(self) -> List[str]:
+        """Segments seen in the loaded activity"""
+        return [s for s in self._activity.segment_labels if s is not None] if self._activity else []
+
+    async def matrix(
+        self,
+        granularity: CohortGranularity = "month",
+        segment: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        max_periods: int = 12,
+        min_cohort_size: int = 1,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> Dict[str, Any]:
+        """
+        Compute a dense cohort retention matrix
+
+        Args:
+            granularity: Cohort and activity period (week, month, quarter)
+            segment: Only customers of this segment
+            start_date: Earliest cohort (by first order date)
+            end_date: Latest cohort (by first order date)
+            max_periods: Periods since acquisition to include (columns 0..max_periods)
+            min_cohort_size: Drop cohorts with fewer customers
+            priority: Admission class if activity has to be loaded first
+
+        Returns:
+            Dict with cohorts (period start dates, oldest first), periods,
+            cohort_sizes, active[cohort][period] and retention_pct[cohort][period];
+            cells not yet observable are None
+        """
+        activity = await self._activity_for(priority)
+        columns = max_periods + 1
+        empty = {
+            "granularity": granularity,
+            "segment": segment,
+            "cohorts": [],
+            "periods": list(range(columns)),
+            "cohort_sizes": [],
+            "active": [],
+            "retention_pct": [],
+        }
+        if not len(activity.days):
+            return empty
+
+        # Customers in scope
+        customer_ok = np.ones(len(activity.first_day), dtype=bool)
+        if segment is not None:
+            if segment not in activity.segment_labels:
+                return empty
+            customer_ok &= activity.segments == activity.segment_labels.index(segment)
+        if start_date:
+            customer_ok &= activity.first_day >= (start_date - _EPOCH).days
+        if end_date:
+            customer_ok &= activity.first_day <= (end_date - _EPOCH).days
+
+        cohort_of_customer = _periods(activity.first_day.astype(np.int64), granularity)
+        rows = customer_ok[activity.customers]
+        customers = activity.customers[rows].astype(np.int64)
+        periods = _periods(activity.days[rows].astype(np.int64), granularity)
+        if not len(customers):
+            return empty
+
+        # Distinct (customer, period) pairs
+        base = int(periods.min())
+        span = int(periods.max()) - base + 1
+        pairs = np.unique(customers * span + (periods - base))
+        pair_customers = pairs // span
+        offsets = pairs % span + base - cohort_of_customer[pair_customers]
+
+        cohorts = cohort_of_customer[pair_customers]
+        in_range = (offsets >= 0) & (offsets < columns)
+        first_cohort = int(cohorts.min())
+        n_cohorts = int(cohorts.max()) - first_cohort + 1
+
+        active = np.bincount(
+            (cohorts[in_range] - first_cohort) * columns + offsets[in_range],
+            minlength=n_cohorts * columns
+        ).reshape(n_cohorts, columns)
+        sizes = np.bincount(
+            cohort_of_customer[customer_ok] - first_cohort, minlength=n_cohorts
+        )[:n_cohorts]
+
+        current = int(_periods(np.array([(datetime.now(timezone.utc).date() - _EPOCH).days]), granularity)[0])
+        cohort_periods = np.arange(first_cohort, first_cohort + n_cohorts)
+        observable = (cohort_periods[:, None] + np.arange(columns)[None, :]) <= current
+        with np.errstate(divide="ignore", invalid="ignore"):
+            retention = np.round(active / sizes[:, None] * 100, 2)
+
+        # Cohorts starting before the loaded history (weeks straddling its
+        # quarter-aligned start) only have part of their customers
+        complete = np.array([
+            self._cohort_start is None or _period_start(p, granularity) >= self._cohort_start
+            for p in cohort_periods
+        ], dtype=bool)
+        keep = np.flatnonzero((sizes > 0) & (sizes >= min_cohort_size) & complete)
+        return {
+            **empty,
+            "cohorts": [_period_start(cohort_periods[i], granularity) for i in keep],
+            "cohort_sizes": sizes[keep].tolist(),
+            "active": [
+                [int(v) if ok else None for v, ok in zip(active[i], observable[i])] for i in keep
+            ],
+            "retention_pct": [
+                [float(v) if ok else None for v, ok in zip(retention[i], observable[i])] for i in keep
+            ],
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Loaded customers, rows and age"""
+        activity = self._activity
+        return {
+            "cohort_start": self._cohort_start,
+            "customers": len(activity.customer_index) if activity else 0,
+            "customer_days": len(activity.days) if activity else 0,
+            "age_seconds": round(time.time() - activity.loaded_at, 1) if activity else None,
+            "loading": self._loading is not None,
+        }
+
+
+# Global cohort engine for the dashboard's retention views
+cohort_engine = CohortEngine(
+    history_days=settings.COHORT_HISTORY_DAYS,
+    late_arrival_days=settings.COHORT_LATE_ARRIVAL_DAYS,
+    max_age=settings.COHORT_ENGINE_MAX_AGE
+)
@@ -0,0 +1,300 @@
+"""
+Incremental Cohort Retention Refresh
+
+databricks_notebooks/create_cohort_retention_table.sql rebuilds
+metric_cohort_retention from the entire daily_sales_fact history. This
+driver keeps the table current incrementally instead, running the steps of
+databricks_notebooks/incremental_cohort_retention_refresh.sql against two
+state tables (each customer's first order, and per-customer monthly activity)
+and a stored watermark:
+
+1. Replace customer-month activity from the start of the month containing
+   (watermark - late-arrival days) onward
+2. MERGE first orders of customers seen in that window into their cohorts
+3. MERGE the recomputed retention cells whose activity month is in the
+   window; no other cell's counts or cohort size can have changed
+4. Advance the watermark to the last order date processed
+
+The first run (no watermark) backfills everything. Writing requires MODIFY
+on main.dominos_analytics for the app's service principal.
+
+Usage:
+    from app.services.cohort_retention_refresh import cohort_retention_refresh
+
+    result = await cohort_retention_refresh.run()
+    result["window_start"], result["watermark"]
+
+    if cohort_retention_refresh.due():
+        await cohort_retention_refresh.run()
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+import asyncio
+import time
+import logging
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.databricks_repo import databricks_repo
+from app.repositories.decoding import as_date
+from app.services.metric_registry import ANALYTICS, SALES_FACT
+
+logger = logging.getLogger(__name__)
+
+RETENTION_TABLE = f"{ANALYTICS}.metric_cohort_retention"
+COHORT_CUSTOMERS = f"{ANALYTICS}.cohort_customers"
+CUSTOMER_MONTHS = f"{ANALYTICS}.cohort_customer_months"
+WATERMARKS = f"{ANALYTICS}.refresh_watermarks"
+
+# Window start of the first run
+_BACKFILL_START = date(1900, 1, 1)
+
+_CREATE_STATE_TABLES = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {COHORT_CUSTOMERS} (
+        customer_id STRING,
+        first_order_date DATE,
+        cohort_month DATE
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {CUSTOMER_MONTHS} (
+        customer_id STRING,
+        order_month DATE,
+        month_revenue DECIMAL(38, 2),
+        last_order_date DATE
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {WATERMARKS} (
+        table_name STRING,
+        watermark DATE,
+        window_start DATE,
+        updated_at TIMESTAMP
+    )
+    """,
+)
+
+_WATERMARK_QUERY = f"""
+SELECT watermark
+FROM {WATERMARKS}
+WHERE table_name = 'metric_cohort_retention'
+"""
+
+# Steps run in order with :window_start bound
+_REFRESH_STEPS = (
+    ("customer_months", f"""
+    INSERT INTO {CUSTOMER_MONTHS}
+    REPLACE WHERE order_month >= :window_start
+    SELECT
+        CAST(customer_id AS STRING) AS customer_id,
+        CAST(DATE_TRUNC('MONTH', order_date) AS DATE) AS order_month,
+        SUM(net_sales) AS month_revenue,
+        MAX(order_date) AS last_order_date
+    FROM {SALES_FACT}
+    WHERE customer_id IS NOT NULL
+      AND order_date >= :window_start
+    GROUP BY 1, 2
+    """),
+    ("cohort_customers", f"""
+    MERGE INTO {COHORT_CUSTOMERS} c
+    USING (
+        SELECT
+            CAST(customer_id AS STRING) AS customer_id,
+            MIN(order_date) AS first_order_date
+        FROM {SALES_FACT}
+        WHERE customer_id IS NOT NULL
+          AND order_date >= :window_start
+        GROUP BY 1
+    ) n
+    ON c.customer_id = n.customer_id
+    WHEN MATCHED AND n.first_order_date < c.first_order_date THEN UPDATE SET
+        c.first_order_date = n.first_order_date,
+        c.cohort_month = CAST(DATE_TRUNC('MONTH', n.first_order_date) AS DATE)
+    WHEN NOT MATCHED THEN INSERT (customer_id, first_order_date, cohort_month) VALUES (
+        n.customer_id,
+        n.first_order_date,
+        CAST(DATE_TRUNC('MONTH', n.first_order_date) AS DATE)
+    )
+    """),
+    ("retention_cells", f"""
+    MERGE INTO {RETENTION_TABLE} t
+    USING (
+        WITH cohort_sizes AS (
+            SELECT cohort_month, COUNT(*) AS cohort_size
+            FROM {COHORT_CUSTOMERS}
+            WHERE cohort_month >= ADD_MONTHS(:window_start, -12)
+            GROUP BY cohort_month
+        ),
+        cells AS (
+            SELECT
+                c.cohort_month,
+                DATEDIFF(MONTH, c.cohort_month, a.order_month) AS months_since_acquisition,
+                COUNT(*) AS active_customers,
+                SUM(a.month_revenue) AS total_revenue
+            FROM {CUSTOMER_MONTHS} a
+            INNER JOIN {COHORT_CUSTOMERS} c ON a.customer_id = c.customer_id
+            WHERE a.order_month >= :window_start
+              AND c.cohort_month >= ADD_MONTHS(:window_start, -12)
+            GROUP BY 1, 2
+        )
+        SELECT
+            cells.cohort_month,
+            cells.months_since_acquisition,
+            cs.cohort_size,
+            cells.active_customers,
+            ROUND((cells.active_customers / cs.cohort_size) * 100, 2) AS retention_rate_pct,
+            cells.total_revenue,
+            ROUND(cells.total_revenue / cells.active_customers, 2) AS avg_revenue_per_customer
+        FROM cells
+        INNER JOIN cohort_sizes cs ON cells.cohort_month = cs.cohort_month
+        WHERE cells.months_since_acquisition <= 12
+          AND cs.cohort_size >= 10
+    ) s
+    ON t.cohort_month = s.cohort_month
+      AND t.months_since_acquisition = s.months_since_acquisition
+    WHEN MATCHED THEN UPDATE SET
+        t.cohort_size = s.cohort_size,
+        t.active_customers = s.active_customers,
+        t.retention_rate_pct = s.retention_rate_pct,
+        t.total_revenue = s.total_revenue,
+        t.avg_revenue_per_customer = s.avg_revenue_per_customer
+    WHEN NOT MATCHED THEN INSERT (
+        cohort_month, months_since_acquisition, cohort_size, active_customers,
+        retention_rate_pct, total_revenue, avg_revenue_per_customer
+    ) VALUES (
+        s.cohort_month, s.months_since_acquisition, s.cohort_size, s.active_customers,
+        s.retention_rate_pct, s.total_revenue, s.avg_revenue_per_customer
+    )
+    WHEN NOT MATCHED BY SOURCE
+      AND ADD_MONTHS(t.cohort_month, t.months_since_acquisition) >= :window_start THEN DELETE
+    """),
+    ("watermark", f"""
+    MERGE INTO {WATERMARKS} w
+    USING (
+        SELECT 'metric_cohort_retention' AS table_name, MAX(last_order_date) AS watermark
+        FROM {CUSTOMER_MONTHS}
+        WHERE order_month >= :window_start
+    ) n
+    ON w.table_name = n.table_name
+    WHEN MATCHED AND n.watermark IS NOT NULL THEN UPDATE SET
+        w.watermark = n.watermark,
+        w.window_start = :window_start,
+        w.updated_at = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED AND n.watermark IS NOT NULL THEN INSERT (table_name, watermark, window_start, updated_at)
+        VALUES (n.table_name, n.watermark, :window_start, CURRENT_TIMESTAMP())
+    """),
+)
+
+
+def window_start_for(watermark: Optional[date], late_arrival_days: int) -> date:
+    """First order date re-processed by a run: start of the month of (watermark - late days)"""
+    if watermark is None:
+        return _BACKFILL_START
+    return (watermark - timedelta(days=late_arrival_days)).replace(day=1)
+
+
+class CohortRetentionRefresh:
+    """
+    Driver for the incremental metric_cohort_retention refresh
+
+    Attributes:
+        late_arrival_days: Days before the watermark that may still receive rows
+        interval: Seconds between runs for due()
+    """
+
+    def __init__(self, late_arrival_days: int, interval: float):
+        self.late_arrival_days = late_arrival_days
+        self.interval = interval
+        self._tables_ready = False
+        self._running: Optional[asyncio.Task] = None
+        self._last_run: Optional[Dict[str, Any]] = None
+        self._last_run_at = 0.0
+        self._last_error: Optional[str] = None
+
+    async def _execute(self, statement: str, params: Optional[Dict[str, Any]], priority: QueryPriority):
+        # Writes and watermark reads must never be answered from the result cache
+        return await databricks_repo.execute_query_columnar_async(statement, params, ttl=0, priority=priority)
+
+    async def _run(self, priority: QueryPriority) -> Dict[str, Any]:
+        started = time.time()
+        if not self._tables_ready:
+            for statement in _CREATE_STATE_TABLES:
+                await self._execute(statement, None, priority)
+            self._tables_ready = True
+
+        result = await self._execute(_WATERMARK_QUERY, None, priority)
+        previous = as_date(result.column("watermark")[0]) if len(result) else None
+        window_start = window_start_for(previous, self.late_arrival_days)
+
+        affected_rows: Dict[str, Any] = {}
+        for step, statement in _REFRESH_STEPS:
+            step_result = await self._execute(statement, {"window_start": window_start}, priority)
+            rows = step_result.to_rows()
+            affected_rows[step] = rows[0].get("num_affected_rows") if rows else None
+
+        result = await self._execute(_WATERMARK_QUERY, None, priority)
+        watermark = as_date(result.column("watermark")[0]) if len(result) else None
+
+        # Cached reads of the retention table are stale now
+        databricks_repo.invalidate_cache("metric_cohort_retention")
+
+        summary = {
+            "window_start": window_start,
+            "previous_watermark": previous,
+            "watermark": watermark,
+            "affected_rows": affected_rows,
+            "elapsed_seconds": round(time.time() - started, 1),
+        }
+        logger.info(
+            f"Refreshed metric_cohort_retention incrementally from {window_start} "
+            f"(watermark {previous} -> {watermark}, {summary['elapsed_seconds']}s)"
+        )
+        return summary
+
+    def _run_done(self, task: asyncio.Task) -> None:
+        self._running = None
+        self._last_run_at = time.time()
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._last_error = str(task.exception())
+            logger.warning(f"Incremental cohort retention refresh failed: {task.exception()}")
+        else:
+            self._last_run = task.result()
+            self._last_error = None
+
+    async def run(self, priority: QueryPriority = QueryPriority.BACKGROUND) -> Dict[str, Any]:
+        """
+        Run the incremental refresh (joining one already in progress)
+
+        Args:
+            priority: Admission class for the refresh statements
+
+        Returns:
+            Dict with window_start, previous_watermark, watermark,
+            affected_rows per step and elapsed_seconds
+        """
+        if self._running is None:
+            self._running = asyncio.get_running_loop().create_task(self._run(priority))
+            self._running.add_done_callback(self._run_done)
+        return await asyncio.shield(self._running)
+
+    def due(self) -> bool:
+        """Whether the last run (successful or not) is older than the interval"""
+        return self._running is None and time.time() - self._last_run_at >= self.interval
+
+    def status(self) -> Dict[str, Any]:
+        """Last run summary, its age and the last error"""
+        return {
+            "last_run": self._last_run,
+            "age_seconds": round(time.time() - self._last_run_at, 1) if self._last_run_at else None,
+            "last_error": self._last_error,
+            "running": self._running is not None,
+        }
+
+
+# Global driver for the metric_cohort_retention table
+cohort_retention_refresh = CohortRetentionRefresh(
+    late_arrival_days=settings.COHORT_RETENTION_LATE_ARRIVAL_DAYS,
+    interval=settings.COHORT_RETENTION_REFRESH_INTERVAL
+)
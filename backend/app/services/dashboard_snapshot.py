@@ -0,0 +1,145 @@
+"""
+Persisted Dashboard Snapshot
+
+Writes the precomputed dashboard metrics and the Explore schema manifest to a
+local gzip-compressed JSON file, and reads them back at startup with their
+original timestamps. A restarted process can then answer the dashboard and
+Explore page from the first request while the background refresher brings
+the values up to date.
+
+Usage:
+    from app.services.dashboard_snapshot import load_snapshot, save_snapshot
+
+    save_snapshot(path, metric_refresher.export(), manifest, manifest_generated_at)
+
+    snapshot = load_snapshot(path, max_age=7 * 24 * 3600)
+    if snapshot:
+        for name, (value, refreshed_at) in snapshot.metrics.items():
+            metric_refresher.store(name, value, refreshed_at)
+"""
+from typing import Any, Dict, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+import gzip
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the file layout changes; snapshots with another version are ignored
+SNAPSHOT_VERSION = 1
+
+
+class DashboardSnapshot:
+    """
+    Contents of a snapshot file
+
+    Attributes:
+        saved_at: Unix time the snapshot was written
+        metrics: Metric name -> (JSON value, unix time it was computed)
+        schema_manifest: Schema manifest as JSON (list of schema assets), if saved
+        schema_manifest_at: Unix time the schema manifest was generated
+    """
+
+    __slots__ = ("saved_at", "metrics", "schema_manifest", "schema_manifest_at")
+
+    def __init__(
+        self,
+        saved_at: float,
+        metrics: Dict[str, Tuple[Any, float]],
+        schema_manifest: Optional[list],
+        schema_manifest_at: float
+    ):
+        self.saved_at = saved_at
+        self.metrics = metrics
+        self.schema_manifest = schema_manifest
+        self.schema_manifest_at = schema_manifest_at
+
+
+def save_snapshot(
+    path: str,
+    metrics: Dict[str, Tuple[Any, float]],
+    schema_manifest: Optional[list] = None,
+    schema_manifest_at: float = 0
+) -> None:
+    """
+    Write a snapshot atomically (temp file + rename)
+
+    Args:
+        path: Snapshot file path; parent directories are created
+        metrics: Metric name -> (value, computed-at unix time); values may be
+                 pydantic models, Decimals, dates, etc.
+        schema_manifest: Optional schema manifest (list of pydantic models)
+        schema_manifest_at: Unix time the schema manifest was generated
+    """
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "metrics": {
+            name: {"refreshed_at": refreshed_at, "value": jsonable_encoder(value)}
+            for name, (value, refreshed_at) in metrics.items()
+        },
+        "schema_manifest": (
+            {"generated_at": schema_manifest_at, "schemas": jsonable_encoder(schema_manifest)}
+            if schema_manifest is not None else None
+        ),
+    }
+    data = gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    logger.debug(f"Saved dashboard snapshot ({len(metrics)} metrics, {len(data)} bytes) to {path}")
+
+
+def load_snapshot(path: str, max_age: float) -> Optional[DashboardSnapshot]:
+    """
+    Read a snapshot, ignoring entries older than max_age
+
+    Args:
+        path: Snapshot file path
+        max_age: Seconds after which a saved value is considered too old to serve
+
+    Returns:
+        DashboardSnapshot, or None if the file is missing, unreadable or from
+        another snapshot version
+    """
+    try:
+        with open(path, "rb") as f:
+            payload = json.loads(gzip.decompress(f.read()))
+    except FileNotFoundError:
+        logger.info(f"No dashboard snapshot at {path}")
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable dashboard snapshot {path}: {e}")
+        return None
+
+    if payload.get("version") != SNAPSHOT_VERSION:
+        logger.info(f"Ignoring dashboard snapshot with version {payload.get('version')}")
+        return None
+
+    oldest = time.time() - max_age
+    metrics = {
+        name: (entry["value"], entry["refreshed_at"])
+        for name, entry in payload.get("metrics", {}).items()
+        if entry["refreshed_at"] >= oldest
+    }
+
+    manifest = payload.get("schema_manifest")
+    if manifest and manifest["generated_at"] < oldest:
+        manifest = None
+
+    logger.info(f"Loaded dashboard snapshot from {path} ({len(metrics)} metrics)")
+    return DashboardSnapshot(
+        saved_at=payload["saved_at"],
+        metrics=metrics,
+        schema_manifest=manifest["schemas"] if manifest else None,
+        schema_manifest_at=manifest["generated_at"] if manifest else 0
+    )
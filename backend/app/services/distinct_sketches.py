@@ -0,0 +1,246 @@
+"""
+Per-Day HyperLogLog Sketches for Distinct Counts
+
+Distinct counts (customers, orders) can't be summed across days, so every
+new date range used to need a rescan of daily_sales_fact. This module keeps
+one HyperLogLog sketch per day for order_id and customer_id: the registers
+are computed in the warehouse by a single statement (xxhash64 of the ID,
+top `precision` bits pick the register, leading zeros of the rest give its
+rank) and stored here as a days x registers uint8 matrix. The distinct
+count over any date range is the element-wise max of its rows (sketch
+union) followed by the standard HLL estimate, with a relative standard
+error of 1.04 / sqrt(2 ** precision).
+
+Usage:
+    from app.services.distinct_sketches import distinct_sketches
+
+    await distinct_sketches.ensure_loaded()
+    customers = distinct_sketches.count("customers", date(2025, 1, 1), date(2025, 3, 31))
+
+    distinct_sketches.relative_error  # e.g. 0.023 for precision 11
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import time
+import logging
+import numpy as np
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.databricks_repo import databricks_repo
+from app.repositories.decoding import as_date
+from app.services.metric_registry import SALES_FACT
+
+logger = logging.getLogger(__name__)
+
+# Sketch kind -> ID column of daily_sales_fact
+SKETCH_COLUMNS = {"orders": "order_id", "customers": "customer_id"}
+
+_SKETCH_QUERY = f"""
+WITH hashed AS (
+    {" UNION ALL ".join(
+        f"SELECT order_date, '{kind}' AS kind, xxhash64(CAST({column} AS STRING)) AS h "
+        f"FROM {SALES_FACT} WHERE order_date >= :start_date AND {column} IS NOT NULL"
+        for kind, column in SKETCH_COLUMNS.items()
+    )}
+),
+registers AS (
+    SELECT
+        order_date,
+        kind,
+        CAST(shiftrightunsigned(h, 64 - :precision) AS INT) AS register,
+        MAX(LEAST(65 - :precision, 65 - LENGTH(BIN(shiftleft(h, :precision))))) AS rank
+    FROM hashed
+    GROUP BY 1, 2, 3
+)
+SELECT order_date, kind, TO_JSON(MAP_FROM_ENTRIES(COLLECT_LIST(STRUCT(register, rank)))) AS registers
+FROM registers
+GROUP BY 1, 2
+"""
+
+
+def estimate(registers: np.ndarray) -> float:
+    """
+    HyperLogLog cardinality estimate of one register array
+
+    Uses linear counting for small cardinalities; no large-range correction
+    is needed with 64-bit hashes.
+    """
+    m = registers.size
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / float(np.sum(np.exp2(-registers.astype(np.float64))))
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros:
+        return m * float(np.log(m / zeros))
+    return raw
+
+
+class _Sketches:
+    """Loaded per-day registers: sorted day ordinals plus one matrix per kind"""
+
+    __slots__ = ("days", "registers", "loaded_at")
+
+    def __init__(self, days: np.ndarray, registers: Dict[str, np.ndarray]):
+        self.days = days
+        self.registers = registers
+        self.loaded_at = time.time()
+
+
+class DistinctSketchStore:
+    """
+    Per-day HLL sketches of daily_sales_fact IDs with range union queries
+
+    Attributes:
+        precision: log2 of the registers per sketch
+        history_days: Days of history loaded
+        late_arrival_days: Trailing days re-fetched on refresh
+        max_age: Seconds after which a read schedules a background refresh
+    """
+
+    def __init__(self, precision: int, history_days: int, late_arrival_days: int, max_age: float):
+        self.precision = precision
+        self.history_days = history_days
+        self.late_arrival_days = late_arrival_days
+        self.max_age = max_age
+        self._sketches: Optional[_Sketches] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    @property
+    def registers_per_sketch(self) -> int:
+        return 1 << self.precision
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of a distinct count estimate"""
+        return round(1.04 / self.registers_per_sketch ** 0.5, 4)
+
+    @property
+    def loaded(self) -> bool:
+        return self._sketches is not None
+
+    def invalidate(self) -> None:
+        """Drop all loaded sketches; reloaded on next use"""
+        self._sketches = None
+
+    async def _load(self, priority: QueryPriority) -> _Sketches:
+        """Fetch sketches for days not loaded yet plus the late-arrival window, and merge them in"""
+        today = datetime.now(timezone.utc).date()
+        current = self._sketches
+        if current is not None and len(current.days):
+            last_day = date.fromordinal(int(current.days[-1]))
+            start = min(last_day, today) - timedelta(days=self.late_arrival_days)
+        else:
+            current = None
+            start = today - timedelta(days=self.history_days)
+
+        # Uncached (ttl=0, also kept out of the last-good store): the register
+        # maps are large as JSON strings and are only needed to build the
+        # uint8 matrix kept here
+        result = await databricks_repo.execute_query_columnar_async(
+            _SKETCH_QUERY,
+            {"start_date": start, "precision": self.precision},
+            ttl=0,
+            priority=priority
+        )
+
+        fetched: Dict[int, Dict[str, np.ndarray]] = {}
+        m = self.registers_per_sketch
+        for day, kind, registers_json in zip(
+            result.column("order_date"), result.column("kind"), result.column("registers")
+        ):
+            registers = np.zeros(m, dtype=np.uint8)
+            entries = json.loads(registers_json)
+            registers[np.fromiter(map(int, entries.keys()), dtype=np.int64, count=len(entries))] = (
+                np.fromiter(entries.values(), dtype=np.uint8, count=len(entries))
+            )
+            fetched.setdefault(as_date(day).toordinal(), {})[kind] = registers
+
+        # Keep loaded days before the re-fetched window, replace the rest
+        kept = np.flatnonzero(current.days < start.toordinal()) if current else np.array([], dtype=np.int64)
+        new_days = np.array(sorted(fetched), dtype=np.int64)
+        days = np.concatenate([current.days[kept], new_days]) if current else new_days
+
+        empty = np.zeros(m, dtype=np.uint8)
+        registers = {}
+        for kind in SKETCH_COLUMNS:
+            new_rows = np.zeros((len(new_days), m), dtype=np.uint8)
+            for i, day in enumerate(new_days):
+                new_rows[i] = fetched[day].get(kind, empty)
+            registers[kind] = np.concatenate([current.registers[kind][kept], new_rows]) if current else new_rows
+
+        self._sketches = _Sketches(days, registers)
+        logger.info(
+            f"Loaded distinct count sketches for {len(new_days)} days from {start} "
+            f"({len(days)} days, {sum(r.nbytes for r in registers.values())} bytes)"
+        )
+        return self._sketches
+
+    def _load_task(self, priority: QueryPriority) -> asyncio.Task:
+        """Return the in-progress load, starting one if needed"""
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().create_task(self._load(priority))
+            self._loading.add_done_callback(self._load_done)
+        return self._loading
+
+    def _load_done(self, task: asyncio.Task) -> None:
+        self._loading = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Loading distinct count sketches failed: {task.exception()}")
+
+    async def refresh(self, priority: QueryPriority = QueryPriority.BACKGROUND) -> None:
+        """Re-fetch the late-arrival window and any new days (everything if not loaded yet)"""
+        await asyncio.shield(self._load_task(priority))
+
+    async def ensure_loaded(self, priority: QueryPriority = QueryPriority.INTERACTIVE) -> None:
+        """Load sketches if needed; schedule a background refresh if they are stale"""
+        if self._sketches is None:
+            await asyncio.shield(self._load_task(priority))
+        elif time.time() - self._sketches.loaded_at > self.max_age:
+            self._load_task(QueryPriority.BACKGROUND)
+
+    def count(self, kind: str, start: date, end: date) -> Optional[int]:
+        """
+        Approximate distinct count of IDs over an inclusive date range
+
+        Args:
+            kind: "orders" or "customers"
+            start: First day of the range
+            end: Last day of the range
+
+        Returns:
+            Estimated distinct count, or None if sketches aren't loaded or the
+            range starts before the loaded history
+        """
+        sketches = self._sketches
+        if sketches is None or not len(sketches.days) or start.toordinal() < sketches.days[0]:
+            return None
+
+        lo = np.searchsorted(sketches.days, start.toordinal(), side="left")
+        hi = np.searchsorted(sketches.days, end.toordinal(), side="right")
+        if lo >= hi:
+            return 0
+        return round(estimate(sketches.registers[kind][lo:hi].max(axis=0)))
+
+    def status(self) -> Dict[str, Any]:
+        """Loaded range, size and expected error"""
+        sketches = self._sketches
+        loaded = sketches is not None and len(sketches.days) > 0
+        return {
+            "precision": self.precision,
+            "relative_error": self.relative_error,
+            "first_day": date.fromordinal(int(sketches.days[0])) if loaded else None,
+            "last_day": date.fromordinal(int(sketches.days[-1])) if loaded else None,
+            "bytes": sum(r.nbytes for r in sketches.registers.values()) if loaded else 0,
+            "age_seconds": round(time.time() - sketches.loaded_at, 1) if sketches else None,
+            "loading": self._loading is not None,
+        }
+
+
+# Global sketch store for daily_sales_fact order and customer IDs
+distinct_sketches = DistinctSketchStore(
+    precision=settings.DISTINCT_SKETCH_PRECISION,
+    history_days=settings.DISTINCT_SKETCH_DAYS,
+    late_arrival_days=settings.DISTINCT_SKETCH_LATE_ARRIVAL_DAYS,
+    max_age=settings.DISTINCT_SKETCH_MAX_AGE
+)
@@ -0,0 +1,297 @@
+"""
+Data Freshness Tracker
+
+Caches in this app expire on timers, which forces a trade-off between
+staleness and warehouse load. The freshness tracker instead polls the Delta
+version of each watched table (DESCRIBE HISTORY ... LIMIT 1, a metadata-only
+statement) every FRESHNESS_POLL_INTERVAL seconds. When a table's version
+moves, only the cached query results that read that table are invalidated
+and the listeners registered for it (in-memory stores, precomputed metrics)
+are run; results derived from unchanged tables are left alone.
+
+Views (including the metric_* views) have no Delta history, so a watched
+view is resolved once through information_schema.views and its base tables
+(fully qualified names after FROM/JOIN, or a metric view's `source:`) are
+polled instead; a change to any of them counts as a change to the view.
+
+The first poll only records versions. A watched name with no pollable base
+table (its definition couldn't be read or parsed, or no base table's
+version can be read) is reported as unwatchable in status() and retried
+after _RETRY_POLLS polls; its results keep relying on their TTL.
+
+Usage:
+    from app.services.freshness import freshness_tracker
+
+    freshness_tracker.watch(SALES_FACT, lambda: distinct_sketches.refresh())
+
+    # In the startup/shutdown events
+    freshness_tracker.start()
+    await freshness_tracker.stop()
+"""
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import re
+import time
+import logging
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.databricks_repo import databricks_repo
+
+logger = logging.getLogger(__name__)
+
+ChangeListener = Callable[[], Awaitable[Any]]
+
+# Polls to wait before re-checking a table whose version couldn't be read
+_RETRY_POLLS = 30
+
+# Views on views are followed this many levels deep
+_MAX_VIEW_DEPTH = 5
+
+_VIEW_QUERY = """
+SELECT view_definition
+FROM system.information_schema.views
+WHERE table_catalog = :catalog AND table_schema = :schema AND table_name = :name
+"""
+
+# Three-part table names read by a view (SQL) or a metric view (YAML source)
+_BASE_TABLE = re.compile(
+    r"(?:\bFROM|\bJOIN|\bsource:)\s+`?(\w+)`?\.`?(\w+)`?\.`?(\w+)`?", re.IGNORECASE
+)
+
+
+class _TableVersion:
+    """Last seen Delta version of a table"""
+
+    __slots__ = ("version", "modified_at", "changed_at")
+
+    def __init__(self, version: int, modified_at: Any, changed_at: Optional[float]):
+        self.version = version
+        self.modified_at = modified_at
+        self.changed_at = changed_at
+
+
+class FreshnessTracker:
+    """
+    Polls Delta table versions and invalidates results derived from changed tables
+
+    Attributes:
+        interval: Seconds between polls
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._listeners: Dict[str, List[ChangeListener]] = {}
+        self._sources: Dict[str, List[str]] = {}
+        self._versions: Dict[str, _TableVersion] = {}
+        self._errors: Dict[str, str] = {}
+        self._retry_at: Dict[str, int] = {}
+        self._resolve_errors: Dict[str, str] = {}
+        self._resolve_retry_at: Dict[str, int] = {}
+        self._polls = 0
+        self._changes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def watch(self, table: str, listener: Optional[ChangeListener] = None) -> None:
+        """
+        Track a table, optionally running a listener when it changes
+
+        Args:
+            table: Fully qualified table or view name, as it appears in cached SQL
+            listener: Coroutine function called (without arguments) after the
+                      table's cached results were invalidated
+        """
+        listeners = self._listeners.setdefault(table, [])
+        if listener is not None:
+            listeners.append(listener)
+
+    async def _version(self, table: str) -> _TableVersion:
+        # Identifiers can't be bound; tables come from watch() calls in code
+        result = await databricks_repo.execute_query_columnar_async(
+            f"DESCRIBE HISTORY {table} LIMIT 1", ttl=0, priority=QueryPriority.BACKGROUND
+        )
+        if not len(result):
+            raise RuntimeError(f"No history for {table}")
+        return _TableVersion(int(result.column("version")[0]), result.column("timestamp")[0], None)
+
+    async def _view_definition(self, table: str) -> Optional[str]:
+        """Definition of a view, or None if the name isn't a view"""
+        parts = table.split(".")
+        if len(parts) != 3:
+            return None
+        catalog, schema, name = (part.strip("`").lower() for part in parts)
+        result = await databricks_repo.execute_query_columnar_async(
+            _VIEW_QUERY,
+            {"catalog": catalog, "schema": schema, "name": name},
+            ttl=0,
+            priority=QueryPriority.BACKGROUND
+        )
+        return result.column("view_definition")[0] if len(result) else None
+
+    async def _resolve(self, table: str, depth: int = 0, seen: Optional[Set[str]] = None) -> List[str]:
+        """
+        Delta tables whose versions stand for a watched name
+
+        Returns:
+            [table] for a table; the base tables of a view (followed through
+            views on views)
+
+        Raises:
+            RuntimeError: A view whose base tables can't be determined
+        """
+        seen = seen if seen is not None else set()
+        definition = await self._view_definition(table)
+        if definition is None:
+            return [table]
+        if depth >= _MAX_VIEW_DEPTH:
+            raise RuntimeError(f"Views nested more than {_MAX_VIEW_DEPTH} deep under {table}")
+
+        bases = []
+        for match in _BASE_TABLE.finditer(definition):
+            base = ".".join(part.lower() for part in match.groups())
+            if base not in seen and base != table.lower():
+                seen.add(base)
+                bases.extend(await self._resolve(base, depth + 1, seen))
+        if not bases:
+            raise RuntimeError(f"No base tables found in the definition of view {table}")
+        return list(dict.fromkeys(bases))
+
+    async def _resolve_pending(self) -> None:
+        """Resolve watched names not resolved yet (and due for a retry)"""
+        pending = [
+            t for t in self._listeners
+            if t not in self._sources and self._resolve_retry_at.get(t, 0) <= self._polls
+        ]
+        resolved = await asyncio.gather(*(self._resolve(t) for t in pending), return_exceptions=True)
+        for table, sources in zip(pending, resolved):
+            if isinstance(sources, Exception):
+                if table not in self._resolve_errors:
+                    logger.warning(f"Can't resolve the tables behind {table}, relying on cache TTLs: {sources}")
+                self._resolve_errors[table] = str(sources)
+                self._resolve_retry_at[table] = self._polls + _RETRY_POLLS
+                continue
+
+            self._resolve_errors.pop(table, None)
+            self._resolve_retry_at.pop(table, None)
+            self._sources[table] = sources
+            if sources != [table]:
+                logger.info(f"Watching {table} through its base tables: {', '.join(sources)}")
+
+    async def _on_change(self, table: str, changed: List[str]) -> None:
+        databricks_repo.invalidate_cache(table)
+        for base in changed:
+            if base != table:
+                databricks_repo.invalidate_cache(base)
+        results = await asyncio.gather(
+            *(listener() for listener in self._listeners[table]), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Change listener for {table} failed: {result}")
+
+    async def poll(self) -> List[str]:
+        """
+        Check every watched table once
+
+        Returns:
+            Watched names (tables or views) whose data changed since the previous poll
+        """
+        self._polls += 1
+        await self._resolve_pending()
+
+        polled = list(dict.fromkeys(base for sources in self._sources.values() for base in sources))
+        tables = [t for t in polled if self._retry_at.get(t, 0) <= self._polls]
+        versions = await asyncio.gather(*(self._version(t) for t in tables), return_exceptions=True)
+
+        changed_bases = set()
+        for table, version in zip(tables, versions):
+            if isinstance(version, Exception):
+                if table not in self._errors:
+                    logger.warning(f"Can't read the Delta version of {table}, relying on cache TTLs: {version}")
+                self._errors[table] = str(version)
+                self._retry_at[table] = self._polls + _RETRY_POLLS
+                continue
+
+            self._errors.pop(table, None)
+            self._retry_at.pop(table, None)
+            previous = self._versions.get(table)
+            if previous is not None and version.version != previous.version:
+                version.changed_at = time.time()
+                changed_bases.add(table)
+            elif previous is not None:
+                version.changed_at = previous.changed_at
+            self._versions[table] = version
+
+        changes = {
+            watched: [base for base in sources if base in changed_bases]
+            for watched, sources in self._sources.items()
+        }
+        changed = [watched for watched, bases in changes.items() if bases]
+        if changed:
+            self._changes += len(changed)
+            logger.info(f"Source tables changed: {', '.join(sorted(changed_bases))}")
+            await asyncio.gather(*(self._on_change(t, changes[t]) for t in changed))
+        return changed
+
+    async def _run(self) -> None:
+        """Poll loop started by start()"""
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Freshness poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start polling on the running event loop"""
+        if self._task is None:
+            logger.info(f"Starting freshness tracker ({len(self._listeners)} tables every {self.interval}s)")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _table_status(self, table: str) -> Dict[str, Any]:
+        version = self._versions.get(table)
+        return {
+            "version": version.version if version else None,
+            "modified_at": version.modified_at if version else None,
+            "changed_at": (
+                datetime.fromtimestamp(version.changed_at, timezone.utc).isoformat()
+                if version and version.changed_at else None
+            ),
+            "error": self._errors.get(table),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Per watched name: the tables polled for it and their versions; names that can't be watched"""
+        tables = {}
+        unwatchable = {}
+        for table in self._listeners:
+            sources = self._sources.get(table)
+            if sources is None:
+                if table in self._resolve_errors:
+                    unwatchable[table] = self._resolve_errors[table]
+                tables[table] = {"sources": {}}
+                continue
+            tables[table] = {"sources": {base: self._table_status(base) for base in sources}}
+            if all(base in self._errors for base in sources):
+                unwatchable[table] = "; ".join(self._errors[base] for base in sources)
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "polls": self._polls,
+            "changes": self._changes,
+            "tables": tables,
+            "unwatchable": unwatchable,
+        }
+
+
+# Global tracker; tables and listeners are registered by the metrics routes
+freshness_tracker = FreshnessTracker(interval=settings.FRESHNESS_POLL_INTERVAL)
@@ -0,0 +1,200 @@
+"""
+Background Metric Refresher
+
+Precomputes dashboard metrics for their default parameters on a fixed
+interval and serves them stale-while-revalidate: a request is answered from
+the last successfully computed value in memory, and if that value is older
+than the refresh interval a background refresh is kicked off without making
+the request wait. A failed refresh keeps the previous value, so the last
+real numbers keep being served while the warehouse is slow or unavailable.
+
+Refreshes run at QueryPriority.BACKGROUND, so they never hold warehouse
+slots that interactive requests are waiting for.
+
+Usage:
+    from app.services.metric_refresher import metric_refresher
+
+    # Register a producer (called with the admission priority to use)
+    metric_refresher.register("cac_by_channel", lambda priority: load_cac(priority))
+
+    # In the startup/shutdown events
+    metric_refresher.start()
+    await metric_refresher.stop()
+
+    # In a route, for default parameters
+    precomputed = metric_refresher.get("cac_by_channel")
+    if precomputed is not None:
+        return precomputed
+"""
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+import logging
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+
+logger = logging.getLogger(__name__)
+
+Producer = Callable[[QueryPriority], Awaitable[Any]]
+
+
+class _Snapshot:
+    """Last successfully computed value of one metric"""
+
+    __slots__ = ("value", "refreshed_at")
+
+    def __init__(self, value: Any, refreshed_at: float):
+        self.value = value
+        self.refreshed_at = refreshed_at
+
+
+class MetricRefresher:
+    """
+    Periodic precomputation of registered metrics with stale-while-revalidate reads
+
+    Attributes:
+        interval: Seconds between refresh passes; values older than this
+                  trigger a background refresh when read
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._producers: Dict[str, Producer] = {}
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._errors: Dict[str, str] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    def register(self, name: str, producer: Producer) -> None:
+        """Register a metric producer, called as producer(priority)"""
+        self._producers[name] = producer
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Return the last computed value of a metric without waiting
+
+        Schedules a background refresh if the value is older than the
+        refresh interval.
+
+        Returns:
+            The last value, or None if it has never been computed
+        """
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            return None
+
+        if time.time() - snapshot.refreshed_at > self.interval:
+            try:
+                self._refresh_task(name)
+            except RuntimeError:
+                # No running event loop (e.g. called from a worker thread)
+                pass
+
+        return snapshot.value
+
+    def store(self, name: str, value: Any, refreshed_at: Optional[float] = None) -> None:
+        """Record a computed value (refreshed_at defaults to now)"""
+        self._snapshots[name] = _Snapshot(value, refreshed_at or time.time())
+
+    def export(self) -> Dict[str, Tuple[Any, float]]:
+        """Return every computed value with its refresh time (unix seconds)"""
+        return {name: (s.value, s.refreshed_at) for name, s in self._snapshots.items()}
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call listener() on a worker thread after each refresh pass (e.g. to persist values)"""
+        self._listeners.append(listener)
+
+    def _refresh_task(self, name: str) -> asyncio.Task:
+        """Return the in-progress refresh of a metric, starting one if needed"""
+        task = self._refreshing.get(name)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._refresh(name))
+            self._refreshing[name] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(name, None))
+        return task
+
+    async def _refresh(self, name: str) -> bool:
+        """Recompute one metric, keeping the previous value on failure"""
+        try:
+            value = await self._producers[name](QueryPriority.BACKGROUND)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Background refresh of {name} failed, serving last value: {e}")
+            self._errors[name] = str(e)
+            return False
+
+        if value is not None:
+            self.store(name, value)
+        self._errors.pop(name, None)
+        return True
+
+    async def refresh(self, name: str) -> bool:
+        """Recompute one metric now; returns whether it succeeded"""
+        return await self._refresh_task(name)
+
+    async def refresh_all(self) -> int:
+        """Recompute every registered metric concurrently; returns the number that succeeded"""
+        results = await asyncio.gather(*(self._refresh_task(name) for name in list(self._producers)))
+        return sum(results)
+
+    async def _run(self) -> None:
+        """Refresh loop started by start()"""
+        while True:
+            started = time.monotonic()
+            refreshed = await self.refresh_all()
+            logger.info(
+                f"Refreshed {refreshed}/{len(self._producers)} dashboard metrics "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+
+            for listener in self._listeners:
+                try:
+                    await asyncio.to_thread(listener)
+                except Exception as e:
+                    logger.warning(f"Metric refresh listener failed: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background refresh loop on the running event loop"""
+        if self._task is None:
+            logger.info(f"Starting metric refresher ({len(self._producers)} metrics every {self.interval}s)")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the refresh loop and any in-progress refreshes"""
+        tasks = list(self._refreshing.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        """Return per-metric refresh timestamps, ages and last errors"""
+        now = time.time()
+        metrics = {}
+        for name in self._producers:
+            snapshot = self._snapshots.get(name)
+            metrics[name] = {
+                "refreshed_at": (
+                    datetime.fromtimestamp(snapshot.refreshed_at, timezone.utc).isoformat() if snapshot else None
+                ),
+                "age_seconds": round(now - snapshot.refreshed_at, 1) if snapshot else None,
+                "refreshing": name in self._refreshing,
+                "error": self._errors.get(name),
+            }
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "metrics": metrics,
+        }
+
+
+# Global refresher instance; producers are registered by the metrics routes
+metric_refresher = MetricRefresher(interval=settings.METRIC_REFRESH_INTERVAL)
@@ -0,0 +1,393 @@
+"""
+Declarative Metric Registry
+
+Each dashboard metric is declared once — source table, dimensions, measures,
+filters, ordering and cache TTL — and compiled to parameterized SQL here
+instead of being hand-written in every route. Because every metric goes
+through the same compile/fetch path, result caching, parameter binding,
+admission priority and precomputation apply uniformly, and a newly
+registered metric gets them without any route-specific code.
+
+Usage:
+    from app.services.metric_registry import metric_registry
+
+    rows = await metric_registry.fetch("gmv_trend", start_date="2024-01-01")
+
+    # Concurrent fetches for other years share one statement (batchable filter)
+    rows = await metric_registry.fetch("arpu_by_segment", year=2024)
+
+    sql, params = metric_registry.compile("arpu_by_segment", year=2024)
+
+    metric_registry.register(MetricDefinition(
+        name="orders_by_store",
+        source="main.dominos_realistic.daily_sales_fact",
+        dimensions=[Field(name="store_id")],
+        measures=[Field(name="orders", expr="COUNT(DISTINCT order_id)")],
+        aggregated=True,
+    ))
+"""
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field as PydanticField
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.batching import BATCH_PREDICATE
+from app.repositories.databricks_repo import databricks_repo
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Definition Models
+# ============================================================================
+
+class Field(BaseModel):
+    """A selected column: output name plus optional SQL expression"""
+    name: str
+    expr: Optional[str] = None
+    hidden: bool = PydanticField(default=False, description="Group/order by it without selecting it")
+
+    @property
+    def sql(self) -> str:
+        """SQL expression producing this field"""
+        return self.expr or self.name
+
+    def select_sql(self) -> str:
+        """SELECT list entry for this field"""
+        return f"{self.expr} AS {self.name}" if self.expr else self.name
+
+
+class MetricFilter(BaseModel):
+    """
+    Optional predicate bound to a named parameter
+
+    The filter applies when a value is passed for `name` (or `default` is
+    set); the value is always bound server-side as :name. Concurrent fetches
+    differing only in the value of a batchable equality filter on an output
+    column are merged into one `column IN (...)` statement.
+    """
+    name: str
+    column: str
+    op: Literal["=", "!=", ">", ">=", "<", "<="] = "="
+    value_sql: str = PydanticField(default=":{name}", description="Right-hand side template")
+    default: Optional[Any] = None
+    batchable: bool = PydanticField(default=False, description="Batch concurrent fetches across values")
+
+    def predicate(self) -> str:
+        """WHERE clause fragment for this filter"""
+        return f"{self.column} {self.op} {self.value_sql.format(name=self.name)}"
+
+
+class MetricDefinition(BaseModel):
+    """
+    Declarative description of one metric
+
+    Attributes:
+        name: Registry key (also used in cache stats and the dashboard bundle)
+        source: Fully qualified source table or view
+        dimensions: Fields the metric is broken down by
+        measures: Value fields; aggregate expressions when aggregated=True
+        filters: Optional parameterized predicates
+        order_by: ORDER BY expressions
+        aggregated: GROUP BY the dimensions (False for pre-aggregated views)
+        ttl: Result cache TTL in seconds
+    """
+    name: str
+    description: str = ""
+    source: str
+    dimensions: List[Field] = []
+    measures: List[Field]
+    filters: List[MetricFilter] = []
+    order_by: List[str] = []
+    aggregated: bool = False
+    ttl: int = settings.METRIC_VIEW_CACHE_TTL
+
+    def batch_filter(self, values: Dict[str, Any]) -> Optional[MetricFilter]:
+        """The batchable filter a fetch with these values can be batched on, if any"""
+        outputs = {f.name for f in self.dimensions if not f.hidden} | {f.name for f in self.measures}
+        for metric_filter in self.filters:
+            if (
+                metric_filter.batchable
+                and metric_filter.op == "="
+                and metric_filter.value_sql == ":{name}"
+                and metric_filter.column in outputs
+                and values.get(metric_filter.name) is not None
+            ):
+                return metric_filter
+        return None
+
+    def compile(
+        self,
+        values: Optional[Dict[str, Any]] = None,
+        batch_filter: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Compile the metric to SQL for the given filter values
+
+        Args:
+            values: Filter values keyed by filter name; None values are ignored
+            batch_filter: Filter left as the BATCH_PREDICATE placeholder (its
+                          value is not bound) for execute_query_batched_async
+
+        Returns:
+            Tuple of (SQL, bound parameters)
+
+        Raises:
+            ValueError: A value was passed for a filter the metric doesn't declare
+        """
+        values = {k: v for k, v in (values or {}).items() if v is not None}
+        known = {f.name for f in self.filters}
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"Metric '{self.name}' has no filter(s) {sorted(unknown)}")
+
+        select = [f.select_sql() for f in self.dimensions if not f.hidden]
+        select += [f.select_sql() for f in self.measures]
+        parts = ["SELECT\n    " + ",\n    ".join(select), f"FROM {self.source}"]
+
+        params = {}
+        predicates = []
+        for metric_filter in self.filters:
+            value = values.get(metric_filter.name, metric_filter.default)
+            if value is None:
+                continue
+            if metric_filter.name == batch_filter:
+                predicates.append(BATCH_PREDICATE)
+                continue
+            predicates.append(metric_filter.predicate())
+            params[metric_filter.name] = value
+
+        if predicates:
+            parts.append("WHERE " + " AND ".join(predicates))
+
+        if self.aggregated and self.dimensions:
+            parts.append("GROUP BY " + ", ".join(f.sql for f in self.dimensions))
+
+        if self.order_by:
+            parts.append("ORDER BY " + ", ".join(self.order_by))
+
+        return "\n".join(parts), params
+
+
+# ============================================================================
+# Registry
+# ============================================================================
+
+class MetricRegistry:
+    """Named metric definitions plus the shared engine that runs them"""
+
+    def __init__(self):
+        self._metrics: Dict[str, MetricDefinition] = {}
+
+    def register(self, metric: MetricDefinition) -> MetricDefinition:
+        """Add (or replace) a metric definition"""
+        if metric.name in self._metrics:
+            logger.info(f"Replacing metric definition '{metric.name}'")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> MetricDefinition:
+        """Look up a metric by name (KeyError if unknown)"""
+        try:
+            return self._metrics[name]
+        except KeyError:
+            raise KeyError(f"Unknown metric '{name}'") from None
+
+    def definitions(self) -> List[MetricDefinition]:
+        """All registered metrics in registration order"""
+        return list(self._metrics.values())
+
+    def compile(self, name: str, **filters) -> Tuple[str, Dict[str, Any]]:
+        """Compile a metric to (SQL, parameters) for the given filter values"""
+        return self.get(name).compile(filters)
+
+    async def fetch(
+        self,
+        name: str,
+        priority: QueryPriority = QueryPriority.INTERACTIVE,
+        ttl: Optional[int] = None,
+        **filters
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a metric and return its rows
+
+        Goes through the repository's result cache (with the metric's TTL),
+        single-flight coalescing and admission control. Fetches with a value
+        for a batchable filter are batched with concurrent ones.
+
+        Args:
+            name: Registered metric name
+            priority: Admission class for the statement
+            ttl: Cache TTL in seconds (defaults to the metric's; 0 bypasses the cache)
+            **filters: Filter values (None values are ignored)
+
+        Returns:
+            List of row dictionaries
+        """
+        metric = self.get(name)
+        ttl = metric.ttl if ttl is None else ttl
+        batch_filter = metric.batch_filter(filters)
+        if batch_filter is not None:
+            template, params = metric.compile(filters, batch_filter=batch_filter.name)
+            return await databricks_repo.execute_query_batched_async(
+                template, batch_filter.column, filters[batch_filter.name], params, ttl=ttl, priority=priority
+            )
+
+        query, params = metric.compile(filters)
+        return await databricks_repo.execute_query_async(query, params, ttl=ttl, priority=priority)
+
+
+# ============================================================================
+# Dashboard Metrics
+# ============================================================================
+
+SALES_FACT = "main.dominos_realistic.daily_sales_fact"
+ANALYTICS = "main.dominos_analytics"
+
+
+def _days_back(default: Optional[int] = None) -> MetricFilter:
+    """Rolling order_date window, as days back from today"""
+    return MetricFilter(
+        name="days", column="order_date", op=">=",
+        value_sql="DATE_SUB(CURRENT_DATE(), :{name})", default=default
+    )
+
+
+def _month_range() -> List[MetricFilter]:
+    """Inclusive start_date/end_date bounds on a metric view's month column"""
+    return [
+        MetricFilter(name="start_date", column="month", op=">="),
+        MetricFilter(name="end_date", column="month", op="<="),
+    ]
+
+
+_BUILTIN_METRICS = [
+    # Note: net_revenue is revenue after discounts; AOV = total revenue / total
+    # orders (not the average of order totals)
+    MetricDefinition(
+        name="summary",
+        description="Revenue, orders and AOV over the last 180 days",
+        source=SALES_FACT,
+        measures=[
+            Field(name="total_revenue", expr="SUM(net_revenue)"),
+            Field(name="total_orders", expr="COUNT(DISTINCT order_id)"),
+            Field(name="avg_order_value", expr="SUM(net_revenue) / COUNT(DISTINCT order_id)"),
+        ],
+        filters=[_days_back(180)],
+        aggregated=True,
+        ttl=settings.SALES_FACT_CACHE_TTL,
+    ),
+    MetricDefinition(
+        name="revenue_trend",
+        description="Monthly revenue and orders",
+        source=SALES_FACT,
+        dimensions=[
+            Field(name="month_start", expr="DATE_TRUNC('MONTH', order_date)", hidden=True),
+            Field(name="month", expr="DATE_FORMAT(order_date, 'MMM yyyy')"),
+        ],
+        measures=[
+            Field(name="revenue", expr="SUM(net_revenue)"),
+            Field(name="orders", expr="COUNT(DISTINCT order_id)"),
+        ],
+        filters=[_days_back(180)],
+        order_by=["DATE_TRUNC('MONTH', order_date) ASC"],
+        aggregated=True,
+        ttl=settings.SALES_FACT_CACHE_TTL,
+    ),
+    MetricDefinition(
+        name="channel_breakdown",
+        description="Revenue by order channel over the last 30 days",
+        source=SALES_FACT,
+        dimensions=[Field(name="channel")],
+        measures=[Field(name="revenue", expr="SUM(net_revenue)")],
+        filters=[_days_back(30)],
+        order_by=["revenue DESC"],
+        aggregated=True,
+        ttl=settings.SALES_FACT_CACHE_TTL,
+    ),
+    MetricDefinition(
+        name="hourly_heatmap",
+        description="Orders by day of week (0 = Monday) and hour of day over the last 30 days",
+        source=SALES_FACT,
+        dimensions=[
+            Field(name="day_index", expr=f"WEEKDAY({settings.ORDER_TIMESTAMP_COLUMN})"),
+            Field(name="hour", expr=f"HOUR({settings.ORDER_TIMESTAMP_COLUMN})"),
+        ],
+        measures=[Field(name="orders", expr="COUNT(DISTINCT order_id)")],
+        filters=[_days_back(30)],
+        aggregated=True,
+        ttl=settings.SALES_FACT_CACHE_TTL,
+    ),
+    MetricDefinition(
+        name="cac_by_channel",
+        description="Customer acquisition cost by marketing channel",
+        source=f"{ANALYTICS}.metric_cac_by_channel",
+        dimensions=[Field(name="channel")],
+        measures=[Field(name=n) for n in ("total_spend", "new_customers", "cac", "cac_grade")],
+        order_by=["cac ASC"],
+    ),
+    MetricDefinition(
+        name="arpu_by_segment",
+        description="Average revenue per user by customer segment and year",
+        source=f"{ANALYTICS}.metric_arpu_by_segment",
+        dimensions=[Field(name="customer_segment"), Field(name="order_year")],
+        measures=[Field(name=n) for n in ("arpu", "customer_count", "total_revenue", "avg_orders_per_customer")],
+        filters=[MetricFilter(name="year", column="order_year", batchable=True)],
+        order_by=["arpu DESC"],
+    ),
+    MetricDefinition(
+        name="cohort_retention",
+        description="Retention curves by acquisition cohort",
+        source=f"{ANALYTICS}.metric_cohort_retention",
+        dimensions=[Field(name="cohort_month"), Field(name="months_since_acquisition")],
+        measures=[
+            Field(name=n) for n in (
+                "cohort_size", "active_customers", "retention_rate_pct", "total_revenue", "avg_revenue_per_customer"
+            )
+        ],
+        filters=[MetricFilter(name="cohort_month", column="cohort_month")],
+        order_by=["cohort_month DESC", "months_since_acquisition ASC"],
+    ),
+    MetricDefinition(
+        name="gmv_trend",
+        description="Monthly gross merchandise value, discounts and net revenue",
+        source=f"{ANALYTICS}.metric_gmv",
+        dimensions=[Field(name="month")],
+        measures=[
+            Field(name=n) for n in (
+                "gmv", "net_revenue", "total_discounts", "discount_rate_pct", "order_count", "customer_count"
+            )
+        ],
+        filters=_month_range(),
+        order_by=["month ASC"],
+    ),
+    MetricDefinition(
+        name="channel_mix",
+        description="Monthly order and revenue share by channel",
+        source=f"{ANALYTICS}.metric_channel_mix",
+        dimensions=[Field(name="month"), Field(name="channel")],
+        measures=[Field(name=n) for n in ("order_count", "revenue", "pct_of_orders", "pct_of_revenue")],
+        filters=_month_range(),
+        order_by=["month DESC", "pct_of_revenue DESC"],
+    ),
+    MetricDefinition(
+        name="attach_rate",
+        description="Monthly upsell attach rates by customer segment",
+        source=f"{ANALYTICS}.metric_attach_rate",
+        dimensions=[Field(name="month"), Field(name="customer_segment")],
+        measures=[
+            Field(name=n) for n in (
+                "total_orders", "sides_attach_rate_pct", "dessert_attach_rate_pct",
+                "beverage_attach_rate_pct", "any_addon_rate_pct"
+            )
+        ],
+        filters=[MetricFilter(name="segment", column="customer_segment", batchable=True), *_month_range()],
+        order_by=["month DESC", "customer_segment"],
+    ),
+]
+
+
+# Global registry instance with the built-in dashboard metrics
+metric_registry = MetricRegistry()
+for _metric in _BUILTIN_METRICS:
+    metric_registry.register(_metric)
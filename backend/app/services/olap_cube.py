@@ -0,0 +1,396 @@
+"""
+In-Memory OLAP Cubes
+
+The channel mix, attach rate and ARPU views are small dimensional tables
+(month x channel, month x segment, segment x year) that used to be re-queried
+for every filter combination. Each is loaded once per refresh into an
+OlapCube: dimensions dictionary-encoded as integer arrays, measures as
+float64 arrays. Filters (dice/slice) are vectorized masks and rollups are
+bincount reductions over the kept dimensions, so any combination is served
+from memory in microseconds.
+
+Measures declare how they aggregate: sums, weighted means (rates weighted
+by an order/customer count) and shares (percent of the total across one
+dimension). A measure that can't be combined across some dimension (e.g.
+customer counts across years) is None on rows that collapse several of its
+values.
+
+Usage:
+    from app.services.olap_cube import olap_cubes
+
+    cube = await olap_cubes.get("channel_mix")
+    cube.slice("channel", "Mobile App").rollup(["month"])
+    cube.dice(month=["2025-01-01", "2025-02-01"]).rollup(["channel"])
+
+    arpu = await olap_cubes.get("arpu_by_segment")
+    arpu.dice(order_year=2024).rollup(["customer_segment", "order_year"])
+"""
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+from pydantic import BaseModel
+import asyncio
+import time
+import logging
+import numpy as np
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.services.metric_registry import metric_registry
+from app.services.partial_aggregates import sort_rows
+
+logger = logging.getLogger(__name__)
+
+
+class CubeMeasure(BaseModel):
+    """
+    How one measure aggregates on rollup
+
+    Attributes:
+        name: Column name in the source view
+        agg: sum, weighted_mean (by `weight`) or share (percent of the total
+             of measure `of` across dimension `across`)
+        weight: Weight measure for weighted_mean
+        of: Summed measure a share is computed from
+        across: Dimension a share is a percentage across
+        combinable_over: Dimensions the measure may be aggregated across
+                         (None = all)
+    """
+    name: str
+    agg: Literal["sum", "weighted_mean", "share"] = "sum"
+    weight: Optional[str] = None
+    of: Optional[str] = None
+    across: Optional[str] = None
+    combinable_over: Optional[List[str]] = None
+
+
+class CubeSpec(BaseModel):
+    """A cube built from a registered metric view"""
+    name: str
+    metric: str
+    dimensions: List[str]
+    measures: List[CubeMeasure]
+    order_by: List[Tuple[str, bool]] = []
+
+
+class OlapCube:
+    """
+    Dictionary-encoded dimensions plus measure arrays for one metric view
+
+    Cubes are immutable: dice() and slice() return new cubes sharing the
+    dimension dictionaries.
+    """
+
+    __slots__ = ("spec", "labels", "codes", "values", "built_at")
+
+    def __init__(
+        self,
+        spec: CubeSpec,
+        labels: Dict[str, list],
+        codes: Dict[str, np.ndarray],
+        values: Dict[str, np.ndarray],
+        built_at: float
+    ):
+        self.spec = spec
+        self.labels = labels
+        self.codes = codes
+        self.values = values
+        self.built_at = built_at
+
+    @classmethod
+    def from_rows(cls, spec: CubeSpec, rows: List[Dict[str, Any]]) -> "OlapCube":
+        """Encode the rows of the cube's metric view"""
+        labels = {}
+        codes = {}
+        for dim in spec.dimensions:
+            column = [row.get(dim) for row in rows]
+            labels[dim] = sorted(set(column), key=lambda v: (v is None, v))
+            index = {label: i for i, label in enumerate(labels[dim])}
+            codes[dim] = np.fromiter((index[v] for v in column), dtype=np.int64, count=len(column))
+
+        values = {
+            m.name: np.array([np.nan if row.get(m.name) is None else float(row[m.name]) for row in rows], dtype=np.float64)
+            for m in spec.measures
+        }
+        return cls(spec, labels, codes, values, time.time())
+
+    def __len__(self) -> int:
+        return len(next(iter(self.values.values()))) if self.values else 0
+
+    def _code(self, dim: str, value: Any) -> Optional[int]:
+        """
+        Dictionary code of a label
+
+        Values also match labels with the same str() form, so filters match
+        whether the view's columns were decoded to their types or left as
+        strings (QUERY_TYPED_DECODING off), e.g. order_year=2024 and "2024".
+        """
+        labels = self.labels[dim]
+        if value in labels:
+            return labels.index(value)
+        text = str(value)
+        for i, label in enumerate(labels):
+            if label is not None and str(label) == text:
+                return i
+        return None
+
+    def dice(self, **filters: Any) -> "OlapCube":
+        """
+        Keep cells whose dimensions match the given values
+
+        Args:
+            **filters: Dimension -> value or list of values (None is ignored)
+
+        Raises:
+            KeyError: Unknown dimension
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for dim, wanted in filters.items():
+            if wanted is None:
+                continue
+            if dim not in self.codes:
+                raise KeyError(f"Cube '{self.spec.name}' has no dimension '{dim}'")
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            wanted_codes = [code for code in (self._code(dim, v) for v in values) if code is not None]
+            mask &= np.isin(self.codes[dim], wanted_codes)
+
+        return OlapCube(
+            self.spec,
+            self.labels,
+            {dim: codes[mask] for dim, codes in self.codes.items()},
+            {name: values[mask] for name, values in self.values.items()},
+            self.built_at
+        )
+
+    def slice(self, dim: str, value: Any) -> "OlapCube":
+        """Keep the cells with one value of a dimension"""
+        return self.dice(**{dim: value})
+
+    def rollup(self, by: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Aggregate the cube to the given dimensions
+
+        Args:
+            by: Dimensions kept in the result (all of them for cell rows)
+
+        Returns:
+            One row per distinct combination of `by`, with the dimensions and
+            every measure, in the spec's order
+        """
+        by = list(by)
+        for dim in by:
+            if dim not in self.codes:
+                raise KeyError(f"Cube '{self.spec.name}' has no dimension '{dim}'")
+
+        n = len(self)
+        if by:
+            shape = tuple(len(self.labels[dim]) for dim in by)
+            flat = np.ravel_multi_index(tuple(self.codes[dim] for dim in by), shape)
+        else:
+            flat = np.zeros(n, dtype=np.int64)
+        keys, inverse = np.unique(flat, return_inverse=True)
+        k = len(keys)
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return np.bincount(inverse, weights=np.nan_to_num(values), minlength=k)
+
+        results: Dict[str, np.ndarray] = {}
+        for measure in self.spec.measures:
+            if measure.agg == "sum":
+                results[measure.name] = total(self.values[measure.name])
+            elif measure.agg == "weighted_mean":
+                weight = self.values[measure.weight]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    weights = total(weight)
+                    results[measure.name] = np.where(
+                        weights != 0, total(self.values[measure.name] * weight) / weights, np.nan
+                    )
+            elif measure.across in by:
+                # Percent of the total over the `across` dimension, per remaining dims
+                part = total(self.values[measure.of])
+                others = [dim for dim in by if dim != measure.across]
+                if others:
+                    other_shape = tuple(len(self.labels[dim]) for dim in others)
+                    unraveled = np.unravel_index(keys, tuple(len(self.labels[dim]) for dim in by))
+                    group = np.ravel_multi_index(tuple(unraveled[by.index(dim)] for dim in others), other_shape)
+                    _, group_of_key = np.unique(group, return_inverse=True)
+                else:
+                    group_of_key = np.zeros(k, dtype=np.int64)
+                totals = np.bincount(group_of_key, weights=part)[group_of_key]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    results[measure.name] = np.where(totals != 0, part / totals * 100, np.nan)
+            else:
+                results[measure.name] = np.full(k, 100.0)
+
+            if measure.combinable_over is not None:
+                self._mask_collapsed(measure, by, inverse, k, results[measure.name])
+
+        rows = []
+        unraveled = np.unravel_index(keys, shape) if by else ()
+        for i in range(k):
+            row = {dim: self.labels[dim][int(unraveled[j][i])] for j, dim in enumerate(by)}
+            for measure in self.spec.measures:
+                value = results[measure.name][i]
+                if np.isnan(value):
+                    row[measure.name] = None
+                elif measure.agg == "sum" and float(value).is_integer():
+                    row[measure.name] = int(value)
+                else:
+                    row[measure.name] = round(float(value), 2)
+            rows.append(row)
+
+        return sort_rows(rows, [(col, desc) for col, desc in self.spec.order_by if col in by or col in results])
+
+    def _mask_collapsed(
+        self,
+        measure: CubeMeasure,
+        by: List[str],
+        inverse: np.ndarray,
+        k: int,
+        result: np.ndarray
+    ) -> None:
+        """Set result to NaN where several values of a non-combinable dimension were merged"""
+        for dim in self.spec.dimensions:
+            if dim in by or dim in measure.combinable_over:
+                continue
+            size = len(self.labels[dim])
+            pairs = np.unique(inverse * size + self.codes[dim])
+            distinct = np.bincount(pairs // size, minlength=k)
+            result[distinct > 1] = np.nan
+
+
+class OlapCubeStore:
+    """
+    Cubes rebuilt from their metric views on refresh
+
+    Attributes:
+        max_age: Seconds after which a read schedules a background rebuild
+    """
+
+    def __init__(self, specs: List[CubeSpec], max_age: float):
+        self.max_age = max_age
+        self._specs = {spec.name: spec for spec in specs}
+        self._cubes: Dict[str, OlapCube] = {}
+        self._building: Dict[str, asyncio.Task] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def specs(self) -> List[CubeSpec]:
+        """All cube specs"""
+        return list(self._specs.values())
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop built cubes (all if no name given); rebuilt on next use"""
+        for cube_name in [name] if name else list(self._cubes):
+            self._cubes.pop(cube_name, None)
+
+    async def _build(self, name: str, priority: QueryPriority) -> OlapCube:
+        spec = self._specs[name]
+        rows = await metric_registry.fetch(spec.metric, priority=priority)
+        cube = OlapCube.from_rows(spec, rows)
+        self._cubes[name] = cube
+        logger.info(
+            f"Built {name} cube: {len(cube)} cells, "
+            + ", ".join(f"{dim}={len(labels)}" for dim, labels in cube.labels.items())
+        )
+        return cube
+
+    def _build_task(self, name: str, priority: QueryPriority) -> asyncio.Task:
+        """Return the in-progress build of a cube, starting one if needed"""
+        task = self._building.get(name)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._build(name, priority))
+            self._building[name] = task
+            task.add_done_callback(lambda t: self._build_done(name, t))
+        return task
+
+    def _build_done(self, name: str, task: asyncio.Task) -> None:
+        self._building.pop(name, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Building {name} cube failed: {task.exception()}")
+
+    async def refresh(self, name: str, priority: QueryPriority = QueryPriority.BACKGROUND) -> OlapCube:
+        """Rebuild a cube from its metric view"""
+        return await asyncio.shield(self._build_task(name, priority))
+
+    async def get(self, name: str, priority: QueryPriority = QueryPriority.INTERACTIVE) -> OlapCube:
+        """
+        Return a built cube, building it if needed
+
+        A cube older than max_age is returned as is and rebuilt in the
+        background.
+
+        Raises:
+            KeyError: Unknown cube
+        """
+        if name not in self._specs:
+            raise KeyError(f"Unknown cube '{name}'")
+
+        cube = self._cubes.get(name)
+        if cube is None:
+            return await asyncio.shield(self._build_task(name, priority))
+
+        if time.time() - cube.built_at > self.max_age:
+            self._build_task(name, QueryPriority.BACKGROUND)
+        return cube
+
+    def status(self) -> Dict[str, Any]:
+        """Cells, dimension sizes and age per built cube"""
+        now = time.time()
+        return {
+            name: {
+                "cells": len(cube),
+                "dimensions": {dim: len(labels) for dim, labels in cube.labels.items()},
+                "age_seconds": round(now - cube.built_at, 1),
+                "building": name in self._building,
+            }
+            for name, cube in self._cubes.items()
+        }
+
+
+_RATE_COLUMNS = ("sides_attach_rate_pct", "dessert_attach_rate_pct", "beverage_attach_rate_pct", "any_addon_rate_pct")
+
+_CUBES = [
+    CubeSpec(
+        name="channel_mix",
+        metric="channel_mix",
+        dimensions=["month", "channel"],
+        measures=[
+            CubeMeasure(name="order_count"),
+            CubeMeasure(name="revenue"),
+            CubeMeasure(name="pct_of_orders", agg="share", of="order_count", across="channel"),
+            CubeMeasure(name="pct_of_revenue", agg="share", of="revenue", across="channel"),
+        ],
+        order_by=[("month", True), ("pct_of_revenue", True)],
+    ),
+    CubeSpec(
+        name="attach_rate",
+        metric="attach_rate",
+        dimensions=["month", "customer_segment"],
+        measures=[
+            CubeMeasure(name="total_orders"),
+            *(CubeMeasure(name=rate, agg="weighted_mean", weight="total_orders") for rate in _RATE_COLUMNS),
+        ],
+        order_by=[("month", True), ("customer_segment", False)],
+    ),
+    CubeSpec(
+        name="arpu_by_segment",
+        metric="arpu_by_segment",
+        dimensions=["customer_segment", "order_year"],
+        measures=[
+            # Segments are disjoint within a year, but customers repeat across years
+            CubeMeasure(
+                name="arpu", agg="weighted_mean", weight="customer_count", combinable_over=["customer_segment"]
+            ),
+            CubeMeasure(name="customer_count", combinable_over=["customer_segment"]),
+            CubeMeasure(name="total_revenue"),
+            CubeMeasure(
+                name="avg_orders_per_customer", agg="weighted_mean", weight="customer_count",
+                combinable_over=["customer_segment"]
+            ),
+        ],
+        order_by=[("arpu", True)],
+    ),
+]
+
+
+# Global cube store for the small dimensional dashboard views
+olap_cubes = OlapCubeStore(_CUBES, max_age=settings.OLAP_CUBE_MAX_AGE)
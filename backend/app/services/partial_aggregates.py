@@ -0,0 +1,374 @@
+"""
+In-Process Partial Aggregate Store
+
+The GMV trend, channel mix and attach rate endpoints accept start_date /
+end_date filters, and every distinct range used to be a new warehouse query.
+This store loads each metric view once, keeps its rows as NumPy columns of
+additive partials (sums, and rates weighted by their order counts), and
+answers any date range at month, quarter or year granularity with a
+vectorized mask + bincount reduction. Date-picker changes never reach the
+warehouse; only the open month is re-fetched on refresh.
+
+The metric_* views are monthly, so a month is the finest grain stored.
+Rates and shares are re-derived from the summed partials on rollup.
+Distinct counts can't be summed; above month grain they are estimated from
+the per-day HyperLogLog sketches (see distinct_sketches) when enabled, and
+are None otherwise.
+
+Usage:
+    from app.services.partial_aggregates import partial_aggregates
+
+    rows = await partial_aggregates.query("channel_mix", start_date=date(2024, 1, 1))
+    rows = await partial_aggregates.query("attach_rate", granularity="quarter", group="Family")
+
+    await partial_aggregates.refresh("gmv_trend")  # re-fetch the open month
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel
+import asyncio
+import time
+import logging
+import numpy as np
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.decoding import as_date
+from app.services.distinct_sketches import DistinctSketchStore, distinct_sketches
+from app.services.metric_registry import metric_registry
+
+logger = logging.getLogger(__name__)
+
+Granularity = Literal["month", "quarter", "year"]
+
+# Months per period for each granularity
+_PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+
+class PartialSpec(BaseModel):
+    """
+    How a metric's rows decompose into additive partials
+
+    Attributes:
+        metric: Registered metric name (its view must have a `month` column)
+        group_by: Dimension kept on rollup (e.g. channel), if any
+        sums: Additive measures, summed on rollup
+        weighted: Rate column -> weight column; rolled up as a weighted mean
+        shares: Percent-of-period-total column -> summed column it is a share of
+        ratios: Percent column -> (numerator, denominator) summed columns
+        distinct: Distinct count column -> sketch kind estimating it on rollup
+        order_by: (column, descending) sort keys of the response
+    """
+    metric: str
+    group_by: Optional[str] = None
+    sums: List[str] = []
+    weighted: Dict[str, str] = {}
+    shares: Dict[str, str] = {}
+    ratios: Dict[str, Tuple[str, str]] = {}
+    distinct: Dict[str, str] = {}
+    order_by: List[Tuple[str, bool]] = [("month", False)]
+
+
+class _Partials:
+    """Loaded rows of one metric plus their NumPy column arrays"""
+
+    __slots__ = ("rows", "columns", "days", "month_index", "group_codes", "group_labels", "measures", "loaded_at")
+
+    def __init__(self, spec: PartialSpec, rows: List[Dict[str, Any]]):
+        self.rows = sorted(rows, key=lambda row: as_date(row["month"]))
+        self.columns = list(self.rows[0]) if self.rows else []
+        self.loaded_at = time.time()
+
+        months = [as_date(row["month"]) for row in self.rows]
+        self.days = np.array([m.toordinal() for m in months], dtype=np.int64)
+        self.month_index = np.array([m.year * 12 + m.month - 1 for m in months], dtype=np.int64)
+
+        if spec.group_by:
+            labels, codes = np.unique(
+                np.array([str(row[spec.group_by]) for row in self.rows], dtype=object), return_inverse=True
+            )
+            self.group_labels = list(labels)
+            self.group_codes = codes.astype(np.int64)
+        else:
+            self.group_labels = [None]
+            self.group_codes = np.zeros(len(self.rows), dtype=np.int64)
+
+        def column(name: str) -> np.ndarray:
+            return np.array(
+                [0.0 if row.get(name) is None else float(row[name]) for row in self.rows], dtype=np.float64
+            )
+
+        self.measures = {name: column(name) for name in spec.sums}
+        for rate, weight in spec.weighted.items():
+            # Stored as rate * weight so it sums; divided back out on rollup
+            self.measures[rate] = column(rate) * column(weight)
+        for name in set(spec.weighted.values()) | set(spec.shares.values()):
+            self.measures.setdefault(name, column(name))
+        for numerator, denominator in spec.ratios.values():
+            self.measures.setdefault(numerator, column(numerator))
+            self.measures.setdefault(denominator, column(denominator))
+
+    @property
+    def last_month(self) -> Optional[date]:
+        return as_date(self.rows[-1]["month"]) if self.rows else None
+
+
+def _month_date(month_index: int) -> date:
+    """First day of a month given as year * 12 + month - 1"""
+    return date(int(month_index) // 12, int(month_index) % 12 + 1, 1)
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise ratio, NaN where the denominator is zero"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def _value(x: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(x) else round(float(x), digits)
+
+
+def sort_rows(rows: List[Dict[str, Any]], order_by: List[Tuple[str, bool]]) -> List[Dict[str, Any]]:
+    """Stable multi-key sort (None last within each key)"""
+    for column, descending in reversed(order_by):
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        rows = sorted(present, key=lambda row: row[column], reverse=descending) + missing
+    return rows
+
+
+class PartialAggregateStore:
+    """
+    Per-metric partial aggregates answering date-range queries in memory
+
+    Attributes:
+        max_age: Seconds after which a read schedules a background refresh
+    """
+
+    def __init__(self, specs: List[PartialSpec], max_age: float):
+        self.max_age = max_age
+        self._specs = {spec.metric: spec for spec in specs}
+        self._partials: Dict[str, _Partials] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def __contains__(self, metric: str) -> bool:
+        return metric in self._specs
+
+    def invalidate(self, metric: Optional[str] = None) -> None:
+        """Drop loaded partials (all metrics if none given); reloaded on next use"""
+        for name in [metric] if metric else list(self._partials):
+            self._partials.pop(name, None)
+
+    async def _load(self, metric: str, priority: QueryPriority) -> _Partials:
+        """Fetch the metric (only months from the open one on, if loaded) and merge it in"""
+        spec = self._specs[metric]
+        current = self._partials.get(metric)
+        since = current.last_month if current else None
+
+        # Re-fetches bypass the result cache, which would return the open
+        # month as it was when first cached for the metric's whole TTL
+        rows = await metric_registry.fetch(
+            metric, priority=priority, ttl=0 if since else None, start_date=since
+        )
+        if current is not None:
+            rows = [row for row in current.rows if as_date(row["month"]) < since] + rows
+
+        partials = _Partials(spec, rows)
+        self._partials[metric] = partials
+        logger.info(
+            f"Loaded {len(partials.rows)} {metric} partial rows"
+            + (f" (re-fetched months from {since})" if since else "")
+        )
+        return partials
+
+    def _load_task(self, metric: str, priority: QueryPriority) -> asyncio.Task:
+        """Return the in-progress load of a metric, starting one if needed"""
+        task = self._loading.get(metric)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._load(metric, priority))
+            self._loading[metric] = task
+            task.add_done_callback(lambda t: self._load_done(metric, t))
+        return task
+
+    def _load_done(self, metric: str, task: asyncio.Task) -> None:
+        self._loading.pop(metric, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Loading {metric} partials failed: {task.exception()}")
+
+    async def refresh(self, metric: str, priority: QueryPriority = QueryPriority.BACKGROUND) -> None:
+        """Re-fetch the open month of a metric (everything if not loaded yet)"""
+        await asyncio.shield(self._load_task(metric, priority))
+
+    async def _partials_for(self, metric: str, priority: QueryPriority) -> _Partials:
+        partials = self._partials.get(metric)
+        if partials is None:
+            return await asyncio.shield(self._load_task(metric, priority))
+
+        if time.time() - partials.loaded_at > self.max_age:
+            # Stale: answer from memory, refresh in the background
+            self._load_task(metric, QueryPriority.BACKGROUND)
+        return partials
+
+    async def query(
+        self,
+        metric: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        granularity: Granularity = "month",
+        group: Optional[str] = None,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer a date-range query from memory
+
+        Args:
+            metric: Metric name with a registered PartialSpec
+            start_date: Inclusive lower bound on the month column
+            end_date: Inclusive upper bound on the month column
+            granularity: Period rows are rolled up to
+            group: Keep only this value of the spec's group_by column
+            priority: Admission class if the metric has to be loaded first
+
+        Returns:
+            Rows shaped like the metric view's rows; above month grain the
+            month column holds the period's first day
+        """
+        spec = self._specs[metric]
+        partials = await self._partials_for(metric, priority)
+
+        mask = np.ones(len(partials.rows), dtype=bool)
+        if start_date:
+            mask &= partials.days >= start_date.toordinal()
+        if end_date:
+            mask &= partials.days <= end_date.toordinal()
+        if group is not None:
+            if group not in partials.group_labels:
+                return []
+            mask &= partials.group_codes == partials.group_labels.index(group)
+
+        if granularity == "month":
+            rows = [partials.rows[i] for i in np.flatnonzero(mask)]
+        else:
+            sketches = None
+            if spec.distinct and settings.DISTINCT_SKETCHES_ENABLED:
+                try:
+                    await distinct_sketches.ensure_loaded(priority)
+                    sketches = distinct_sketches
+                except Exception as e:
+                    logger.warning(f"Distinct count sketches unavailable, leaving counts empty: {e}")
+            rows = self._rollup(spec, partials, mask, _PERIOD_MONTHS[granularity], sketches)
+        return sort_rows(rows, spec.order_by)
+
+    @staticmethod
+    def _rollup(
+        spec: PartialSpec,
+        partials: _Partials,
+        mask: np.ndarray,
+        period_months: int,
+        sketches: Optional[DistinctSketchStore]
+    ) -> List[Dict[str, Any]]:
+        """Sum the masked partials per (period, group) and re-derive the non-additive columns"""
+        n_groups = len(partials.group_labels)
+        month_index = partials.month_index[mask]
+        keys, inverse = np.unique(
+            month_index // period_months * n_groups + partials.group_codes[mask], return_inverse=True
+        )
+        key_periods = keys // n_groups
+
+        sums = {
+            name: np.bincount(inverse, weights=values[mask], minlength=len(keys))
+            for name, values in partials.measures.items()
+        }
+
+        derived = {}
+        for rate, weight in spec.weighted.items():
+            derived[rate] = _divide(sums[rate], sums[weight])
+        _, period_of_key = np.unique(key_periods, return_inverse=True)
+        for share, column in spec.shares.items():
+            totals = np.bincount(period_of_key, weights=sums[column])
+            derived[share] = _divide(sums[column], totals[period_of_key]) * 100
+        for ratio, (numerator, denominator) in spec.ratios.items():
+            derived[ratio] = _divide(sums[numerator], sums[denominator]) * 100
+
+        if sketches is not None and spec.distinct:
+            # Union the day sketches of the months actually selected per key
+            first = np.full(len(keys), np.iinfo(np.int64).max, dtype=np.int64)
+            last = np.full(len(keys), -1, dtype=np.int64)
+            np.minimum.at(first, inverse, month_index)
+            np.maximum.at(last, inverse, month_index)
+            for column, kind in spec.distinct.items():
+                counts = np.full(len(keys), np.nan)
+                for i in range(len(keys)):
+                    count = sketches.count(kind, _month_date(first[i]), _month_date(last[i] + 1) - timedelta(days=1))
+                    if count is not None:
+                        counts[i] = count
+                derived[column] = counts
+
+        rows = []
+        for i, key in enumerate(keys):
+            row = {}
+            for column in partials.columns:
+                if column == "month":
+                    row[column] = _month_date(int(key_periods[i]) * period_months)
+                elif column == spec.group_by:
+                    row[column] = partials.group_labels[int(key) % n_groups]
+                elif column in spec.distinct and column in derived:
+                    row[column] = None if np.isnan(derived[column][i]) else int(derived[column][i])
+                elif column in derived:
+                    row[column] = _value(derived[column][i])
+                elif column in sums:
+                    total = sums[column][i]
+                    row[column] = int(total) if float(total).is_integer() else round(float(total), 2)
+                else:
+                    # Not additive (e.g. distinct customer counts)
+                    row[column] = None
+            rows.append(row)
+        return rows
+
+    def approximate_fields(self) -> Dict[str, List[str]]:
+        """Metric -> columns estimated from distinct count sketches above month grain"""
+        return {metric: list(spec.distinct) for metric, spec in self._specs.items() if spec.distinct}
+
+    def status(self) -> Dict[str, Any]:
+        """Loaded row counts and ages per metric"""
+        now = time.time()
+        return {
+            metric: {
+                "rows": len(partials.rows),
+                "last_month": partials.last_month,
+                "age_seconds": round(now - partials.loaded_at, 1),
+                "loading": metric in self._loading,
+            }
+            for metric, partials in self._partials.items()
+        }
+
+
+_SPECS = [
+    PartialSpec(
+        metric="gmv_trend",
+        sums=["gmv", "net_revenue", "total_discounts", "order_count"],
+        ratios={"discount_rate_pct": ("total_discounts", "gmv")},
+        distinct={"customer_count": "customers"},
+    ),
+    PartialSpec(
+        metric="channel_mix",
+        group_by="channel",
+        sums=["order_count", "revenue"],
+        shares={"pct_of_orders": "order_count", "pct_of_revenue": "revenue"},
+        order_by=[("month", True), ("pct_of_revenue", True)],
+    ),
+    PartialSpec(
+        metric="attach_rate",
+        group_by="customer_segment",
+        sums=["total_orders"],
+        weighted={
+            rate: "total_orders" for rate in (
+                "sides_attach_rate_pct", "dessert_attach_rate_pct", "beverage_attach_rate_pct", "any_addon_rate_pct"
+            )
+        },
+        order_by=[("month", True), ("customer_segment", False)],
+    ),
+]
+
+
+# Global store for the date-filtered dashboard metrics
+partial_aggregates = PartialAggregateStore(_SPECS, max_age=settings.PARTIAL_AGGREGATES_MAX_AGE)
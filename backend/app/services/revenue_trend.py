@@ -0,0 +1,169 @@
+"""
+Incremental Revenue Trend
+
+The revenue trend aggregates daily_sales_fact by month over the last
+months * 30 days. Only the open month (and recently closed months that can
+still receive late-arriving rows) change between calls, so closed months are
+aggregated once and kept in memory; each call only queries:
+
+- the partial first month of the window (its start moves daily),
+- the open month plus the late-arrival window, and
+- closed months not seen before (all of them on the first call).
+
+Those ranges go to the warehouse as one statement, so after the first call
+the cost is constant regardless of `months`. Per-month distinct order counts
+are safe to reuse because each order falls on exactly one date.
+
+Usage:
+    from app.services.revenue_trend import revenue_trend_cache
+
+    rows = await revenue_trend_cache.get(months=12)
+    # [{"month": "Jan 2025", "revenue": ..., "orders": ...}, ...]
+
+    revenue_trend_cache.invalidate()  # after a backfill of daily_sales_fact
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.databricks_repo import databricks_repo
+from app.repositories.decoding import as_date
+from app.services.metric_registry import SALES_FACT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Aggregates of one month: (revenue, distinct orders), None if it had no rows
+MonthAggregate = Optional[Tuple[Any, int]]
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _merge_ranges(ranges: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """Merge overlapping or adjacent [start, end) date ranges"""
+    merged: List[List[date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class IncrementalRevenueTrend:
+    """
+    Revenue trend with closed-month aggregates cached in memory
+
+    Attributes:
+        late_arrival_days: Days after a month ends during which it may still
+                           receive rows; it is re-queried until then
+    """
+
+    def __init__(self, late_arrival_days: int):
+        self.late_arrival_days = late_arrival_days
+        self._closed: Dict[date, MonthAggregate] = {}
+
+    def invalidate(self) -> None:
+        """Forget all cached closed months"""
+        logger.info(f"Dropping {len(self._closed)} cached closed revenue months")
+        self._closed.clear()
+
+    def _plan(self, today: date, months: int) -> Tuple[date, date, List[date], List[Tuple[date, date]]]:
+        """
+        Work out which months are reusable and which ranges must be queried
+
+        Returns:
+            (window start, settled boundary, closed months in the window,
+             [start, end) ranges to query)
+        """
+        cutoff = today - timedelta(days=months * 30)
+        # Months starting before this boundary can no longer change
+        settled = _month_start(today - timedelta(days=self.late_arrival_days))
+
+        closed_months = []
+        month = cutoff if cutoff.day == 1 else _next_month(cutoff)
+        while month < settled:
+            closed_months.append(month)
+            month = _next_month(month)
+
+        ranges = [(max(cutoff, settled), today + timedelta(days=1))]
+        if cutoff < settled and cutoff.day != 1:
+            # Partial first month: its lower bound moves every day
+            ranges.append((cutoff, min(_next_month(cutoff), settled)))
+        ranges += [(m, _next_month(m)) for m in closed_months if m not in self._closed]
+
+        return cutoff, settled, closed_months, _merge_ranges(ranges)
+
+    @staticmethod
+    def _build_query(ranges: List[Tuple[date, date]]) -> Tuple[str, Dict[str, date]]:
+        """Monthly aggregates restricted to the given [start, end) ranges"""
+        predicates = []
+        params = {}
+        for i, (start, end) in enumerate(ranges):
+            predicates.append(f"(order_date >= :start_{i} AND order_date < :end_{i})")
+            params[f"start_{i}"] = start
+            params[f"end_{i}"] = end
+
+        query = f"""
+        SELECT
+            CAST(DATE_TRUNC('MONTH', order_date) AS DATE) AS month_start,
+            SUM(net_revenue) AS revenue,
+            COUNT(DISTINCT order_id) AS orders
+        FROM {SALES_FACT}
+        WHERE {" OR ".join(predicates)}
+        GROUP BY 1
+        """
+        return query, params
+
+    async def get(
+        self,
+        months: int = 6,
+        priority: QueryPriority = QueryPriority.INTERACTIVE
+    ) -> List[Dict[str, Any]]:
+        """
+        Monthly revenue and orders for the last months * 30 days
+
+        Args:
+            months: Window length in months (30 days each)
+            priority: Admission class for the statement
+
+        Returns:
+            Rows with month ("MMM yyyy"), revenue and orders, oldest first
+        """
+        today = datetime.now(timezone.utc).date()
+        cutoff, settled, closed_months, ranges = self._plan(today, months)
+
+        # Uncached: the statement always covers the open month, and a cached
+        # result would outlive the background refresh interval
+        query, params = self._build_query(ranges)
+        rows = await databricks_repo.execute_query_async(query, params, ttl=0, priority=priority)
+        fresh = {as_date(row["month_start"]): (row["revenue"], row["orders"]) for row in rows}
+
+        # Remember newly queried closed months, including ones with no rows
+        for month in closed_months:
+            if month not in self._closed:
+                self._closed[month] = fresh.get(month)
+
+        logger.debug(
+            f"Revenue trend for {months} months: {len(closed_months)} closed months reused or cached, "
+            f"{len(ranges)} range(s) queried"
+        )
+
+        aggregates = {m: self._closed[m] for m in closed_months}
+        aggregates.update({m: agg for m, agg in fresh.items() if m not in aggregates})
+
+        return [
+            {"month": month.strftime("%b %Y"), "revenue": agg[0], "orders": agg[1]}
+            for month, agg in sorted(aggregates.items())
+            if agg is not None
+        ]
+
+
+# Global instance used by the revenue trend route and the background refresher
+revenue_trend_cache = IncrementalRevenueTrend(late_arrival_days=settings.REVENUE_TREND_LATE_ARRIVAL_DAYS)
@@ -0,0 +1,204 @@
+"""
+Shared-Scan Fusion for daily_sales_fact Metrics
+
+The dashboard summary, revenue trend and channel breakdown all aggregate
+main.dominos_realistic.daily_sales_fact over overlapping date windows. This
+module compiles the three into one GROUPING SETS statement that scans the
+widest window once, with each measure restricted to its own window through
+conditional aggregation, and splits the result back into the three response
+shapes.
+
+Because the statement text and parameters only depend on the trend length,
+the three endpoints share one cached, single-flight statement per dashboard
+load instead of running three scans. The summary and channel breakdown
+always use the default trend length, so a non-default /revenue-trend still
+costs a second scan (two instead of three).
+
+With REVENUE_TREND_INCREMENTAL the revenue trend comes from its own
+incremental statement instead, so the trend grouping set is left out and
+the fused statement only serves the summary and channel breakdown.
+
+Usage:
+    from app.services.sales_fusion import fetch_fused_sales
+
+    fused = await fetch_fused_sales(months=6)
+    fused.summary            # {"total_revenue": ..., "total_orders": ..., "avg_order_value": ...}
+    fused.revenue_trend      # [{"month": "Jan 2025", "revenue": ..., "orders": ...}, ...]
+    fused.channel_breakdown  # [{"channel": "Mobile App", "revenue": ...}, ...]
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.repositories.admission import QueryPriority
+from app.repositories.columnar import ColumnarResult
+from app.repositories.databricks_repo import databricks_repo
+from app.services.metric_registry import SALES_FACT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fixed windows of the summary and channel breakdown endpoints (days)
+SUMMARY_WINDOW_DAYS = 180
+CHANNEL_WINDOW_DAYS = 30
+
+# COUNT(DISTINCT) is not additive across groups, so each panel gets its own
+# grouping set: () for the summary, (month) for the trend, (channel) for the
+# breakdown. The in_* flags restrict every measure to its panel's window.
+# Without the trend, g_month is constant so every row is summary or channel.
+_FUSED_QUERY = """
+SELECT
+    {month_grouping} AS g_month,
+    GROUPING(channel) AS g_channel,{trend_columns}
+    channel,
+    SUM(CASE WHEN in_summary THEN net_revenue END) AS summary_revenue,
+    COUNT(DISTINCT CASE WHEN in_summary THEN order_id END) AS summary_orders,{trend_measures}
+    SUM(CASE WHEN in_channel THEN net_revenue END) AS channel_revenue
+FROM (
+    SELECT
+        order_id,
+        net_revenue,
+        channel,{trend_flags}
+        order_date >= DATE_SUB(CURRENT_DATE(), :summary_days) AS in_summary,
+        order_date >= DATE_SUB(CURRENT_DATE(), :channel_days) AS in_channel
+    FROM {sales_fact}
+    WHERE order_date >= DATE_SUB(CURRENT_DATE(), :scan_days)
+)
+GROUP BY GROUPING SETS ((), {trend_set}(channel))
+"""
+
+_TREND_PARTS = {
+    "month_grouping": "GROUPING(month_start)",
+    "trend_columns": """
+    month_start,
+    month,""",
+    "trend_measures": """
+    SUM(CASE WHEN in_trend THEN net_revenue END) AS trend_revenue,
+    COUNT(DISTINCT CASE WHEN in_trend THEN order_id END) AS trend_orders,""",
+    "trend_flags": """
+        DATE_TRUNC('MONTH', order_date) AS month_start,
+        DATE_FORMAT(order_date, 'MMM yyyy') AS month,
+        order_date >= DATE_SUB(CURRENT_DATE(), :trend_days) AS in_trend,""",
+    "trend_set": "(month_start, month), ",
+}
+
+_FUSED_WITH_TREND = _FUSED_QUERY.format(sales_fact=SALES_FACT, **_TREND_PARTS)
+_FUSED_WITHOUT_TREND = _FUSED_QUERY.format(
+    sales_fact=SALES_FACT, month_grouping="1", **{key: "" for key in _TREND_PARTS if key != "month_grouping"}
+)
+
+
+class FusedSales:
+    """
+    The three daily_sales_fact panels split out of one fused result
+
+    Attributes:
+        summary: Summary KPI row (total_revenue, total_orders, avg_order_value),
+                 or None when there were no orders in its window
+        revenue_trend: Monthly revenue/orders, oldest month first
+        channel_breakdown: Revenue per channel, highest first
+    """
+
+    __slots__ = ("summary", "revenue_trend", "channel_breakdown")
+
+    def __init__(
+        self,
+        summary: Optional[Dict[str, Any]],
+        revenue_trend: List[Dict[str, Any]],
+        channel_breakdown: List[Dict[str, Any]]
+    ):
+        self.summary = summary
+        self.revenue_trend = revenue_trend
+        self.channel_breakdown = channel_breakdown
+
+
+def build_fused_query(months: int, include_trend: bool = True) -> Tuple[str, Dict[str, int]]:
+    """
+    Build the fused statement and its parameters
+
+    Args:
+        months: Revenue trend length in months (30 days each, as /revenue-trend)
+        include_trend: Whether to compute the revenue trend grouping set
+
+    Returns:
+        Tuple of (SQL, parameters)
+    """
+    if not include_trend:
+        params = {"summary_days": SUMMARY_WINDOW_DAYS, "channel_days": CHANNEL_WINDOW_DAYS}
+        params["scan_days"] = max(params.values())
+        return _FUSED_WITHOUT_TREND, params
+
+    trend_days = months * 30
+    params = {
+        "summary_days": SUMMARY_WINDOW_DAYS,
+        "trend_days": trend_days,
+        "channel_days": CHANNEL_WINDOW_DAYS,
+        "scan_days": max(SUMMARY_WINDOW_DAYS, trend_days, CHANNEL_WINDOW_DAYS),
+    }
+    return _FUSED_WITH_TREND, params
+
+
+def split_fused_result(result: ColumnarResult) -> FusedSales:
+    """
+    Split grouping-set rows back into the three response shapes
+
+    Months and channels with no rows inside their own panel's window (they
+    only appear because the scan covers the widest window) are dropped. The
+    summary is None when its window has no orders.
+    """
+    summary = None
+    trend = []
+    channels = []
+
+    for row in result.to_rows():
+        if row["g_month"] and row["g_channel"]:
+            orders = row["summary_orders"] or 0
+            revenue = row["summary_revenue"]
+            if not orders:
+                continue
+            summary = {
+                "total_revenue": revenue,
+                "total_orders": orders,
+                "avg_order_value": revenue / orders if orders and revenue is not None else None,
+            }
+        elif not row["g_month"]:
+            if row["trend_orders"]:
+                trend.append((row["month_start"], {
+                    "month": row["month"],
+                    "revenue": row["trend_revenue"],
+                    "orders": row["trend_orders"],
+                }))
+        elif row["channel_revenue"] is not None:
+            channels.append({"channel": row["channel"], "revenue": row["channel_revenue"]})
+
+    trend.sort(key=lambda item: item[0])
+    channels.sort(key=lambda item: item["revenue"], reverse=True)
+
+    return FusedSales(summary, [point for _, point in trend], channels)
+
+
+async def fetch_fused_sales(
+    months: int = 6,
+    priority: QueryPriority = QueryPriority.INTERACTIVE,
+    include_trend: Optional[bool] = None
+) -> FusedSales:
+    """
+    Run (or reuse) the fused daily_sales_fact statement and split its result
+
+    Args:
+        months: Revenue trend length in months
+        priority: Admission class for the statement
+        include_trend: Whether to compute the revenue trend; by default only
+                       when it isn't served by the incremental revenue trend
+                       (REVENUE_TREND_INCREMENTAL), whose own scan replaces it
+
+    Returns:
+        FusedSales with the summary, revenue trend (empty if not included)
+        and channel breakdown
+    """
+    if include_trend is None:
+        include_trend = not settings.REVENUE_TREND_INCREMENTAL
+    query, params = build_fused_query(months, include_trend)
+    result = await databricks_repo.execute_query_columnar_async(
+        query, params, ttl=settings.SALES_FACT_CACHE_TTL, priority=priority
+    )
+    logger.debug(f"Fused daily_sales_fact scan returned {len(result)} grouping-set rows")
+    return split_fused_result(result)
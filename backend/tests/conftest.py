@@ -0,0 +1,60 @@
+"""
+Shared test fixtures
+
+Tests run against the app modules directly, without a warehouse: the
+fake_repo fixture replaces the statement methods of the global
+databricks_repo with canned results and records every call.
+
+Usage (from backend/):
+    python -m pytest -q
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.columnar import ColumnarResult
+from app.repositories.databricks_repo import databricks_repo
+
+
+class FakeRepo:
+    """
+    Canned replacement for the databricks_repo statement methods
+
+    Attributes:
+        calls: (query, params, ttl) of every statement, in order
+        rows: Returned by execute_query_async (or a function of (query, params))
+        columnar: Returned by execute_query_columnar_async (or a function of (query, params))
+    """
+
+    def __init__(self):
+        self.calls: List[Tuple[str, Optional[Dict[str, Any]], Optional[int]]] = []
+        self.rows: Any = []
+        self.columnar: Any = ColumnarResult([], [], 0)
+
+    @staticmethod
+    def _answer(answer: Any, query: str, params: Optional[Dict[str, Any]]) -> Any:
+        return answer(query, params) if callable(answer) else answer
+
+    async def execute_query_async(
+        self, query: str, params: Optional[Dict[str, Any]] = None, ttl=None, priority=None, **kwargs
+    ):
+        self.calls.append((query, params, ttl))
+        return self._answer(self.rows, query, params)
+
+    async def execute_query_columnar_async(
+        self, query: str, params: Optional[Dict[str, Any]] = None, ttl=None, priority=None, **kwargs
+    ):
+        self.calls.append((query, params, ttl))
+        return self._answer(self.columnar, query, params)
+
+
+@pytest.fixture
+def fake_repo(monkeypatch) -> FakeRepo:
+    """Route databricks_repo statements to a FakeRepo for the test"""
+    fake = FakeRepo()
+    monkeypatch.setattr(databricks_repo, "execute_query_async", fake.execute_query_async)
+    monkeypatch.setattr(databricks_repo, "execute_query_columnar_async", fake.execute_query_columnar_async)
+    return fake
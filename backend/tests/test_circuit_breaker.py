@@ -0,0 +1,82 @@
+import contextvars
+import threading
+import time
+import pytest
+from app.repositories.circuit_breaker import CircuitBreaker, CircuitOpenError, mark_stale, track_stale_results
+
+
+@pytest.fixture
+def breaker():
+    # Probing effectively disabled: transitions are driven by the test
+    breaker = CircuitBreaker(failure_threshold=3, probe_interval=3600, probe=lambda: None)
+    yield breaker
+    breaker.stop()
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.record_failure(TimeoutError("timed out"))
+        breaker.check()
+
+    breaker.record_failure(TimeoutError("timed out"))
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError, match="timed out"):
+        breaker.check()
+
+    stats = breaker.stats()
+    assert (stats["state"], stats["trips"], stats["rejected"]) == ("open", 1, 1)
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure(TimeoutError("timed out"))
+    breaker.record_failure(TimeoutError("timed out"))
+    breaker.record_success()
+    breaker.record_failure(TimeoutError("timed out"))
+
+    assert not breaker.is_open
+    assert breaker.stats()["consecutive_failures"] == 1
+
+
+def test_success_closes_an_open_circuit(breaker):
+    for _ in range(3):
+        breaker.record_failure(ConnectionError("refused"))
+    breaker.record_success()
+
+    assert not breaker.is_open
+    breaker.check()
+    assert breaker.stats()["state"] == "closed"
+
+
+def test_probe_closes_the_circuit_once_it_succeeds():
+    attempts = []
+    closed = threading.Event()
+
+    def probe():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise ConnectionError("still down")
+        closed.set()
+
+    breaker = CircuitBreaker(failure_threshold=1, probe_interval=0.01, probe=probe)
+    try:
+        breaker.record_failure(ConnectionError("refused"))
+        assert closed.wait(5)
+        for _ in range(500):
+            if not breaker.is_open:
+                break
+            time.sleep(0.01)
+        assert not breaker.is_open
+        assert breaker.probes == 2
+        assert breaker.stats()["last_error"] == "still down"
+    finally:
+        breaker.stop()
+
+
+def test_stale_results_are_tracked_only_when_requested():
+    def request():
+        mark_stale(1.0)
+        ages = track_stale_results()
+        mark_stale(12.5)
+        return ages
+
+    assert contextvars.copy_context().run(request) == [12.5]
@@ -0,0 +1,89 @@
+from datetime import date, datetime
+import asyncio
+import pytest
+from app.core.config import settings
+from app.repositories.columnar import ColumnarResult
+from app.services import cohort_engine as cohort_module
+from app.services.cohort_engine import CohortEngine
+
+# (customer, order date, segment)
+ACTIVITY = [
+    # Sunday 2023-10-01 is the history start: its week began on Monday 2023-09-25
+    ("D", date(2023, 10, 1), "Family"),
+    ("A", date(2024, 1, 10), "Family"),
+    ("A", date(2024, 2, 3), "Family"),
+    ("A", date(2024, 4, 20), "Family"),
+    ("B", date(2024, 1, 20), "Family"),
+    ("B", date(2024, 3, 2), "Family"),
+    ("C", date(2024, 2, 5), "Student"),
+    ("C", date(2024, 2, 25), "Student"),
+    ("C", date(2024, 3, 1), "Student"),
+]
+
+
+class _FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2024, 6, 15, 12, tzinfo=tz)
+
+
+def _activity_since(query, params):
+    rows = [row for row in ACTIVITY if row[1] >= params["since"]]
+    return ColumnarResult.from_rows(["customer_id", "order_date", "customer_segment"], rows)
+
+
+@pytest.fixture
+def engine(fake_repo, monkeypatch):
+    monkeypatch.setattr(cohort_module, "datetime", _FixedDatetime)
+    fake_repo.columnar = _activity_since
+    # History starts 2023-10-09, aligned down to the quarter: 2023-10-01
+    return CohortEngine(history_days=250, late_arrival_days=3, max_age=3600)
+
+
+def test_monthly_matrix(engine):
+    matrix = asyncio.run(engine.matrix(granularity="month", start_date=date(2024, 1, 1), max_periods=3))
+
+    assert matrix["cohorts"] == [date(2024, 1, 1), date(2024, 2, 1)]
+    assert matrix["periods"] == [0, 1, 2, 3]
+    assert matrix["cohort_sizes"] == [2, 1]
+    assert matrix["active"] == [[2, 1, 1, 1], [1, 1, 0, 0]]
+    assert matrix["retention_pct"] == [[100.0, 50.0, 50.0, 50.0], [100.0, 100.0, 0.0, 0.0]]
+
+
+def test_segment_and_minimum_cohort_size(engine):
+    students = asyncio.run(engine.matrix(segment="Student", start_date=date(2024, 1, 1), max_periods=1))
+    assert students["cohorts"] == [date(2024, 2, 1)]
+    assert students["active"] == [[1, 1]]
+
+    large = asyncio.run(engine.matrix(min_cohort_size=2, max_periods=1))
+    assert large["cohorts"] == [date(2024, 1, 1)]
+
+    assert asyncio.run(engine.matrix(segment="Unknown"))["cohorts"] == []
+
+
+def test_cells_not_yet_observable_are_none(engine):
+    matrix = asyncio.run(engine.matrix(granularity="quarter", start_date=date(2024, 1, 1), max_periods=2))
+
+    assert matrix["cohorts"] == [date(2024, 1, 1)]
+    assert matrix["active"] == [[3, 1, None]]
+
+
+def test_week_cohort_straddling_history_start_is_dropped(engine):
+    weeks = asyncio.run(engine.matrix(granularity="week", end_date=date(2023, 12, 31)))
+    assert weeks["cohorts"] == []
+
+    months = asyncio.run(engine.matrix(granularity="month", end_date=date(2023, 12, 31)))
+    assert months["cohorts"] == [date(2023, 10, 1)]
+
+
+def test_refresh_refetches_trailing_days_uncached(engine, fake_repo):
+    asyncio.run(engine.refresh())
+    asyncio.run(engine.refresh())
+
+    (_, first, first_ttl), (_, second, second_ttl) = fake_repo.calls
+    assert first == {"cohort_start": date(2023, 10, 1), "since": date(2023, 10, 1)}
+    assert first_ttl == settings.SALES_FACT_CACHE_TTL
+    assert second == {"cohort_start": date(2023, 10, 1), "since": date(2024, 4, 17)}
+    assert second_ttl == 0
+    # Re-fetched days replace the loaded ones instead of adding to them
+    assert engine.status()["customer_days"] == len(ACTIVITY)
@@ -0,0 +1,18 @@
+from datetime import date
+import pytest
+from app.services.cohort_retention_refresh import window_start_for
+
+
+def test_first_run_backfills_everything():
+    assert window_start_for(None, late_arrival_days=7) == date(1900, 1, 1)
+
+
+@pytest.mark.parametrize("watermark, late_arrival_days, expected", [
+    (date(2025, 3, 20), 7, date(2025, 3, 1)),
+    # The late-arrival window reaches into the previous month
+    (date(2025, 3, 5), 7, date(2025, 2, 1)),
+    (date(2025, 1, 3), 7, date(2024, 12, 1)),
+    (date(2025, 3, 1), 0, date(2025, 3, 1)),
+])
+def test_window_starts_at_month_of_watermark_minus_late_days(watermark, late_arrival_days, expected):
+    assert window_start_for(watermark, late_arrival_days) == expected
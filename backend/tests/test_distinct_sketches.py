@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import numpy as np
+import pytest
+from app.repositories.columnar import ColumnarResult
+from app.services.distinct_sketches import DistinctSketchStore, estimate
+
+PRECISION = 11
+
+
+def _registers(hashes, precision=PRECISION) -> np.ndarray:
+    """HLL registers of 64-bit hashes, computed the way the warehouse statement does"""
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    for h in hashes:
+        register = h >> (64 - precision)
+        rest = (h << precision) & ((1 << 64) - 1)
+        rank = min(65 - precision, 65 - rest.bit_length())
+        registers[register] = max(registers[register], rank)
+    return registers
+
+
+def _hashes(n, seed):
+    rng = np.random.default_rng(seed)
+    return [int(h) for h in rng.integers(0, 1 << 64, size=n, dtype=np.uint64)]
+
+
+@pytest.mark.parametrize("n", [50, 1_000, 20_000])
+def test_estimate_is_within_error_bounds(n):
+    relative_error = 1.04 / (1 << PRECISION) ** 0.5
+    assert estimate(_registers(_hashes(n, seed=n))) == pytest.approx(n, rel=4 * relative_error)
+
+
+def test_estimate_of_empty_registers_is_zero():
+    assert estimate(np.zeros(1 << PRECISION, dtype=np.uint8)) == 0
+
+
+def test_count_unions_daily_sketches(fake_repo):
+    today = datetime.now(timezone.utc).date()
+    day_1, day_2 = today - timedelta(days=2), today - timedelta(days=1)
+    hashes = _hashes(3_000, seed=7)
+    # Days share 1,000 IDs
+    daily = {day_1: hashes[:2_000], day_2: hashes[1_000:]}
+
+    def encode(registers):
+        return json.dumps({str(i): int(r) for i, r in enumerate(registers) if r})
+
+    rows = []
+    for day, ids in daily.items():
+        for kind in ("orders", "customers"):
+            rows.append((day, kind, encode(_registers(ids))))
+    fake_repo.columnar = ColumnarResult.from_rows(["order_date", "kind", "registers"], rows)
+
+    store = DistinctSketchStore(precision=PRECISION, history_days=30, late_arrival_days=2, max_age=3600)
+    asyncio.run(store.ensure_loaded())
+
+    assert fake_repo.calls[0][2] == 0
+    assert store.count("orders", day_1, day_1) == pytest.approx(2_000, rel=0.1)
+    assert store.count("customers", day_1, day_2) == pytest.approx(3_000, rel=0.1)
+    assert store.count("orders", today, today) == 0
+    assert store.count("orders", day_1 - timedelta(days=1), day_2) is None
@@ -0,0 +1,83 @@
+import pytest
+from app.services.olap_cube import _CUBES, OlapCube
+
+SPECS = {spec.name: spec for spec in _CUBES}
+
+CHANNEL_MIX = [
+    {"month": "2025-01", "channel": "Web", "order_count": 30, "revenue": 600.0},
+    {"month": "2025-01", "channel": "Mobile App", "order_count": 70, "revenue": 1400.0},
+    {"month": "2025-02", "channel": "Web", "order_count": 50, "revenue": 1000.0},
+    {"month": "2025-02", "channel": "Mobile App", "order_count": 50, "revenue": 1000.0},
+]
+
+ARPU = [
+    {"customer_segment": "Family", "order_year": 2024, "arpu": 100.0, "customer_count": 10,
+     "total_revenue": 1000.0, "avg_orders_per_customer": 4.0},
+    {"customer_segment": "Student", "order_year": 2024, "arpu": 40.0, "customer_count": 30,
+     "total_revenue": 1200.0, "avg_orders_per_customer": 2.0},
+    {"customer_segment": "Family", "order_year": 2025, "arpu": 120.0, "customer_count": 20,
+     "total_revenue": 2400.0, "avg_orders_per_customer": 5.0},
+]
+
+
+def _cube(name, rows):
+    return OlapCube.from_rows(SPECS[name], rows)
+
+
+def test_rollup_sums_and_recomputes_shares():
+    rows = _cube("channel_mix", CHANNEL_MIX).rollup(["channel"])
+
+    assert rows == [
+        {"channel": "Mobile App", "order_count": 120, "revenue": 2400.0, "pct_of_orders": 60.0, "pct_of_revenue": 60.0},
+        {"channel": "Web", "order_count": 80, "revenue": 1600.0, "pct_of_orders": 40.0, "pct_of_revenue": 40.0},
+    ]
+
+
+def test_rollup_shares_are_per_remaining_dimension():
+    rows = _cube("channel_mix", CHANNEL_MIX).rollup(["month", "channel"])
+
+    january = [row for row in rows if row["month"] == "2025-01"]
+    assert {row["channel"]: row["pct_of_orders"] for row in january} == {"Web": 30.0, "Mobile App": 70.0}
+    assert rows[0]["month"] == "2025-02"  # newest month first
+
+
+def test_rollup_to_grand_total():
+    assert _cube("channel_mix", CHANNEL_MIX).rollup([]) == [
+        {"order_count": 200, "revenue": 4000.0, "pct_of_orders": 100.0, "pct_of_revenue": 100.0}
+    ]
+
+
+def test_weighted_mean_uses_weights_and_masks_non_combinable_rollups():
+    cube = _cube("arpu_by_segment", ARPU)
+
+    by_year = {row["order_year"]: row for row in cube.rollup(["order_year"])}
+    # (100 * 10 + 40 * 30) / 40
+    assert by_year[2024]["arpu"] == 55.0
+    assert by_year[2024]["customer_count"] == 40
+
+    # Customers repeat across years: combining years is not meaningful
+    by_segment = {row["customer_segment"]: row for row in cube.rollup(["customer_segment"])}
+    assert by_segment["Family"]["arpu"] is None
+    assert by_segment["Family"]["customer_count"] is None
+    assert by_segment["Family"]["total_revenue"] == 3400.0
+    # A segment seen in a single year is still exact
+    assert by_segment["Student"]["arpu"] == 40.0
+
+
+@pytest.mark.parametrize("value", [2024, "2024"])
+def test_slice_matches_labels_of_either_type(value):
+    for rows in (ARPU, [{**row, "order_year": str(row["order_year"])} for row in ARPU]):
+        sliced = _cube("arpu_by_segment", rows).slice("order_year", value)
+        assert len(sliced) == 2
+        assert {row["customer_segment"] for row in sliced.rollup(["customer_segment"])} == {"Family", "Student"}
+
+
+def test_dice_with_several_values_and_unknown_dimension():
+    cube = _cube("channel_mix", CHANNEL_MIX)
+
+    assert len(cube.dice(channel=["Web", "Phone"], month=None)) == 2
+    assert len(cube.dice(channel="Phone")) == 0
+    with pytest.raises(KeyError):
+        cube.dice(region="North")
+    with pytest.raises(KeyError):
+        cube.rollup(["region"])
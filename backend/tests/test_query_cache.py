@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+import pytest
+from app.repositories import query_cache
+from app.repositories.query_cache import QueryCache, estimate_size, normalize_sql
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(query_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_normalize_sql_collapses_whitespace_outside_literals():
+    query = "SELECT  *\n  FROM t\tWHERE name = 'a  b' "
+    assert normalize_sql(query) == "SELECT * FROM t WHERE name = 'a  b'"
+
+
+def test_get_returns_value_until_ttl_elapses(clock):
+    cache = QueryCache(max_bytes=1_000_000, default_ttl=60)
+    cache.set("q", [{"a": 1}], ttl=10)
+
+    clock[0] += 9.9
+    assert cache.get("q") == [{"a": 1}]
+
+    clock[0] += 0.1
+    assert cache.get("q") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.expirations == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_default_ttl_and_zero_ttl(clock):
+    cache = QueryCache(max_bytes=1_000_000, default_ttl=5)
+    cache.set("default", 1)
+    cache.set("uncached", 2, ttl=0)
+
+    assert cache.get("uncached") is None
+    clock[0] += 5
+    assert cache.get("default") is None
+
+
+def test_evicts_least_recently_used_first(clock):
+    value = list(range(10))
+    size = estimate_size(value)
+    cache = QueryCache(max_bytes=size * 2, default_ttl=60)
+
+    cache.set("a", value)
+    cache.set("b", value)
+    assert cache.get("a") == value  # "b" is now least recently used
+    cache.set("c", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert cache.evictions == 1
+    assert cache.stats()["bytes"] == size * 2
+
+
+def test_result_larger_than_budget_is_not_cached(clock):
+    cache = QueryCache(max_bytes=10, default_ttl=60)
+    cache.set("big", list(range(100)))
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_invalidate_by_substring(clock):
+    cache = QueryCache(max_bytes=1_000_000, default_ttl=60)
+    cache.set("SELECT * FROM daily_sales_fact", 1)
+    cache.set("SELECT * FROM metric_arpu", 2)
+
+    assert cache.invalidate("daily_sales_fact") == 1
+    assert cache.get("SELECT * FROM daily_sales_fact") is None
+    assert cache.get("SELECT * FROM metric_arpu") == 2
+
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
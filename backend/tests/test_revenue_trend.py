@@ -0,0 +1,81 @@
+from datetime import date, datetime
+import asyncio
+from app.services import revenue_trend
+from app.services.revenue_trend import IncrementalRevenueTrend, _next_month
+
+TODAY = date(2025, 3, 15)
+
+
+def test_plan_queries_everything_when_nothing_is_cached():
+    trend = IncrementalRevenueTrend(late_arrival_days=5)
+    cutoff, settled, closed, ranges = trend._plan(TODAY, months=6)
+
+    assert cutoff == date(2024, 9, 16)
+    assert settled == date(2025, 3, 1)
+    assert closed == [date(2024, 10, 1), date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+    # Partial first month, closed months and the open month merge into one range
+    assert ranges == [(date(2024, 9, 16), date(2025, 3, 16))]
+
+
+def test_plan_skips_cached_closed_months():
+    trend = IncrementalRevenueTrend(late_arrival_days=5)
+    _, _, closed, _ = trend._plan(TODAY, months=6)
+    trend._closed = {month: (100.0, 1) for month in closed}
+
+    _, _, _, ranges = trend._plan(TODAY, months=6)
+    assert ranges == [(date(2024, 9, 16), date(2024, 10, 1)), (date(2025, 3, 1), date(2025, 3, 16))]
+
+
+def test_plan_keeps_last_month_open_during_late_arrival_window():
+    trend = IncrementalRevenueTrend(late_arrival_days=5)
+    _, settled, closed, _ = trend._plan(date(2025, 3, 3), months=6)
+
+    assert settled == date(2025, 2, 1)
+    assert closed[-1] == date(2025, 1, 1)
+
+
+def test_plan_with_only_the_open_month():
+    trend = IncrementalRevenueTrend(late_arrival_days=0)
+    cutoff, settled, closed, ranges = trend._plan(date(2025, 1, 30), months=1)
+
+    assert (cutoff, settled) == (date(2024, 12, 31), date(2025, 1, 1))
+    assert closed == []
+    assert ranges == [(cutoff, date(2025, 1, 31))]
+
+
+class _FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(TODAY.year, TODAY.month, TODAY.day, 12, tzinfo=tz)
+
+
+def _monthly_rows(query, params):
+    """One row per month touched by the queried ranges"""
+    months = set()
+    for name, start in params.items():
+        if name.startswith("start_"):
+            month = start.replace(day=1)
+            while month < params[name.replace("start_", "end_")]:
+                months.add(month)
+                month = _next_month(month)
+    return [{"month_start": month, "revenue": 10.0, "orders": 2} for month in months]
+
+
+def test_get_reuses_closed_months_and_bypasses_the_cache(fake_repo, monkeypatch):
+    monkeypatch.setattr(revenue_trend, "datetime", _FixedDatetime)
+    trend = IncrementalRevenueTrend(late_arrival_days=5)
+    fake_repo.rows = _monthly_rows
+
+    first = asyncio.run(trend.get(months=6))
+    second = asyncio.run(trend.get(months=6))
+
+    assert len(first) == 7  # September (partial) to March
+    assert first == second
+    assert [ttl for _, _, ttl in fake_repo.calls] == [0, 0]
+    first_params, second_params = fake_repo.calls[0][1], fake_repo.calls[1][1]
+    assert len(first_params) == 2  # one merged range
+    assert len(second_params) == 4  # partial first month and open month only
+
+    trend.invalidate()
+    asyncio.run(trend.get(months=6))
+    assert len(fake_repo.calls[2][1]) == 2
@@ -0,0 +1,71 @@
+from datetime import date
+import asyncio
+from app.core.config import settings
+from app.repositories.columnar import ColumnarResult
+from app.services.sales_fusion import build_fused_query, fetch_fused_sales, split_fused_result
+
+COLUMNS = [
+    "g_month", "g_channel", "month_start", "month", "channel",
+    "summary_revenue", "summary_orders", "trend_revenue", "trend_orders", "channel_revenue",
+]
+
+
+def _result(*rows):
+    return ColumnarResult.from_rows(COLUMNS, rows)
+
+
+def test_split_routes_grouping_sets_to_their_panels():
+    fused = split_fused_result(_result(
+        # Grand total row: summary
+        (1, 1, None, None, None, 1000.0, 40, None, None, None),
+        # Month rows: revenue trend, out of order
+        (0, 1, date(2025, 2, 1), "Feb 2025", None, None, None, 300.0, 12, None),
+        (0, 1, date(2025, 1, 1), "Jan 2025", None, None, None, 200.0, 8, None),
+        # Month only inside the wider summary window
+        (0, 1, date(2024, 6, 1), "Jun 2024", None, None, None, None, 0, None),
+        # Channel rows: breakdown, highest revenue first
+        (1, 0, None, None, "Web", None, None, None, None, 250.0),
+        (1, 0, None, None, "Mobile App", None, None, None, None, 750.0),
+        # Channel only inside the wider trend window
+        (1, 0, None, None, "Phone", None, None, None, None, None),
+    ))
+
+    assert fused.summary == {"total_revenue": 1000.0, "total_orders": 40, "avg_order_value": 25.0}
+    assert fused.revenue_trend == [
+        {"month": "Jan 2025", "revenue": 200.0, "orders": 8},
+        {"month": "Feb 2025", "revenue": 300.0, "orders": 12},
+    ]
+    assert fused.channel_breakdown == [
+        {"channel": "Mobile App", "revenue": 750.0},
+        {"channel": "Web", "revenue": 250.0},
+    ]
+
+
+def test_split_returns_no_summary_without_orders():
+    fused = split_fused_result(_result((1, 1, None, None, None, None, 0, None, None, None)))
+    assert fused.summary is None
+    assert fused.revenue_trend == []
+    assert fused.channel_breakdown == []
+
+
+def test_build_query_without_trend_drops_the_trend_set():
+    with_trend, params = build_fused_query(6)
+    assert params["trend_days"] == 180
+    assert params["scan_days"] == max(params["summary_days"], params["trend_days"], params["channel_days"])
+
+    without_trend, params = build_fused_query(24, include_trend=False)
+    assert "trend_days" not in params
+    assert ":trend_days" not in without_trend
+    assert without_trend != with_trend
+
+
+def test_fetch_skips_trend_when_served_incrementally(fake_repo, monkeypatch):
+    monkeypatch.setattr(settings, "REVENUE_TREND_INCREMENTAL", True)
+    fake_repo.columnar = _result((1, 1, None, None, None, 500.0, 10, None, None, None))
+
+    fused = asyncio.run(fetch_fused_sales(months=6))
+
+    query, params, ttl = fake_repo.calls[0]
+    assert "trend_days" not in params
+    assert ttl == settings.SALES_FACT_CACHE_TTL
+    assert fused.summary["avg_order_value"] == 50.0
@@ -0,0 +1,190 @@
+-- ============================================================================
+-- Incremental Refresh of metric_cohort_retention
+-- ============================================================================
+--
+-- create_cohort_retention_table.sql recomputes every customer's cohort over
+-- the whole daily_sales_fact history on each run. This script keeps the same
+-- table current incrementally, with cost proportional to the data since the
+-- last run:
+--
+--   cohort_customers        one row per customer: first order date / cohort
+--   cohort_customer_months  one row per customer and active month: revenue
+--   refresh_watermarks      last order date processed per derived table
+--
+-- Each run re-processes order dates from the start of the month containing
+-- (watermark - late_arrival_days) onward. Only retention cells whose activity
+-- month falls in that window can change (new customers always land in a
+-- cohort inside the window, so changed cohort sizes are covered too); those
+-- cells are MERGEd and everything older is left untouched.
+--
+-- The first run (no watermark yet) backfills the state tables and rewrites
+-- every cell. The app runs the same steps via
+-- backend/app/services/cohort_retention_refresh.py (POST
+-- /api/metrics/refresh/cohort-retention).
+--
+-- Run this in Databricks SQL Editor or schedule it as a job (daily)
+-- ============================================================================
+
+DECLARE OR REPLACE VARIABLE late_arrival_days INT DEFAULT 3;
+DECLARE OR REPLACE VARIABLE window_start DATE;
+
+-- ============================================================================
+-- State tables (created once)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS main.dominos_analytics.cohort_customers (
+  customer_id STRING,
+  first_order_date DATE,
+  cohort_month DATE
+);
+
+CREATE TABLE IF NOT EXISTS main.dominos_analytics.cohort_customer_months (
+  customer_id STRING,
+  order_month DATE,
+  month_revenue DECIMAL(38, 2),
+  last_order_date DATE
+);
+
+CREATE TABLE IF NOT EXISTS main.dominos_analytics.refresh_watermarks (
+  table_name STRING,
+  watermark DATE,
+  window_start DATE,
+  updated_at TIMESTAMP
+);
+
+-- ============================================================================
+-- Step 1: Window to re-process
+-- ============================================================================
+
+SET VAR window_start = COALESCE(
+  (
+    SELECT DATE_TRUNC('MONTH', DATE_SUB(watermark, late_arrival_days))::DATE
+    FROM main.dominos_analytics.refresh_watermarks
+    WHERE table_name = 'metric_cohort_retention'
+  ),
+  DATE'1900-01-01'  -- first run: backfill everything
+);
+
+-- ============================================================================
+-- Step 2: Replace customer-month activity in the window
+-- ============================================================================
+
+INSERT INTO main.dominos_analytics.cohort_customer_months
+REPLACE WHERE order_month >= window_start
+SELECT
+  CAST(customer_id AS STRING) AS customer_id,
+  CAST(DATE_TRUNC('MONTH', order_date) AS DATE) AS order_month,
+  SUM(net_sales) AS month_revenue,
+  MAX(order_date) AS last_order_date
+FROM main.dominos_realistic.daily_sales_fact
+WHERE customer_id IS NOT NULL
+  AND order_date >= window_start
+GROUP BY 1, 2;
+
+-- ============================================================================
+-- Step 3: New customers (and earlier late-arriving first orders)
+-- ============================================================================
+
+MERGE INTO main.dominos_analytics.cohort_customers c
+USING (
+  SELECT
+    CAST(customer_id AS STRING) AS customer_id,
+    MIN(order_date) AS first_order_date
+  FROM main.dominos_realistic.daily_sales_fact
+  WHERE customer_id IS NOT NULL
+    AND order_date >= window_start
+  GROUP BY 1
+) n
+ON c.customer_id = n.customer_id
+WHEN MATCHED AND n.first_order_date < c.first_order_date THEN UPDATE SET
+  c.first_order_date = n.first_order_date,
+  c.cohort_month = CAST(DATE_TRUNC('MONTH', n.first_order_date) AS DATE)
+WHEN NOT MATCHED THEN INSERT (customer_id, first_order_date, cohort_month) VALUES (
+  n.customer_id,
+  n.first_order_date,
+  CAST(DATE_TRUNC('MONTH', n.first_order_date) AS DATE)
+);
+
+-- ============================================================================
+-- Step 4: Recompute and MERGE the cells of activity months in the window
+-- ============================================================================
+
+MERGE INTO main.dominos_analytics.metric_cohort_retention t
+USING (
+  WITH cohort_sizes AS (
+    SELECT cohort_month, COUNT(*) AS cohort_size
+    FROM main.dominos_analytics.cohort_customers
+    WHERE cohort_month >= ADD_MONTHS(window_start, -12)
+    GROUP BY cohort_month
+  ),
+  cells AS (
+    SELECT
+      c.cohort_month,
+      DATEDIFF(MONTH, c.cohort_month, a.order_month) AS months_since_acquisition,
+      COUNT(*) AS active_customers,
+      SUM(a.month_revenue) AS total_revenue
+    FROM main.dominos_analytics.cohort_customer_months a
+    INNER JOIN main.dominos_analytics.cohort_customers c ON a.customer_id = c.customer_id
+    WHERE a.order_month >= window_start
+      AND c.cohort_month >= ADD_MONTHS(window_start, -12)
+    GROUP BY 1, 2
+  )
+  SELECT
+    cells.cohort_month,
+    cells.months_since_acquisition,
+    cs.cohort_size,
+    cells.active_customers,
+    ROUND((cells.active_customers / cs.cohort_size) * 100, 2) AS retention_rate_pct,
+    cells.total_revenue,
+    ROUND(cells.total_revenue / cells.active_customers, 2) AS avg_revenue_per_customer
+  FROM cells
+  INNER JOIN cohort_sizes cs ON cells.cohort_month = cs.cohort_month
+  WHERE
+    cells.months_since_acquisition <= 12  -- Limit to 12 months
+    AND cs.cohort_size >= 10  -- Only cohorts with at least 10 customers
+) s
+ON t.cohort_month = s.cohort_month
+  AND t.months_since_acquisition = s.months_since_acquisition
+WHEN MATCHED THEN UPDATE SET
+  t.cohort_size = s.cohort_size,
+  t.active_customers = s.active_customers,
+  t.retention_rate_pct = s.retention_rate_pct,
+  t.total_revenue = s.total_revenue,
+  t.avg_revenue_per_customer = s.avg_revenue_per_customer
+WHEN NOT MATCHED THEN INSERT (
+  cohort_month, months_since_acquisition, cohort_size, active_customers,
+  retention_rate_pct, total_revenue, avg_revenue_per_customer
+) VALUES (
+  s.cohort_month, s.months_since_acquisition, s.cohort_size, s.active_customers,
+  s.retention_rate_pct, s.total_revenue, s.avg_revenue_per_customer
+)
+-- Cells in the window that no longer have activity
+WHEN NOT MATCHED BY SOURCE
+  AND ADD_MONTHS(t.cohort_month, t.months_since_acquisition) >= window_start THEN DELETE;
+
+-- ============================================================================
+-- Step 5: Advance the watermark
+-- ============================================================================
+
+MERGE INTO main.dominos_analytics.refresh_watermarks w
+USING (
+  SELECT 'metric_cohort_retention' AS table_name, MAX(last_order_date) AS watermark
+  FROM main.dominos_analytics.cohort_customer_months
+  WHERE order_month >= window_start
+) n
+ON w.table_name = n.table_name
+WHEN MATCHED AND n.watermark IS NOT NULL THEN UPDATE SET
+  w.watermark = n.watermark,
+  -- Qualified: unqualified, window_start resolves to the target column
+  w.window_start = session.window_start,
+  w.updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED AND n.watermark IS NOT NULL THEN INSERT (table_name, watermark, window_start, updated_at)
+  VALUES (n.table_name, n.watermark, session.window_start, CURRENT_TIMESTAMP());
+
+-- ============================================================================
+-- Verify the refresh
+-- ============================================================================
+
+SELECT table_name, watermark, window_start, updated_at
+FROM main.dominos_analytics.refresh_watermarks
+WHERE table_name = 'metric_cohort_retention';
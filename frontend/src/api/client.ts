@@ -240,6 +240,38 @@ export const metricsApi = {
     return response.data;
   },
 
+  /**
+   * Get a dense cohort retention matrix computed server-side
+   */
+  getCohortMatrix: async (params: {
+    granularity?: 'week' | 'month' | 'quarter';
+    segment?: string;
+    startDate?: string;
+    endDate?: string;
+    maxPeriods?: number;
+    minCohortSize?: number;
+  } = {}): Promise<{
+    granularity: 'week' | 'month' | 'quarter';
+    segment: string | null;
+    cohorts: string[];
+    periods: number[];
+    cohort_sizes: number[];
+    active: Array<Array<number | null>>;
+    retention_pct: Array<Array<number | null>>;
+  }> => {
+    const response = await apiClient.get('/metrics/cohort-matrix', {
+      params: {
+        ...(params.granularity && { granularity: params.granularity }),
+        ...(params.segment && { segment: params.segment }),
+        ...(params.startDate && { start_date: params.startDate }),
+        ...(params.endDate && { end_date: params.endDate }),
+        ...(params.maxPeriods && { max_periods: params.maxPeriods }),
+        ...(params.minCohortSize && { min_cohort_size: params.minCohortSize }),
+      },
+    });
+    return response.data;
+  },
+
   /**
    * Get Gross Merchandise Value (GMV) trend
    */
@@ -328,6 +360,87 @@ export const metricsApi = {
     const response = await apiClient.get('/metrics/attach-rate-detailed');
     return response.data;
   },
+
+  /**
+   * Get every dashboard panel in one request (panels run concurrently server-side)
+   */
+  getDashboard: async (filters: {
+    months?: number;
+    year?: number;
+    segment?: string;
+    startDate?: string;
+    endDate?: string;
+    cohortMonth?: string;
+  } = {}): Promise<{
+    panels: {
+      summary?: { total_revenue: number; total_orders: number; avg_order_value: number; customer_satisfaction: number };
+      revenue_trend?: Array<{ month: string; revenue: number; orders: number }>;
+      channel_breakdown?: Array<{ channel: string; revenue: number }>;
+      gmv_trend?: Array<{
+        month: string;
+        gmv: number;
+        net_revenue: number;
+        total_discounts: number;
+        discount_rate_pct: number;
+        order_count: number;
+        customer_count: number;
+      }>;
+      cac_by_channel?: Array<{ channel: string; total_spend: number; new_customers: number; cac: number; cac_grade: string }>;
+      arpu_by_segment?: Array<{
+        customer_segment: string;
+        order_year: number;
+        arpu: number;
+        customer_count: number;
+        total_revenue: number;
+        avg_orders_per_customer: number;
+      }>;
+      attach_rate?: Array<{
+        month: string;
+        customer_segment: string;
+        total_orders: number;
+        sides_attach_rate_pct: number;
+        dessert_attach_rate_pct: number;
+        beverage_attach_rate_pct: number;
+        any_addon_rate_pct: number;
+      }>;
+      attach_rate_detailed?: Array<{ product: string; rate: number; revenue: number; trend: number }>;
+      hourly_heatmap?: Array<{ day: string; hour: number; dayIndex: number; value: number }>;
+      cohort_retention?: Array<{
+        cohort_month: string;
+        months_since_acquisition: number;
+        cohort_size: number;
+        active_customers: number;
+        retention_rate_pct: number;
+        total_revenue: number;
+        avg_revenue_per_customer: number;
+      }>;
+      cohort_matrix?: {
+        granularity: 'week' | 'month' | 'quarter';
+        segment: string | null;
+        cohorts: string[];
+        periods: number[];
+        cohort_sizes: number[];
+        active: Array<Array<number | null>>;
+        retention_pct: Array<Array<number | null>>;
+      };
+    };
+    errors: Record<string, string>;
+    timings_ms: Record<string, number>;
+    // Panels served from last-good results during a warehouse outage (age in seconds)
+    stale_seconds?: Record<string, number>;
+  }> => {
+    const response = await apiClient.get('/metrics/dashboard', {
+      params: {
+        ...(filters.months && { months: filters.months }),
+        ...(filters.year && { year: filters.year }),
+        ...(filters.segment && { segment: filters.segment }),
+        ...(filters.startDate && { start_date: filters.startDate }),
+        ...(filters.endDate && { end_date: filters.endDate }),
+        ...(filters.cohortMonth && { cohort_month: filters.cohortMonth }),
+      },
+    });
+    return response.data;
+  },
 };
 
 export default apiClient;
@@ -1,25 +1,28 @@
 /**
  * Cohort Retention Matrix - Month-over-month retention visualization
  * Based on MarketingDashboard.jsx pattern
+ *
+ * Renders the dense matrix computed server-side by /metrics/cohort-matrix
+ * (rows = cohorts oldest first, columns = periods since acquisition).
  */
 
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Activity } from "lucide-react";
 
-interface CohortData {
-  cohort_month: string;
-  months_since_acquisition: number;
-  retention_rate_pct: number;
+interface CohortMatrix {
+  cohorts: string[];
+  periods: number[];
+  retention_pct: Array<Array<number | null>>;
 }
 
 interface CohortRetentionMatrixProps {
-  data: CohortData[];
+  matrix?: CohortMatrix;
   isLoading?: boolean;
 }
 
-export function CohortRetentionMatrix({ data, isLoading }: CohortRetentionMatrixProps) {
+export function CohortRetentionMatrix({ matrix, isLoading }: CohortRetentionMatrixProps) {
   // Guard against undefined/null data
-  if (!data || !Array.isArray(data)) {
+  if (!isLoading && (!matrix || !Array.isArray(matrix.cohorts))) {
     return (
       <Card>
         <CardHeader>
@@ -35,7 +38,7 @@ export function CohortRetentionMatrix({ data, isLoading }: CohortRetentionMatrix
     );
   }
 
-  if (isLoading) {
+  if (isLoading || !matrix) {
     return (
       <Card>
         <CardHeader>
@@ -53,18 +56,9 @@ export function CohortRetentionMatrix({ data, isLoading }: CohortRetentionMatrix
     );
   }
 
-  // Group data by cohort
-  const cohortMap = data.reduce((acc, row) => {
-    const cohortKey = row.cohort_month;
-    if (!acc[cohortKey]) {
-      acc[cohortKey] = {};
-    }
-    acc[cohortKey][row.months_since_acquisition] = row.retention_rate_pct;
-    return acc;
-  }, {} as Record<string, Record<number, number>>);
-
-  const cohorts = Object.keys(cohortMap).sort().slice(-6); // Last 6 cohorts
-  const maxMonths = 6;
+  const maxMonths = Math.min(6, matrix.periods.length);
+  const firstRow = Math.max(0, matrix.cohorts.length - 6); // Last 6 cohorts
+  const cohorts = matrix.cohorts.slice(firstRow);
 
   const getColor = (value: number) => {
     if (value >= 80) return '#10B981';
@@ -101,14 +95,14 @@ export function CohortRetentionMatrix({ data, isLoading }: CohortRetentionMatrix
           </div>
 
           {/* Data rows */}
-          {cohorts.map((cohort) => (
+          {cohorts.map((cohort, row) => (
             <div key={cohort} className="flex mb-1">
               <div className="w-20 flex-shrink-0 text-[11px] font-medium text-gray-700 flex items-center">
                 {formatCohortLabel(cohort)}
               </div>
               {Array.from({ length: maxMonths }, (_, i) => {
-                const value = cohortMap[cohort][i];
-                const hasValue = value !== undefined;
+                const value = matrix.retention_pct[firstRow + row][i];
+                const hasValue = value !== null && value !== undefined;
 
                 return (
                   <div
@@ -98,91 +98,48 @@ export function Dashboard() {
 
   const { startDate, endDate } = getDateRange(dateRange);
 
-  // Fetch dashboard metrics (with date filter so it updates)
-  const { data: metrics, isLoading: metricsLoading } = useQuery({
-    queryKey: ["dashboard-metrics", startDate, endDate, segment, channel],
-    queryFn: metricsApi.getSummary,
-  });
-
-  // Fetch revenue trend with date range filter
-  const { data: revenueTrend, isLoading: trendLoading } = useQuery({
-    queryKey: ["revenue-trend", dateRange, startDate, endDate, segment, channel],
-    queryFn: () => metricsApi.getRevenueTrend(parseInt(dateRange)),
-  });
-
-  // Fetch GMV trend (uses date range and all filters)
-  const { data: gmvTrend, isLoading: gmvLoading } = useQuery({
-    queryKey: ["gmv-trend", startDate, endDate, segment, channel],
-    queryFn: () => metricsApi.getGmvTrend(startDate, endDate),
-  });
-
-  // Fetch channel mix (uses date range and channel filter) - TODO: Use in visualizations
-  // const { data: channelMix } = useQuery({
-  //   queryKey: ["channel-mix", startDate, endDate, channel, segment],
-  //   queryFn: () => metricsApi.getChannelMix(startDate, endDate),
-  // });
-
-  // Fetch CAC by channel (with ALL filters so it updates)
-  const { data: cacByChannel, isLoading: cacLoading, error: cacError } = useQuery({
-    queryKey: ["cac-by-channel", startDate, endDate, segment, channel],
-    queryFn: metricsApi.getCacByChannel,
-    retry: 1,
-  });
-
-  if (cacError) {
-    console.error("CAC by channel error:", cacError);
-  }
-
-  // Fetch ARPU by segment (with ALL filters so it updates)
-  const { data: arpuBySegment, isLoading: arpuLoading } = useQuery({
-    queryKey: ["arpu-by-segment", startDate, endDate, segment, channel],
-    queryFn: () => metricsApi.getArpuBySegment(),
-  });
-
-  // Fetch attach rate (uses date range and segment)
-  const { data: attachRate, isLoading: attachLoading } = useQuery({
-    queryKey: ["attach-rate", segment, startDate, endDate, channel],
-    queryFn: () => metricsApi.getAttachRate(
-      segment !== "all" ? segment : undefined,
+  // Fetch every panel in one round trip; the backend runs the panel queries
+  // concurrently and reports slow or failing panels in `errors`
+  const { data: dashboard, isLoading: dashboardLoading } = useQuery({
+    queryKey: ["dashboard", dateRange, startDate, endDate, segment],
+    queryFn: () => metricsApi.getDashboard({
+      months: parseInt(dateRange),
+      segment: segment !== "all" ? segment : undefined,
       startDate,
-      endDate
-    ),
-  });
-
-  // Fetch hourly heatmap data
-  const { data: hourlyHeatmap, isLoading: heatmapLoading } = useQuery({
-    queryKey: ["hourly-heatmap"],
-    queryFn: metricsApi.getHourlyHeatmap,
-  });
-
-  // Fetch detailed attach rate for rings visualization
-  const { data: attachRateDetailed, isLoading: attachDetailedLoading, error: attachDetailedError } = useQuery({
-    queryKey: ["attach-rate-detailed"],
-    queryFn: metricsApi.getAttachRateDetailed,
-    retry: 1,
+      endDate,
+    }),
   });
 
-  // Log any errors for debugging
-  if (attachDetailedError) {
-    console.error("Attach rate detailed error:", attachDetailedError);
+  const panels = dashboard?.panels;
+  if (dashboard && Object.keys(dashboard.errors).length > 0) {
+    console.error("Dashboard panel errors:", dashboard.errors);
   }
 
-  // Fetch cohort retention data
-  const { data: cohortRetention, isLoading: cohortLoading, error: cohortError } = useQuery({
-    queryKey: ["cohort-retention"],
-    queryFn: () => metricsApi.getCohortRetention(),
-    retry: 1,
-  });
-
-  if (cohortError) {
-    console.error("Cohort retention error:", cohortError);
-  }
-
-  // Fetch channel breakdown (with ALL filters so it updates)
-  const { data: channelBreakdown, isLoading: channelLoading } = useQuery({
-    queryKey: ["channel-breakdown", startDate, endDate, segment, channel],
-    queryFn: metricsApi.getChannelBreakdown,
-  });
+  const metrics = panels?.summary;
+  const revenueTrend = panels?.revenue_trend;
+  const gmvTrend = panels?.gmv_trend;
+  const cacByChannel = panels?.cac_by_channel;
+  const arpuBySegment = panels?.arpu_by_segment;
+  const attachRate = panels?.attach_rate;
+  const hourlyHeatmap = panels?.hourly_heatmap;
+  const attachRateDetailed = panels?.attach_rate_detailed;
+  const cohortMatrix = panels?.cohort_matrix;
+  const channelBreakdown = panels?.channel_breakdown;
+
+  const cacError = dashboard?.errors.cac_by_channel;
+  const attachDetailedError = dashboard?.errors.attach_rate_detailed;
+  const cohortError = dashboard?.errors.cohort_matrix;
+
+  const metricsLoading = dashboardLoading;
+  const trendLoading = dashboardLoading;
+  const gmvLoading = dashboardLoading;
+  const cacLoading = dashboardLoading;
+  const arpuLoading = dashboardLoading;
+  const attachLoading = dashboardLoading;
+  const heatmapLoading = dashboardLoading;
+  const attachDetailedLoading = dashboardLoading;
+  const cohortLoading = dashboardLoading;
+  const channelLoading = dashboardLoading;
 
   // Filter channel data based on selection (client-side for now)
   const filteredChannelData = channel === "all"
@@ -1020,7 +977,7 @@ export function Dashboard() {
         {/* Advanced Analytics Tab */}
         <TabsContent value="advanced" className="space-y-6">
           {/* Cohort Retention Matrix */}
-          <CohortRetentionMatrix data={cohortRetention || []} isLoading={cohortLoading} />
+          <CohortRetentionMatrix matrix={cohortMatrix} isLoading={cohortLoading} />
 
           {/* Hourly Patterns */}
           <OrderHeatmap data={hourlyHeatmap || []} isLoading={heatmapLoading} />
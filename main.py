@@ -19,22 +19,31 @@ logger = logging.getLogger(__name__)
 backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
 sys.path.insert(0, backend_path)
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, Response
 from datetime import datetime
 from typing import Dict, Optional
+import asyncio
 import time
 
 # Import backend modules
 from app.api.routes import metrics, chat as chat_api, genie
+from app.api.staleness import AGE_HEADER, STALE_HEADER, StaleResultMiddleware
+from app.api.cancellation import cancel_on_disconnect
+from app.api.streaming import ndjson_response
+from app.repositories.admission import QueryPriority, WarehouseBusyError
+from app.repositories.circuit_breaker import CircuitOpenError
 from app.models.schemas import HealthResponse
 
 # Global file cache: {file_path: (content_bytes, content_type, timestamp)}
 file_cache: Dict[str, tuple[bytes, str, float]] = {}
 CACHE_MAX_AGE = 3600  # 1 hour cache
 from app.core.config import settings
+from app.core.lifecycle import (
+    restore_dashboard_snapshot, start_background_services, stop_background_services
+)
 
 # Import for explore endpoints
 from typing import List
@@ -56,8 +65,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[STALE_HEADER, AGE_HEADER],
 )
 
+# Flag responses answered from last-good results during a warehouse outage
+app.add_middleware(StaleResultMiddleware)
+
 # ============================================================================
 # API ROUTES
 # ============================================================================
@@ -92,72 +105,114 @@ class SchemaAssets(BaseModel):
     tables: List[TableInfo]
     volumes: List[VolumeInfo]
 
-# Cache for schema manifest
+# Cache for schema manifest (restored from the dashboard snapshot at startup)
 _schema_cache: List[SchemaAssets] | None = None
+_schema_cache_at: float = 0
+
+def generate_schema_manifest() -> List[SchemaAssets]:
+    """List tables and volumes of the configured schemas using the WorkspaceClient SDK"""
+    from databricks.sdk import WorkspaceClient
+
+    w = WorkspaceClient()
+    schemas_to_fetch = [
+        ("main", "dominos_analytics"),
+        ("main", "dominos_realistic"),
+        ("main", "dominos_files"),
+    ]
+
+    results = []
+    for catalog, schema_name in schemas_to_fetch:
+        tables = []
+        volumes = []
+
+        try:
+            for table in w.tables.list(catalog_name=catalog, schema_name=schema_name):
+                tables.append(TableInfo(
+                    name=table.name,
+                    full_name=table.full_name,
+                    table_type=table.table_type.value if table.table_type else None,
+                    comment=table.comment,
+                ))
+        except Exception as e:
+            logger.warning(f"Failed to list tables in {catalog}.{schema_name}: {e}")
+
+        try:
+            for volume in w.volumes.list(catalog_name=catalog, schema_name=schema_name):
+                volumes.append(VolumeInfo(
+                    name=volume.name,
+                    full_name=volume.full_name,
+                    volume_type=volume.volume_type.value if volume.volume_type else None,
+                    storage_location=volume.storage_location,
+                    comment=volume.comment
+                ))
+        except Exception as e:
+            logger.warning(f"Failed to list volumes in {catalog}.{schema_name}: {e}")
+
+        results.append(SchemaAssets(catalog=catalog, schema=schema_name, tables=tables, volumes=volumes))
+
+    return results
+
+def _regenerate_schema_cache() -> None:
+    """Regenerate the schema manifest cache (runs on a worker thread)"""
+    global _schema_cache, _schema_cache_at
+    try:
+        _schema_cache = generate_schema_manifest()
+        _schema_cache_at = time.time()
+    except Exception as e:
+        logger.error(f"Failed to regenerate schema manifest: {e}")
 
 @app.get("/api/explore/schemas", response_model=List[SchemaAssets])
 async def get_explore_schemas():
     """Get all tables and volumes from configured schemas"""
-    global _schema_cache
+    global _schema_cache, _schema_cache_at
 
     if _schema_cache:
         return _schema_cache
 
-    from databricks.sdk import WorkspaceClient
-
     try:
-        w = WorkspaceClient()
-        schemas_to_fetch = [
-            ("main", "dominos_analytics"),
-            ("main", "dominos_realistic"),
-            ("main", "dominos_files"),
-        ]
-
-        results = []
-        for catalog, schema_name in schemas_to_fetch:
-            tables = []
-            volumes = []
-
-            try:
-                for table in w.tables.list(catalog_name=catalog, schema_name=schema_name):
-                    tables.append(TableInfo(
-                        name=table.name,
-                        full_name=table.full_name,
-                        table_type=table.table_type.value if table.table_type else None,
-                        comment=table.comment,
-                    ))
-            except Exception as e:
-                logger.warning(f"Failed to list tables in {catalog}.{schema_name}: {e}")
-
-            try:
-                for volume in w.volumes.list(catalog_name=catalog, schema_name=schema_name):
-                    volumes.append(VolumeInfo(
-                        name=volume.name,
-                        full_name=volume.full_name,
-                        volume_type=volume.volume_type.value if volume.volume_type else None,
-                        storage_location=volume.storage_location,
-                        comment=volume.comment
-                    ))
-            except Exception as e:
-                logger.warning(f"Failed to list volumes in {catalog}.{schema_name}: {e}")
-
-            results.append(SchemaAssets(catalog=catalog, schema=schema_name, tables=tables, volumes=volumes))
-
+        results = generate_schema_manifest()
         _schema_cache = results
+        _schema_cache_at = time.time()
         return results
     except Exception as e:
         logger.error(f"Failed to fetch schemas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/explore/tables/{catalog}/{schema}/{table}/preview")
-async def preview_table(catalog: str, schema: str, table: str):
+async def preview_table(
+    request: Request,
+    catalog: str,
+    schema: str,
+    table: str,
+    stream: bool = Query(False, description="Stream rows as NDJSON while result chunks arrive"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="Response shape: rows (list of objects) or columnar")
+):
     """Preview table data"""
     from app.repositories.databricks_repo import databricks_repo
     try:
         query = f"SELECT * FROM {catalog}.{schema}.{table} LIMIT 100"
-        results = databricks_repo.execute_query(query)
+        if stream:
+            return ndjson_response(
+                databricks_repo.aiter_query(query, batches=True, priority=QueryPriority.EXPLORE)
+            )
+
+        # Cancel the statement if the client disconnects while it runs
+        if format == "columnar":
+            result = await cancel_on_disconnect(
+                request, databricks_repo.execute_query_columnar_async(query, priority=QueryPriority.EXPLORE)
+            )
+            return {"table": f"{catalog}.{schema}.{table}", **result.to_dict()}
+
+        results = await cancel_on_disconnect(
+            request, databricks_repo.execute_query_async(query, priority=QueryPriority.EXPLORE)
+        )
         columns = list(results[0].keys()) if results else []
         return {"table": f"{catalog}.{schema}.{table}", "columns": columns, "rows": results}
+    except HTTPException:
+        raise
+    except (WarehouseBusyError, CircuitOpenError) as e:
+        logger.warning(f"Preview of {catalog}.{schema}.{table} rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to preview table: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -377,11 +432,32 @@ async def startup_event():
     else:
         logger.warning("⚠️ Databricks credentials not configured")
 
+    # Restore the last snapshot (with its original timestamps) so the first
+    # requests after a restart are answered from memory
+    global _schema_cache, _schema_cache_at
+    snapshot = restore_dashboard_snapshot(lambda: (_schema_cache, _schema_cache_at))
+
+    if snapshot and snapshot.schema_manifest is not None:
+        _schema_cache = [SchemaAssets(**s) for s in snapshot.schema_manifest]
+        _schema_cache_at = snapshot.schema_manifest_at
+        manifest_age = time.time() - _schema_cache_at
+        logger.info(f"Schema manifest restored from snapshot ({manifest_age:.0f}s old)")
+
+        # Regenerate a stale manifest without holding up startup
+        if manifest_age > 3600:
+            asyncio.get_running_loop().run_in_executor(None, _regenerate_schema_cache)
+
+    # Precompute dashboard metrics and track source table changes in the background
+    start_background_services()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown"""
     logger.info("Shutting down application...")
 
+    # Stop background refresh and persist the latest values
+    await stop_background_services()
+
     # Close Databricks connection
     from app.repositories.databricks_repo import databricks_repo
     databricks_repo.close()